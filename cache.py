@@ -0,0 +1,86 @@
+"""Window property cache shared by the plugin and service processes.
+
+Values live in home-window (10000) properties under ``watchorder.<key>`` as
+JSON.  Kept apart from ``collections_mod`` so routes that only need the
+property store (playback, watched state) don't load the config machinery.
+
+Entries are validated either by age (``ttl``) or, for data with a known
+owner, by a generation: the entry is valid exactly until the generation it
+was stored under changes.  Generations combine a local counter, bumped in
+the shared property store by whichever process writes, with a cheap version
+probe of the remote source, so edits from this install and from elsewhere
+are both seen on the next read.
+"""
+
+import json
+import time
+
+import xbmcgui
+
+
+_CACHE_PREFIX = "watchorder."
+_CACHE_TTL = 300  # seconds
+_GEN_PREFIX = "gen."
+
+
+def _cache_get(key, ttl=_CACHE_TTL, generation=None):
+    """Return cached value from Kodi home-window properties, or None if stale.
+
+    With ``generation`` the entry is valid only if it was stored under that
+    same generation and ``ttl`` is ignored.
+    """
+    win = xbmcgui.Window(10000)
+    raw = win.getProperty(_CACHE_PREFIX + key)
+    if not raw:
+        return None
+    try:
+        stored = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if generation is not None:
+        if stored.get("g") != generation:
+            return None
+    elif time.time() - stored.get("t", 0) > ttl:
+        return None
+    return stored.get("v")
+
+
+def _cache_set(key, value, generation=None):
+    """Store a value in Kodi home-window properties with a timestamp."""
+    win = xbmcgui.Window(10000)
+    stored = {"t": time.time(), "v": value}
+    if generation is not None:
+        stored["g"] = generation
+    win.setProperty(_CACHE_PREFIX + key, json.dumps(stored))
+
+
+def _cache_replace(key, value):
+    """Update a cached value in place, keeping the generation it was stored under."""
+    win = xbmcgui.Window(10000)
+    try:
+        generation = json.loads(win.getProperty(_CACHE_PREFIX + key)).get("g")
+    except (ValueError, TypeError, AttributeError):
+        return
+    _cache_set(key, value, generation=generation)
+
+
+def _cache_clear(key):
+    """Remove a cached value from Kodi home-window properties."""
+    win = xbmcgui.Window(10000)
+    win.clearProperty(_CACHE_PREFIX + key)
+
+
+def get_generation(name):
+    """Return the local write counter for ``name`` (0 if never bumped)."""
+    raw = xbmcgui.Window(10000).getProperty(_CACHE_PREFIX + _GEN_PREFIX + name)
+    try:
+        return int(raw)
+    except ValueError:
+        return 0
+
+
+def bump_generation(name):
+    """Invalidate every entry cached under ``name``'s current generation."""
+    xbmcgui.Window(10000).setProperty(
+        _CACHE_PREFIX + _GEN_PREFIX + name, str(get_generation(name) + 1),
+    )
@@ -1,11 +1,17 @@
+import hashlib
 import json
-import time
 
 import xbmc
 import xbmcgui
 import xbmcplugin
 import xbmcvfs
 
+# The window property cache lives in ``cache``; re-exported for callers that
+# import it from here.
+from cache import (  # noqa: F401
+    _CACHE_PREFIX, _cache_get, _cache_set, _cache_replace, _cache_clear,
+    get_generation, bump_generation,
+)
 
 # Config key / item-array-name mapping
 _TYPE_MAP = {
@@ -34,42 +40,6 @@ def _label(media_type):
     return "TV" if media_type == "tv" else "Movie"
 
 
-# -- Window property cache ----------------------------------------------------
-
-_CACHE_PREFIX = "watchorder."
-_CACHE_TTL = 300  # seconds
-
-
-def _cache_get(key, ttl=_CACHE_TTL):
-    """Return cached value from Kodi home-window properties, or None if expired."""
-    win = xbmcgui.Window(10000)
-    raw = win.getProperty(_CACHE_PREFIX + key)
-    if not raw:
-        return None
-    try:
-        stored = json.loads(raw)
-    except (ValueError, TypeError):
-        return None
-    if time.time() - stored.get("t", 0) > ttl:
-        return None
-    return stored.get("v")
-
-
-def _cache_set(key, value):
-    """Store a value in Kodi home-window properties with a timestamp."""
-    win = xbmcgui.Window(10000)
-    win.setProperty(
-        _CACHE_PREFIX + key,
-        json.dumps({"t": time.time(), "v": value}),
-    )
-
-
-def _cache_clear(key):
-    """Remove a cached value from Kodi home-window properties."""
-    win = xbmcgui.Window(10000)
-    win.clearProperty(_CACHE_PREFIX + key)
-
-
 # -- Config I/O ---------------------------------------------------------------
 
 def _ensure_keys(config):
@@ -82,31 +52,52 @@ def _ensure_keys(config):
 
 
 def load_config():
+    """Return the collection config with its derived index under ``_index``.
+
+    Within one plugin invocation every caller gets the same dict (see
+    ``memo``), so the config is decoded at most once per navigation.
+    """
+    import memo
+    return memo.cached(("config",), _load_config)
+
+
+def _config_generation():
+    """Local save counter plus the shared MySQL row's version (None if unused)."""
+    from db import db_config_version
+    return [get_generation("config"), db_config_version()]
+
+
+def _load_config():
+    import sync_queue
     from main import ADDON_ID, CONFIG_DIR, CONFIG_PATH
     from db import db_load_config
 
-    # Check window-property cache first
-    cached = _cache_get("config")
+    # Check window-property cache first.  The probe runs before the load, so
+    # a concurrent remote edit at worst costs one extra reload.
+    generation = _config_generation()
+    cached = _cache_get("config", generation=generation)
     if cached is not None:
         return cached
 
-    # Try MySQL first
-    mysql_config = db_load_config()
+    # Try MySQL first, unless our own newer save is still queued for it
+    mysql_config = None if sync_queue.pending() else db_load_config()
     if mysql_config is not None:
         config = _ensure_keys(mysql_config)
-        _cache_set("config", config)
+        config[_INDEX_KEY] = _load_index(config)
+        _cache_set("config", config, generation=generation)
         return config
 
     # Fall back to local JSON
     if not xbmcvfs.exists(CONFIG_DIR):
         xbmcvfs.mkdirs(CONFIG_DIR)
     if not xbmcvfs.exists(CONFIG_PATH):
-        save_config(DEFAULT_CONFIG)
+        save_config(dict(DEFAULT_CONFIG))
     try:
         with xbmcvfs.File(CONFIG_PATH, "r") as f:
             config = json.loads(f.read())
         _ensure_keys(config)
-        _cache_set("config", config)
+        config[_INDEX_KEY] = _load_index(config)
+        _cache_set("config", config, generation=generation)
         return config
     except Exception as e:
         xbmc.log(
@@ -116,51 +107,316 @@ def load_config():
 
 
 def save_config(config):
+    import memo
+    import sync_queue
     from main import CONFIG_DIR, CONFIG_PATH
-    from db import db_save_config
+    from db import _shared_collections_enabled, db_save_config
 
-    # Clear cache before writing so failures don't leave stale data
+    # Invalidate every process's cached copy before writing so failures
+    # don't leave stale data
+    bump_generation("config")
     _cache_clear("config")
 
+    # The index is derived data; it is never written into the config itself.
+    previous = config.pop(_INDEX_KEY, None) or _read_index()
+
     # Always write local JSON first (backup / fallback)
     if not xbmcvfs.exists(CONFIG_DIR):
         xbmcvfs.mkdirs(CONFIG_DIR)
     with xbmcvfs.File(CONFIG_PATH, "w") as f:
         f.write(json.dumps(config, indent=4))
 
-    # Best-effort write to MySQL
-    db_save_config(config)
+    # MySQL is written behind by the service when it is running; otherwise
+    # best-effort, in line
+    if _shared_collections_enabled() and sync_queue.service_running():
+        sync_queue.enqueue(config)
+    elif db_save_config(config):
+        # Written in line; anything still queued is older than this.
+        sync_queue.discard()
+
+    index = build_index(config, previous=previous)
+    _write_index(index)
+    config[_INDEX_KEY] = index
 
     # Re-populate cache with the saved config
-    _cache_set("config", config)
+    _cache_set("config", config, generation=_config_generation())
+    memo.put(("config",), config)
+
+
+# -- Collection index ----------------------------------------------------------
+#
+# Listings need to answer "which collection is this title / show / linked
+# movie in?" for every row.  Rather than scanning every collection per row,
+# save_config() derives an index from the config and stores it in
+# ``INDEX_FILE`` beside it, stamped with a digest of the config it was built
+# from.  load_config() attaches it under ``_INDEX_KEY``; a config changed
+# elsewhere (e.g. another install sharing MySQL) no longer matches the digest
+# and gets a fresh index.  Titles are keyed lowercased, as in every other
+# title lookup.
+#
+#   {"digest": str,
+#    "tv":    {"titles": {lowercased title: [col, pos]}, "counts": [int]},
+#    "movie": {"titles": {lowercased title: [col, pos]}, "counts": [int]},
+#    "markers":   {"movie:<id>": col},       # collection-level linked movies
+#    "showids":   {lowercased title: [tvshowid]},
+#    "tvshowids": {"<tvshowid>": col},
+#    "unresolved": [lowercased title],       # members not found in the library
+#    "unresolved_movies": [lowercased title]}  # the same, from _member_lookup
+
+INDEX_FILE = "collections_index.json"
+_INDEX_KEY = "_index"
+# Part of the digest, so an index stored in an older layout is rebuilt.
+_INDEX_VERSION = 2
+
+
+def _config_digest(config):
+    data = {k: v for k, v in config.items() if k != _INDEX_KEY}
+    data[_INDEX_KEY] = _INDEX_VERSION
+    return hashlib.sha1(
+        json.dumps(data, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def build_index(config, resolve_shows=True, previous=None):
+    """Derive the lookup index for ``config`` (see the section comment).
+
+    With ``resolve_shows`` false no library lookup is made: ``tvshowids``
+    stays empty and every TV title counts as unresolved.  Otherwise show ids
+    already resolved in ``previous`` (the index this one replaces) are
+    reused, so only new or unresolved titles are looked up.
+    """
+    index = {
+        "digest": _config_digest(config),
+        "markers": {},
+        "showids": {},
+        "tvshowids": {},
+        "unresolved": [],
+    }
+    written = {}  # lowercased TV title: the title as entered
+    for media_type in ("tv", "movie"):
+        titles = {}
+        counts = []
+        ikey = _items_key(media_type)
+        for col_idx, col in enumerate(_get_collections(config, media_type)):
+            entries = col.get(ikey, [])
+            counts.append(len(entries))
+            for pos, entry in enumerate(entries):
+                if not isinstance(entry, str):
+                    continue
+                if media_type == "tv" and entry.startswith("movie:"):
+                    try:
+                        int(entry.split(":")[1])
+                    except (ValueError, IndexError):
+                        continue
+                    index["markers"].setdefault(entry, col_idx)
+                else:
+                    titles.setdefault(entry.lower(), [col_idx, pos])
+                    if media_type == "tv":
+                        written.setdefault(entry.lower(), entry)
+        index[media_type] = {"titles": titles, "counts": counts}
+    if resolve_shows:
+        _resolve_show_ids(index, previous=previous, written=written)
+    else:
+        index["unresolved"] = sorted(index["tv"]["titles"])
+    return index
+
+
+def _resolve_show_ids(index, library_shows=None, previous=None, written=None):
+    """Fill ``tvshowids`` by matching TV collection titles against the library.
+
+    Without ``library_shows``, titles resolved in ``previous`` keep their
+    ids and the rest are fetched with an exact-title filter.  Titles new
+    since ``previous`` that the filter misses are then matched against the
+    whole library, case-insensitively (see :func:`_member_lookup`); titles
+    it already failed to resolve are not, so a member missing from the
+    library doesn't cost a full fetch on every save.
+    """
+    titles = index["tv"]["titles"]
+    showids = {}
+    if library_shows is not None:
+        _match_shows(showids, titles, library_shows)
+    elif titles:
+        from tv import get_library_shows
+
+        previous = previous or {}
+        showids = {t: ids for t, ids in previous.get("showids", {}).items()
+                   if t in titles}
+        wanted = [t for t in titles if t not in showids]
+        if wanted:
+            written = written or {}
+            _match_shows(showids, titles, get_library_shows(
+                properties=["title"],
+                titles=[written.get(t, t) for t in wanted]))
+            tried = set(previous.get("unresolved", []))
+            if any(t not in showids and t not in tried for t in wanted):
+                _match_shows(showids, titles,
+                             get_library_shows(properties=["title"]))
+    index["showids"] = showids
+    index["tvshowids"] = {str(i): titles[t][0]
+                          for t, ids in showids.items() for i in ids}
+    index["unresolved"] = sorted(set(titles) - set(showids))
+
+
+def _match_shows(showids, titles, library_shows):
+    for show in library_shows:
+        key = show["title"].lower()
+        if key in titles:
+            ids = showids.setdefault(key, [])
+            if show["tvshowid"] not in ids:
+                ids.append(show["tvshowid"])
+
+
+def get_index(config):
+    """Return the index attached to ``config``, building it if absent.
+
+    Configs that didn't come from :func:`load_config` get an index without
+    resolved show ids, so lookups by id fall back to the title.
+    """
+    index = config.get(_INDEX_KEY)
+    if index is None:
+        index = build_index(config, resolve_shows=False)
+        config[_INDEX_KEY] = index
+    return index
+
+
+def refresh_show_ids(config, library_shows):
+    """Re-resolve tvshowids if ``library_shows`` disagrees with the index.
+
+    Shows removed and re-added to the library come back with new ids; a
+    listing that already holds every show row can spot that for free.
+    """
+    index = get_index(config)
+    titles = index["tv"]["titles"]
+    tvshowids = index["tvshowids"]
+    for show in library_shows:
+        hit = titles.get(show["title"].lower())
+        if hit is not None and tvshowids.get(str(show["tvshowid"])) != hit[0]:
+            break
+    else:
+        return
+    _resolve_show_ids(index, library_shows)
+    _write_index(index)
+    _cache_replace("config", config)
+
+
+def _read_index():
+    """Return the stored index, whatever config it was built from, or None."""
+    from main import CONFIG_DIR
+
+    path = CONFIG_DIR + INDEX_FILE
+    if not xbmcvfs.exists(path):
+        return None
+    try:
+        with xbmcvfs.File(path, "r") as f:
+            index = json.loads(f.read())
+    except (ValueError, TypeError):
+        return None
+    return index if isinstance(index, dict) else None
+
+
+def _load_index(config):
+    """Return the stored index if it was built from ``config``, else rebuild."""
+    stored = _read_index()
+    if stored is not None and stored.get("digest") == _config_digest(config):
+        return stored
+    index = build_index(config, previous=stored)
+    _write_index(index)
+    return index
+
+
+def _write_index(index):
+    from main import ADDON_ID, CONFIG_DIR
+
+    try:
+        with xbmcvfs.File(CONFIG_DIR + INDEX_FILE, "w") as f:
+            f.write(json.dumps(index))
+    except Exception as e:
+        xbmc.log(
+            "{}: Failed to write collection index: {}".format(ADDON_ID, e),
+            xbmc.LOGWARNING,
+        )
 
 
 # -- Tag folders ---------------------------------------------------------------
 
+_TAG_KINDS = {
+    "tv": ("tvshow", "VideoLibrary.GetTVShows"),
+    "movie": ("movie", "VideoLibrary.GetMovies"),
+}
+
+
+def get_tag_counts(media_type):
+    """Return ``{tag: number of items}`` for TV or Movies.
+
+    Cached in the property store until the library change log moves on (or,
+    without the service, for ``_CACHE_TTL``), so opening "by Tag" doesn't
+    touch the library at all on repeat visits.
+    """
+    import library_state
+
+    key = "tags." + media_type
+    token = library_state.current()
+    counts = _cache_get(key, generation=token)
+    if counts is None:
+        counts = _query_tag_counts(media_type)
+        if counts is not None:
+            _cache_set(key, counts, generation=token)
+    return counts or {}
+
+
+def _query_tag_counts(media_type):
+    """Count items per tag from the video DB or snapshot, else JSON-RPC."""
+    from db import read_tag_counts
+    from main import jsonrpc, jsonrpc_batch
+    from snapshot import get_tag_counts as snapshot_tag_counts
+
+    kind, method = _TAG_KINDS[media_type]
+    counts = read_tag_counts(kind)
+    if counts is None:
+        counts = snapshot_tag_counts(kind)
+    if counts is not None:
+        return counts
+
+    result = jsonrpc("VideoLibrary.GetTags", {"type": kind})
+    if result is None:
+        return None
+    names = [t["label"] for t in result.get("tags", [])]
+    # One-row pages: only the ``limits.total`` of each answer is used.
+    totals = jsonrpc_batch(
+        (method, {
+            "filter": {"field": "tag", "operator": "is", "value": name},
+            "limits": {"start": 0, "end": 1},
+        })
+        for name in names
+    )
+    counts = {}
+    for name, total in zip(names, totals):
+        if total is None:
+            return None
+        count = total.get("limits", {}).get("total", 0)
+        if count:
+            counts[name] = count
+    return counts
+
+
 def list_tag_folders(media_type):
-    """Show tag sub-folders for TV or Movies."""
+    """Show tag sub-folders for TV or Movies, labelled with their item counts."""
+    from listing import Directory
     from main import HANDLE, build_url
+    from tag_query import quote
 
-    if media_type == "tv":
-        from tv import get_library_shows
-        items = get_library_shows(properties=["title", "tag"])
-    else:
-        from movies import get_library_movies
-        items = get_library_movies(properties=["title", "tag"])
-
-    tags = set()
-    for item in items:
-        for t in item.get("tag", []):
-            tags.add(t)
+    counts = get_tag_counts(media_type)
 
     action = "root_tv" if media_type == "tv" else "root_movies"
     xbmcplugin.setContent(HANDLE, "files")
+    directory = Directory(HANDLE)
 
-    for t in sorted(tags):
-        li = xbmcgui.ListItem(t)
-        url = build_url({"action": action, "tag": t})
-        xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=True)
+    for t in sorted(counts):
+        li = xbmcgui.ListItem("{} ({})".format(t, counts[t]))
+        url = build_url({"action": action, "tag": quote(t)})
+        directory.add(url, li, True)
 
+    directory.flush()
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_NONE)
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_LABEL)
     xbmcplugin.endOfDirectory(HANDLE)
@@ -168,9 +424,61 @@ def list_tag_folders(media_type):
 
 # -- Collection item listing ---------------------------------------------------
 
+def _member_lookup(media_type, entries, tag=None):
+    """Return ``{lowercased title: library row}`` for a collection's members.
+
+    Only the members are fetched (an exact-title filter), so opening a
+    collection costs its size rather than the library's.  Kodi compares
+    titles case-sensitively on SQLite, so if a member isn't found this way
+    the whole library is matched case-insensitively instead -- unless the
+    index already knows that member is missing from the library, so one
+    stale title doesn't cost a full fetch on every call.  Movie titles the
+    fallback misses are recorded in the index for next time.  ``tag`` (an
+    expression) narrows both fetches.
+    """
+    if media_type == "tv":
+        from tv import get_library_shows as fetch
+        missing_key = "unresolved"
+    else:
+        from movies import get_library_movies as fetch
+        missing_key = "unresolved_movies"
+
+    titles = [e for e in entries
+              if isinstance(e, str) and not e.startswith("movie:")]
+    lookup = {r["title"].lower(): r for r in fetch(tag=tag, titles=titles)}
+    missing = {t.lower() for t in titles} - set(lookup)
+    if not missing:
+        return lookup
+    config = load_config()
+    index = get_index(config)
+    known = set(index.get(missing_key, []))
+    if missing <= known:
+        return lookup
+    lookup = {r["title"].lower(): r for r in fetch(tag=tag)}
+    if media_type == "movie" and tag is None:
+        index[missing_key] = sorted(known | (missing - set(lookup)))
+        _write_index(index)
+        _cache_replace("config", config)
+    return lookup
+
+
+def _collection_movie_ids(entries):
+    """Return the movie IDs of ``movie:<id>`` markers in a collection, in order."""
+    ids = []
+    for entry in entries:
+        if isinstance(entry, str) and entry.startswith("movie:"):
+            try:
+                ids.append(int(entry.split(":")[1]))
+            except (ValueError, IndexError):
+                pass
+    return ids
+
+
 def list_collection_items(collection_index, media_type):
     """Show the ordered items (shows or movies) inside a collection."""
-    from main import HANDLE, build_url, jsonrpc, watched_menu_item
+    import reorder
+    from listing import MOVIES, SHOWS, Directory
+    from main import HANDLE, build_url, watched_menu_item
 
     config = load_config()
     collections = _get_collections(config, media_type)
@@ -180,45 +488,47 @@ def list_collection_items(collection_index, media_type):
 
     col = collections[collection_index]
     ikey = _items_key(media_type)
+    # A reorder in progress is shown before it is saved.
+    entries = reorder.current(
+        reorder.collection_key(media_type, collection_index), col[ikey],
+    )
 
     if media_type == "tv":
-        from tv import get_library_shows, _build_movie_li, _MOVIE_PROPS
-        library_items = get_library_shows()
-        lookup_key = "title"
+        from tv import get_movie_details, _build_movie_li
         content_type = "tvshows"
-        media_type_tag = "tvshow"
+        view = SHOWS
         item_action = "seasons"
         item_id_key = "tvshowid"
         is_folder = True
     else:
-        from movies import get_library_movies
-        library_items = get_library_movies()
-        lookup_key = "title"
         content_type = "movies"
-        media_type_tag = "movie"
+        view = MOVIES
         item_action = "play_movie"
         item_id_key = "movieid"
         is_folder = False
 
-    library_lookup = {s[lookup_key].lower(): s for s in library_items}
+    library_lookup = _member_lookup(media_type, entries)
+
+    # Collection-level linked movies are fetched up front in one batch
+    # rather than one GetMovieDetails round trip per entry.
+    linked_movies = {}
+    if media_type == "tv":
+        linked_movies = get_movie_details(_collection_movie_ids(entries))
 
     xbmcplugin.setContent(HANDLE, content_type)
+    directory = Directory(HANDLE)
     missing = []
 
-    for pos, title in enumerate(col[ikey]):
+    for pos, title in enumerate(entries):
         # Handle linked movies at collection level (TV only)
         if media_type == "tv" and isinstance(title, str) and title.startswith("movie:"):
             try:
                 movieid = int(title.split(":")[1])
             except (ValueError, IndexError):
                 continue
-            result = jsonrpc(
-                "VideoLibrary.GetMovieDetails",
-                {"movieid": movieid, "properties": _MOVIE_PROPS},
-            )
-            if not result or "moviedetails" not in result:
+            movie = linked_movies.get(movieid)
+            if movie is None:
                 continue
-            movie = result["moviedetails"]
             li, url = _build_movie_li(movie, build_url)
             ctx = [
                 watched_menu_item(build_url, "movie",
@@ -235,7 +545,7 @@ def list_collection_items(collection_index, media_type):
                         "direction": "up",
                     })),
                 ))
-            if pos < len(col[ikey]) - 1:
+            if pos < len(entries) - 1:
                 ctx.append((
                     "Move Down",
                     "RunPlugin({})".format(build_url({
@@ -245,6 +555,16 @@ def list_collection_items(collection_index, media_type):
                         "direction": "down",
                     })),
                 ))
+            if len(entries) > 2:
+                ctx.append((
+                    "Move to Position...",
+                    "RunPlugin({})".format(build_url({
+                        "action": "move_in_collection",
+                        "index": collection_index,
+                        "pos": pos,
+                        "direction": "to",
+                    })),
+                ))
             ctx.append((
                 "Move to Episodes",
                 "RunPlugin({})".format(build_url({
@@ -263,7 +583,7 @@ def list_collection_items(collection_index, media_type):
             ))
 
             li.addContextMenuItems(ctx)
-            xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=False)
+            directory.add(url, li)
             continue
 
         item = library_lookup.get(title.lower())
@@ -271,22 +591,7 @@ def list_collection_items(collection_index, media_type):
             missing.append(title)
             continue
 
-        li = xbmcgui.ListItem(item["title"])
-        tag_info = li.getVideoInfoTag()
-        tag_info.setMediaType(media_type_tag)
-        tag_info.setTitle(item["title"])
-        tag_info.setPlot(item.get("plot", ""))
-        tag_info.setYear(item.get("year", 0))
-        tag_info.setRating(item.get("rating", 0.0))
-        if item.get("dateadded"):
-            tag_info.setDateAdded(item["dateadded"])
-        if item.get("lastplayed"):
-            tag_info.setLastPlayed(item["lastplayed"])
-        genres = item.get("genre", [])
-        if genres:
-            tag_info.setGenres(genres)
-        if item.get("art"):
-            li.setArt(item["art"])
+        li = view.build(item)
 
         # Context menu
         if media_type == "tv":
@@ -308,7 +613,7 @@ def list_collection_items(collection_index, media_type):
                     "direction": "up",
                 })),
             ))
-        if pos < len(col[ikey]) - 1:
+        if pos < len(entries) - 1:
             ctx.append((
                 "Move Down",
                 "RunPlugin({})".format(build_url({
@@ -318,6 +623,16 @@ def list_collection_items(collection_index, media_type):
                     "direction": "down",
                 })),
             ))
+        if len(entries) > 2:
+            ctx.append((
+                "Move to Position...",
+                "RunPlugin({})".format(build_url({
+                    "action": "move_in_{}collection".format(action_prefix),
+                    "index": collection_index,
+                    "pos": pos,
+                    "direction": "to",
+                })),
+            ))
         ctx.append((
             "Remove from {} Collection".format(_label(media_type)),
             "RunPlugin({})".format(build_url({
@@ -340,8 +655,9 @@ def list_collection_items(collection_index, media_type):
                 "movieid": item[item_id_key],
                 "file": item.get("file", ""),
             })
-        xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=is_folder)
+        directory.add(url, li, is_folder)
 
+    directory.flush()
     if missing:
         from main import ADDON_ID
         xbmc.log(
@@ -465,14 +781,7 @@ def action_set_collection_art(collection_index, media_type):
         return
     art_key = ["poster", "fanart"][art_type_idx]
 
-    if media_type == "tv":
-        from tv import get_library_shows
-        library_items = get_library_shows()
-    else:
-        from movies import get_library_movies
-        library_items = get_library_movies()
-
-    library_lookup = {s["title"].lower(): s for s in library_items}
+    library_lookup = _member_lookup(media_type, col[ikey])
 
     items = []
     art_urls = []
@@ -519,24 +828,49 @@ def action_set_collection_art(collection_index, media_type):
 
 
 def action_move_in_collection(collection_index, pos, direction, media_type):
-    """Move an item up or down within a collection."""
+    """Move an item up, down or (``direction="to"``) to a chosen position."""
+    import reorder
+
     config = load_config()
     collections = _get_collections(config, media_type)
     if collection_index >= len(collections):
         return
 
-    ikey = _items_key(media_type)
-    items = collections[collection_index][ikey]
-    if direction == "up" and pos > 0:
-        items[pos], items[pos - 1] = items[pos - 1], items[pos]
+    key = reorder.collection_key(media_type, collection_index)
+    stored = collections[collection_index][_items_key(media_type)]
+    items = list(reorder.current(key, stored))
+    if pos >= len(items):
+        return
+    if direction == "to":
+        new_pos = _ask_position(pos, len(items))
+        if new_pos is None:
+            return
+    elif direction == "up" and pos > 0:
+        new_pos = pos - 1
     elif direction == "down" and pos < len(items) - 1:
-        items[pos], items[pos + 1] = items[pos + 1], items[pos]
+        new_pos = pos + 1
+    else:
+        return
 
-    _set_collections(config, media_type, collections)
-    save_config(config)
+    reorder.move(items, pos, new_pos)
+    reorder.commit(config, key, items, immediate=direction == "to")
     xbmc.executebuiltin("Container.Refresh")
 
 
+def _ask_position(pos, count):
+    """Ask for a 1-based target position; return it 0-based, or None."""
+    value = xbmcgui.Dialog().numeric(
+        0, "Move to position (1-{})".format(count), str(pos + 1),
+    )
+    try:
+        new_pos = int(value) - 1
+    except (TypeError, ValueError):
+        return None
+    if new_pos == pos:
+        return None
+    return max(0, min(new_pos, count - 1))
+
+
 def action_remove_from_collection(collection_index, pos, media_type):
     """Remove an item from a collection."""
     config = load_config()
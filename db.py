@@ -5,10 +5,14 @@ section).  Falls back silently when mysql.connector is unavailable, MySQL is not
 configured, or the server is unreachable.
 """
 
+import hashlib
 import json
+import threading
+import time
 import xml.etree.ElementTree as ET
 
 import xbmc
+import xbmcgui
 import xbmcvfs
 
 _ADDON_ID = "plugin.video.watchorder"
@@ -16,11 +20,13 @@ _ADDON_ID = "plugin.video.watchorder"
 # Module-level caches (reset each plugin invocation)
 _mysql_settings = None
 _mysql_settings_parsed = False
-_connection = None
-_warned = False
 
-# Video DB connection cache (separate from _connection which is gated on shared_collections)
-_video_connection = None
+# Connection caches, one set per thread: in the service the IPC server thread
+# reads the library while the main loop saves the config, and neither sqlite3
+# nor mysql-connector connections may be shared between threads.
+# ``connection`` is the watchorder DB (gated on shared_collections),
+# ``video_connection`` / ``video_sqlite`` Kodi's video DB.
+_local = threading.local()
 _video_db_name = None
 
 
@@ -54,8 +60,98 @@ def get_mysql_settings():
     return _mysql_settings
 
 
+# -- Circuit breaker -------------------------------------------------------------
+#
+# A down MySQL host costs the full connect timeout on every attempt, and the
+# module globals above reset with each plugin invocation, so without shared
+# state a home screen of widgets pays it once per widget.  The breaker lives
+# in the home-window property store, where every process sees it:
+#
+#   closed     connect normally
+#   open       skip MySQL until ``until``; each consecutive failure doubles
+#              the wait, up to _BREAKER_MAX_BACKOFF
+#   half_open  the wait is over and one process is probing; the others keep
+#              skipping until it reports back (or _BREAKER_PROBE_TIMEOUT passes)
+
+_BREAKER_PROPERTY = "watchorder.mysql.breaker"
+_BREAKER_BASE_BACKOFF = 5  # seconds
+_BREAKER_MAX_BACKOFF = 300
+_BREAKER_PROBE_TIMEOUT = 10
+
+
+def _breaker_state():
+    raw = xbmcgui.Window(10000).getProperty(_BREAKER_PROPERTY)
+    try:
+        return json.loads(raw) if raw else {"state": "closed", "failures": 0}
+    except ValueError:
+        return {"state": "closed", "failures": 0}
+
+
+def _breaker_store(state):
+    xbmcgui.Window(10000).setProperty(_BREAKER_PROPERTY, json.dumps(state))
+
+
+def _breaker_allows():
+    """Return True if this process may try to reach MySQL now."""
+    state = _breaker_state()
+    now = time.time()
+    if state["state"] == "closed":
+        return True
+    if state["state"] == "open" and now < state["until"]:
+        return False
+    if (state["state"] == "half_open"
+            and now - state["probe_started"] < _BREAKER_PROBE_TIMEOUT):
+        return False
+    state["state"] = "half_open"
+    state["probe_started"] = now
+    _breaker_store(state)
+    return True
+
+
+def _breaker_success():
+    if _breaker_state()["state"] != "closed":
+        xbmcgui.Window(10000).clearProperty(_BREAKER_PROPERTY)
+
+
+def _breaker_failure(error):
+    state = _breaker_state()
+    failures = state.get("failures", 0) + 1
+    backoff = min(_BREAKER_BASE_BACKOFF * 2 ** (failures - 1),
+                  _BREAKER_MAX_BACKOFF)
+    _breaker_store({
+        "state": "open",
+        "failures": failures,
+        "until": time.time() + backoff,
+    })
+    xbmc.log(
+        "{}: MySQL unavailable, using local storage for {}s: {}".format(
+            _ADDON_ID, backoff, error),
+        xbmc.LOGWARNING,
+    )
+
+
+# The schema is checked once per Kodi session and server, not on every
+# connection: the stamp below is kept in the home-window property store, so
+# later plugin invocations skip the DDL and the migration probe.  Bump
+# _SCHEMA_VERSION whenever _ensure_schema gains a step.
+_SCHEMA_PROPERTY = "watchorder.mysql.schema"
+_SCHEMA_VERSION = 2
+
+
+def _schema_stamp(settings):
+    return "{}:{}:{}".format(settings["host"], settings["port"], _SCHEMA_VERSION)
+
+
 def _ensure_schema(conn):
-    """Create the watchorder database and config table if missing."""
+    """Create the watchorder database and tables if missing.
+
+    The config used to live in a single JSON blob (``config``).  It is now
+    normalized into one row per collection, per collection entry and per
+    show's item order (see "Normalized config rows" below); ``state`` holds
+    the generation every save bumps.  The first install to see an empty
+    ``state`` imports the blob.  The blob is left in place but no longer
+    written.
+    """
     cur = conn.cursor()
     cur.execute(
         "CREATE DATABASE IF NOT EXISTS `watchorder`"
@@ -72,6 +168,78 @@ def _ensure_schema(conn):
         "  CHECK (id = 1)"
         ") ENGINE=InnoDB"
     )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS `state` ("
+        "  id INT NOT NULL DEFAULT 1,"
+        "  generation BIGINT NOT NULL,"
+        "  extra_json MEDIUMTEXT NOT NULL,"
+        "  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        "    ON UPDATE CURRENT_TIMESTAMP,"
+        "  PRIMARY KEY (id),"
+        "  CHECK (id = 1)"
+        ") ENGINE=InnoDB"
+    )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS `collections` ("
+        "  media_type VARCHAR(8) NOT NULL,"
+        "  position INT NOT NULL,"
+        "  name TEXT NOT NULL,"
+        "  data_json TEXT NOT NULL,"
+        "  version BIGINT NOT NULL,"
+        "  PRIMARY KEY (media_type, position)"
+        ") ENGINE=InnoDB"
+    )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS `collection_items` ("
+        "  media_type VARCHAR(8) NOT NULL,"
+        "  collection_position INT NOT NULL,"
+        "  position INT NOT NULL,"
+        "  entry VARCHAR(1024) NOT NULL,"
+        "  version BIGINT NOT NULL,"
+        "  PRIMARY KEY (media_type, collection_position, position)"
+        ") ENGINE=InnoDB"
+    )
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS `show_item_order` ("
+        "  tvshowid INT NOT NULL,"
+        "  items_json TEXT NOT NULL,"
+        "  version BIGINT NOT NULL,"
+        "  PRIMARY KEY (tvshowid)"
+        ") ENGINE=InnoDB"
+    )
+    # Tables created before collection names were TEXT cap them at 255.
+    cur.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS"
+        " WHERE TABLE_SCHEMA = 'watchorder' AND TABLE_NAME = 'collections'"
+        " AND COLUMN_NAME = 'name'"
+    )
+    row = cur.fetchone()
+    if row is not None and str(row[0]).lower() == "varchar":
+        cur.execute("ALTER TABLE `collections` MODIFY name TEXT NOT NULL")
+    conn.commit()
+
+    # One-time migration from the blob.  Only an install that finds it still
+    # pending takes the row lock, which makes concurrent installs take turns;
+    # whoever comes second sees generation > 0.
+    cur.execute(
+        "INSERT IGNORE INTO state (id, generation, extra_json)"
+        " VALUES (1, 0, '{}')"
+    )
+    conn.commit()
+    cur.execute("SELECT generation FROM state WHERE id = 1")
+    if cur.fetchone()[0] == 0:
+        cur.execute("SELECT generation FROM state WHERE id = 1 FOR UPDATE")
+        if cur.fetchone()[0] == 0:
+            cur.execute("SELECT config_json FROM config WHERE id = 1")
+            row = cur.fetchone()
+            if row is not None:
+                config = json.loads(row[0])
+                _write_rows(cur, _config_rows(config), None, 1)
+                cur.execute(
+                    "UPDATE state SET generation = 1, extra_json = %s"
+                    " WHERE id = 1",
+                    (json.dumps(_config_extra(config)),),
+                )
     conn.commit()
     cur.close()
 
@@ -87,8 +255,6 @@ def _shared_collections_enabled():
 
 def _get_connection():
     """Return a MySQL connection, or None if unavailable."""
-    global _connection, _warned
-
     if not _shared_collections_enabled():
         return None
 
@@ -102,36 +268,168 @@ def _get_connection():
         return None
 
     # Reuse cached connection if still alive
-    if _connection is not None:
+    conn = getattr(_local, "connection", None)
+    if conn is not None:
         try:
-            _connection.ping(reconnect=True, attempts=1, delay=0)
-            _connection.database = "watchorder"
-            return _connection
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            conn.database = "watchorder"
+            return conn
         except Exception:
-            _connection = None
+            _local.connection = None
+
+    if not _breaker_allows():
+        return None
 
     try:
-        _connection = mysql.connector.connect(
+        conn = mysql.connector.connect(
             host=settings["host"],
             port=settings["port"],
             user=settings["user"],
             password=settings["password"],
             connection_timeout=3,
         )
-        _ensure_schema(_connection)
-        _connection.database = "watchorder"
-        return _connection
+        stamp = _schema_stamp(settings)
+        win = xbmcgui.Window(10000)
+        if win.getProperty(_SCHEMA_PROPERTY) != stamp:
+            _ensure_schema(conn)
+            win.setProperty(_SCHEMA_PROPERTY, stamp)
+        conn.database = "watchorder"
+        _breaker_success()
+        _local.connection = conn
+        return conn
     except Exception as e:
-        if not _warned:
-            _warned = True
-            xbmc.log(
-                "{}: MySQL unavailable, using local JSON: {}".format(_ADDON_ID, e),
-                xbmc.LOGWARNING,
-            )
-        _connection = None
+        _breaker_failure(e)
+        _local.connection = None
         return None
 
 
+# -- Normalized config rows ------------------------------------------------------
+#
+# A config maps onto rows keyed by their primary key:
+#
+#   collections       (media_type, position) -> name, data_json
+#   collection_items  (media_type, collection_position, position) -> entry
+#   show_item_order   (tvshowid) -> items_json
+#
+# plus ``state.extra_json`` for any other top-level keys.  Every row carries
+# the generation that last wrote it in ``version``.  After each load or save
+# the hash of every row is kept in the property store under the generation it
+# matches, so the next save can write just the rows that differ — a Move
+# Up/Down is two collection_items rows.  If another install saved in between
+# the generation no longer matches and the save rewrites every row (last
+# writer wins, as with the old blob).
+
+_ROWS_PROPERTY = "watchorder.mysql.rows"
+_SECTIONS = {"collections": "tv", "movie_collections": "movie"}
+_ITEMS_KEYS = {"tv": "shows", "movie": "movies"}
+
+_UPSERT = {
+    "collections": (
+        "INSERT INTO collections (media_type, position, name, data_json,"
+        " version) VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE"
+        " name = VALUES(name), data_json = VALUES(data_json),"
+        " version = VALUES(version)"
+    ),
+    "collection_items": (
+        "INSERT INTO collection_items (media_type, collection_position,"
+        " position, entry, version) VALUES (%s, %s, %s, %s, %s)"
+        " ON DUPLICATE KEY UPDATE entry = VALUES(entry),"
+        " version = VALUES(version)"
+    ),
+    "show_item_order": (
+        "INSERT INTO show_item_order (tvshowid, items_json, version)"
+        " VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE"
+        " items_json = VALUES(items_json), version = VALUES(version)"
+    ),
+}
+_DELETE = {
+    "collections": "DELETE FROM collections WHERE media_type = %s"
+                   " AND position = %s",
+    "collection_items": "DELETE FROM collection_items WHERE media_type = %s"
+                        " AND collection_position = %s AND position = %s",
+    "show_item_order": "DELETE FROM show_item_order WHERE tvshowid = %s",
+}
+_KEY_LENGTH = {"collections": 2, "collection_items": 3, "show_item_order": 1}
+
+
+def _config_rows(config):
+    """Return ``{row key: (table, values)}`` for ``config``."""
+    rows = {}
+
+    def add(table, values):
+        key = json.dumps([table] + list(values[:_KEY_LENGTH[table]]))
+        rows[key] = (table, tuple(values))
+
+    for section, media_type in _SECTIONS.items():
+        items_key = _ITEMS_KEYS[media_type]
+        for col_pos, col in enumerate(config.get(section, [])):
+            data = {k: v for k, v in col.items()
+                    if k not in ("name", items_key)}
+            add("collections", (media_type, col_pos, col.get("name", ""),
+                                json.dumps(data, sort_keys=True)))
+            for pos, entry in enumerate(col.get(items_key, [])):
+                add("collection_items", (media_type, col_pos, pos, entry))
+    for tvshowid, items in config.get("show_item_order", {}).items():
+        add("show_item_order", (int(tvshowid), json.dumps(items)))
+    return rows
+
+
+def _config_extra(config):
+    known = set(_SECTIONS) | {"show_item_order"}
+    return {k: v for k, v in config.items() if k not in known}
+
+
+def _row_hashes(rows):
+    return {
+        key: hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()[:16]
+        for key, (_table, values) in rows.items()
+    }
+
+
+def _remember_rows(generation, rows):
+    xbmcgui.Window(10000).setProperty(_ROWS_PROPERTY, json.dumps({
+        "generation": generation,
+        "rows": _row_hashes(rows),
+    }))
+
+
+def _remembered_rows(generation):
+    """Row hashes as of ``generation``, or None if we don't know them."""
+    raw = xbmcgui.Window(10000).getProperty(_ROWS_PROPERTY)
+    try:
+        stored = json.loads(raw) if raw else {}
+    except ValueError:
+        return None
+    if stored.get("generation") != generation:
+        return None
+    return stored.get("rows")
+
+
+def _write_rows(cur, rows, known, generation):
+    """Write ``rows`` stamped with ``generation``.
+
+    ``known`` maps row keys to the hashes currently in the tables; only rows
+    whose hash differs are written and only rows missing from ``rows`` are
+    deleted.  With ``known`` None every table is rewritten.  Returns the
+    number of rows touched.
+    """
+    if known is None:
+        for table in _UPSERT:
+            cur.execute("DELETE FROM {}".format(table))
+        known = {}
+    touched = 0
+    for key, digest in _row_hashes(rows).items():
+        if known.get(key) != digest:
+            table, values = rows[key]
+            cur.execute(_UPSERT[table], values + (generation,))
+            touched += 1
+    for key in set(known) - set(rows):
+        parts = json.loads(key)
+        cur.execute(_DELETE[parts[0]], tuple(parts[1:]))
+        touched += 1
+    return touched
+
+
 def db_load_config():
     """Load config dict from MySQL, or return None on any failure."""
     conn = _get_connection()
@@ -139,12 +437,47 @@ def db_load_config():
         return None
     try:
         cur = conn.cursor()
-        cur.execute("SELECT config_json FROM config WHERE id = 1")
-        row = cur.fetchone()
-        cur.close()
-        if row is None:
+        cur.execute("SELECT generation, extra_json FROM state WHERE id = 1")
+        state = cur.fetchone()
+        if state is None or state[0] == 0:
+            cur.close()
             return None
-        return json.loads(row[0])
+        generation, extra = state
+        config = json.loads(extra)
+        rows = {}
+
+        cur.execute(
+            "SELECT media_type, position, name, data_json FROM collections"
+            " ORDER BY position"
+        )
+        by_type = {m: [] for m in _SECTIONS.values()}
+        for media_type, col_pos, name, data in cur.fetchall():
+            col = json.loads(data)
+            col["name"] = name
+            col[_ITEMS_KEYS[media_type]] = []
+            by_type[media_type].append(col)
+            rows[json.dumps(["collections", media_type, col_pos])] = (
+                "collections", (media_type, col_pos, name, data))
+        cur.execute(
+            "SELECT media_type, collection_position, position, entry"
+            " FROM collection_items ORDER BY collection_position, position"
+        )
+        for media_type, col_pos, pos, entry in cur.fetchall():
+            by_type[media_type][col_pos][_ITEMS_KEYS[media_type]].append(entry)
+            rows[json.dumps(["collection_items", media_type, col_pos, pos])] = (
+                "collection_items", (media_type, col_pos, pos, entry))
+        for section, media_type in _SECTIONS.items():
+            config[section] = by_type[media_type]
+
+        cur.execute("SELECT tvshowid, items_json FROM show_item_order")
+        config["show_item_order"] = {}
+        for tvshowid, items in cur.fetchall():
+            config["show_item_order"][str(tvshowid)] = json.loads(items)
+            rows[json.dumps(["show_item_order", tvshowid])] = (
+                "show_item_order", (tvshowid, items))
+        cur.close()
+        _remember_rows(generation, rows)
+        return config
     except Exception as e:
         xbmc.log(
             "{}: MySQL read failed: {}".format(_ADDON_ID, e),
@@ -155,8 +488,6 @@ def db_load_config():
 
 def _get_video_connection():
     """Return a cached MySQL connection for Kodi's video DB, or None."""
-    global _video_connection
-
     try:
         import mysql.connector
     except ImportError:
@@ -166,28 +497,31 @@ def _get_video_connection():
     if not settings:
         return None
 
-    if _video_connection is not None:
+    conn = getattr(_local, "video_connection", None)
+    if conn is not None:
         try:
-            _video_connection.ping(reconnect=True, attempts=1, delay=0)
-            return _video_connection
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return conn
         except Exception:
-            _video_connection = None
+            _local.video_connection = None
+
+    if not _breaker_allows():
+        return None
 
     try:
-        _video_connection = mysql.connector.connect(
+        conn = mysql.connector.connect(
             host=settings["host"],
             port=settings["port"],
             user=settings["user"],
             password=settings["password"],
             connection_timeout=3,
         )
-        return _video_connection
+        _breaker_success()
+        _local.video_connection = conn
+        return conn
     except Exception as e:
-        xbmc.log(
-            "{}: video DB connection failed: {}".format(_ADDON_ID, e),
-            xbmc.LOGWARNING,
-        )
-        _video_connection = None
+        _breaker_failure(e)
+        _local.video_connection = None
         return None
 
 
@@ -205,6 +539,26 @@ def _get_video_db_name(conn):
     return _video_db_name
 
 
+def _sqlite_video_db_path():
+    """Return the path of the latest local MyVideos SQLite file, or None."""
+    db_dir = xbmcvfs.translatePath("special://database/")
+    _, files = xbmcvfs.listdir(db_dir)
+    video_dbs = sorted(
+        (f for f in files
+         if f.startswith("MyVideos") and f.endswith(".db")),
+        key=_video_db_version,
+    )
+    if not video_dbs:
+        return None
+    return db_dir + video_dbs[-1]
+
+
+def _video_db_version(name):
+    """Return the schema number of a ``MyVideos<N>`` database name, or 0."""
+    digits = name[len("MyVideos"):].split(".")[0]
+    return int(digits) if digits.isdigit() else 0
+
+
 def get_linked_movie_ids(tvshowid):
     """Get movie IDs linked to a TV show from Kodi's video database."""
     # Try MySQL first
@@ -232,15 +586,9 @@ def get_linked_movie_ids(tvshowid):
     # Fall back to SQLite
     try:
         import sqlite3
-        db_dir = xbmcvfs.translatePath("special://database/")
-        _, files = xbmcvfs.listdir(db_dir)
-        video_dbs = sorted(
-            f for f in files
-            if f.startswith("MyVideos") and f.endswith(".db")
-        )
-        if not video_dbs:
+        db_path = _sqlite_video_db_path()
+        if db_path is None:
             return []
-        db_path = db_dir + video_dbs[-1]
         conn = sqlite3.connect(db_path)
         cur = conn.cursor()
         cur.execute(
@@ -255,23 +603,438 @@ def get_linked_movie_ids(tvshowid):
         return []
 
 
+def db_config_version():
+    """Return the shared config's generation as a cheap version stamp, or None.
+
+    Used to validate cached copies of the config without transferring it.
+    """
+    conn = _get_connection()
+    if conn is None:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT generation FROM state WHERE id = 1")
+        row = cur.fetchone()
+        cur.close()
+        return "" if row is None else str(row[0])
+    except Exception as e:
+        xbmc.log(
+            "{}: MySQL version probe failed: {}".format(_ADDON_ID, e),
+            xbmc.LOGWARNING,
+        )
+        return None
+
+
 def db_save_config(config):
-    """Save config dict to MySQL.  Best-effort — failures are logged, not raised."""
+    """Save config dict to MySQL.  Best-effort — failures are logged, not raised.
+
+    Only rows that changed since this install last read or wrote the config
+    are written (see "Normalized config rows").  Returns True if the write
+    reached MySQL.
+    """
     conn = _get_connection()
     if conn is None:
-        return
+        return False
     try:
-        blob = json.dumps(config, indent=4)
+        rows = _config_rows(config)
         cur = conn.cursor()
+        cur.execute("SELECT generation FROM state WHERE id = 1 FOR UPDATE")
+        generation = cur.fetchone()[0]
+        known = _remembered_rows(generation)
+        _write_rows(cur, rows, known, generation + 1)
         cur.execute(
-            "INSERT INTO config (id, config_json) VALUES (1, %s)"
-            " ON DUPLICATE KEY UPDATE config_json = VALUES(config_json)",
-            (blob,),
+            "UPDATE state SET generation = %s, extra_json = %s WHERE id = 1",
+            (generation + 1, json.dumps(_config_extra(config))),
         )
         conn.commit()
         cur.close()
+        _remember_rows(generation + 1, rows)
+        return True
     except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
         xbmc.log(
             "{}: MySQL write failed: {}".format(_ADDON_ID, e),
             xbmc.LOGWARNING,
         )
+        return False
+
+
+# -- Direct read path ------------------------------------------------------------
+#
+# Optional read engine that serves listings straight from MyVideos' views
+# instead of JSON-RPC, which avoids serialising large result sets through
+# Kodi's JSON layer.  Each view has an explicit column map, so a query only
+# selects the columns behind the requested properties.  The maps were written
+# against the schema versions below; any other version falls back to
+# JSON-RPC.
+
+_KNOWN_VIDEO_DB_VERSIONS = (119, 121, 131)  # Kodi 19, 20, 21
+
+
+def _text(values):
+    return "" if values[0] is None else str(values[0])
+
+
+def _int(values):
+    try:
+        return int(values[0])
+    except (TypeError, ValueError):
+        return 0
+
+
+def _float(values):
+    try:
+        return float(values[0])
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _year(values):
+    value = values[0]
+    return int(str(value)[:4]) if value and str(value)[:4].isdigit() else 0
+
+
+def _split(values):
+    return [v for v in _text(values).split(" / ") if v]
+
+
+def _file(values):
+    return _text(values[:1]) + _text(values[1:])
+
+
+def _resume(values):
+    return {"position": _float(values[:1]), "total": _float(values[1:])}
+
+
+def _season_label(values):
+    season, name = values
+    if name:
+        return str(name)
+    return "Specials" if _int([season]) == 0 else "Season {}".format(season)
+
+
+def _season_playcount(values):
+    watched, total = _int(values[:1]), _int(values[1:])
+    return 1 if total and watched >= total else 0
+
+
+_VIEWS = {
+    "movie": {
+        "view": "movie_view",
+        "id": ("idMovie", "movieid"),
+        "label": (("c00",), _text),
+        "columns": {
+            "title": (("c00",), _text),
+            "plot": (("c01",), _text),
+            "runtime": (("c11",), _int),
+            "genre": (("c14",), _split),
+            "year": (("premiered",), _year),
+            "rating": (("rating",), _float),
+            "playcount": (("playCount",), _int),
+            "lastplayed": (("lastPlayed",), _text),
+            "dateadded": (("dateAdded",), _text),
+            "file": (("strPath", "strFileName"), _file),
+            "resume": (("resumeTimeInSeconds", "totalTimeInSeconds"), _resume),
+        },
+        "filters": {},
+        "watched": "COALESCE(playCount, 0) > 0",
+    },
+    "tvshow": {
+        "view": "tvshow_view",
+        "id": ("idShow", "tvshowid"),
+        "label": (("c00",), _text),
+        "columns": {
+            "title": (("c00",), _text),
+            "plot": (("c01",), _text),
+            "year": (("c05",), _year),
+            "genre": (("c08",), _split),
+            "rating": (("rating",), _float),
+            "lastplayed": (("lastPlayed",), _text),
+            "dateadded": (("dateAdded",), _text),
+            "watchedepisodes": (("watchedcount",), _int),
+            "episode": (("totalCount",), _int),
+        },
+        "filters": {},
+        "watched": ("COALESCE(totalCount, 0) > 0"
+                    " AND COALESCE(watchedcount, 0) >= totalCount"),
+    },
+    "season": {
+        "view": "season_view",
+        "id": ("idSeason", "seasonid"),
+        "label": (("season", "name"), _season_label),
+        "columns": {
+            "season": (("season",), _int),
+            "showtitle": (("showTitle",), _text),
+            "watchedepisodes": (("playCount",), _int),
+            "episode": (("episodes",), _int),
+            "playcount": (("playCount", "episodes"), _season_playcount),
+        },
+        "filters": {"tvshowid": "idShow"},
+    },
+    "episode": {
+        "view": "episode_view",
+        "id": ("idEpisode", "episodeid"),
+        "label": (("c00",), _text),
+        "columns": {
+            "title": (("c00",), _text),
+            "plot": (("c01",), _text),
+            "writer": (("c04",), _split),
+            "firstaired": (("c05",), _text),
+            "runtime": (("c09",), _int),
+            "director": (("c10",), _split),
+            "season": (("c12",), _int),
+            "episode": (("c13",), _int),
+            "showtitle": (("strTitle",), _text),
+            "tvshowid": (("idShow",), _int),
+            "rating": (("rating",), _float),
+            "playcount": (("playCount",), _int),
+            "lastplayed": (("lastPlayed",), _text),
+            "dateadded": (("dateAdded",), _text),
+            "file": (("strPath", "strFileName"), _file),
+            "resume": (("resumeTimeInSeconds", "totalTimeInSeconds"), _resume),
+        },
+        "filters": {"tvshowid": "idShow", "season": "c12"},
+        "order": "c12 + 0, c13 + 0",
+    },
+}
+
+def _direct_read_enabled():
+    """Check if the direct SQL read path is enabled in addon settings."""
+    import xbmcaddon
+    try:
+        return xbmcaddon.Addon(_ADDON_ID).getSetting("direct_sql") == "true"
+    except Exception:
+        return False
+
+
+def _open_video_db():
+    """Return ``(conn, placeholder, table_prefix)`` for a recognised MyVideos
+    schema, or None.
+
+    With MySQL configured only the shared server is used — a local SQLite file
+    would be stale on such a setup.  The SQLite file is opened read-only.
+    """
+    if get_mysql_settings():
+        conn = _get_video_connection()
+        if conn is None:
+            return None
+        name = _get_video_db_name(conn)
+        if not name or _video_db_version(name) not in _KNOWN_VIDEO_DB_VERSIONS:
+            return None
+        return conn, "%s", "`{}`.".format(name)
+
+    conn = getattr(_local, "video_sqlite", None)
+    if conn is None:
+        import sqlite3
+        path = _sqlite_video_db_path()
+        if path is None:
+            return None
+        name = path.rsplit("/", 1)[-1]
+        if _video_db_version(name) not in _KNOWN_VIDEO_DB_VERSIONS:
+            return None
+        conn = sqlite3.connect(
+            "file:{}?mode=ro".format(path), uri=True, timeout=5
+        )
+        _local.video_sqlite = conn
+    return conn, "?", ""
+
+
+def _read_art(conn, ph, prefix, media_type, ids):
+    """Return ``{media_id: {art_type: url}}`` for the given items."""
+    sql = "SELECT media_id, type, url FROM {}art WHERE media_type = {}".format(
+        prefix, ph)
+    args = [media_type]
+    # A short id list is cheaper as an IN filter; a whole-library listing is
+    # cheaper as one scan of the media type.
+    if len(ids) <= 500:
+        sql += " AND media_id IN ({})".format(", ".join([ph] * len(ids)))
+        args.extend(ids)
+    cur = conn.cursor()
+    cur.execute(sql, args)
+    art = {}
+    wanted = set(ids)
+    for media_id, art_type, url in cur.fetchall():
+        if media_id in wanted:
+            art.setdefault(media_id, {})[art_type] = url
+    cur.close()
+    return art
+
+
+def _read_tags(conn, ph, prefix, media_type, ids):
+    """Return ``{media_id: [tag names]}`` for the given items."""
+    cur = conn.cursor()
+    cur.execute(
+        ("SELECT tl.media_id, t.name FROM {p}tag_link tl"
+         " JOIN {p}tag t ON t.tag_id = tl.tag_id"
+         " WHERE tl.media_type = {ph}").format(p=prefix, ph=ph),
+        (media_type,),
+    )
+    tags = {}
+    wanted = set(ids)
+    for media_id, name in cur.fetchall():
+        if media_id in wanted:
+            tags.setdefault(media_id, []).append(name)
+    cur.close()
+    return tags
+
+
+def _title_page(conn, ph, prefix, spec, where, args, limits):
+    """Return the ids on page ``limits`` of a titled view, in title order."""
+    from listing import title_order
+
+    id_col, id_key = spec["id"]
+    sql = "SELECT {}, {} FROM {}{}".format(
+        id_col, spec["columns"]["title"][0][0], prefix, spec["view"])
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    cur = conn.cursor()
+    cur.execute(sql, args)
+    rows = [{id_key: item_id, "title": title}
+            for item_id, title in cur.fetchall()]
+    cur.close()
+    rows.sort(key=lambda r: title_order(r, id_key))
+    return [r[id_key] for r in rows[limits[0]:limits[1]]]
+
+
+def read_items(kind, properties, tag=None, titles=None, limits=None,
+               **filters):
+    """Read ``kind`` rows straight from MyVideos' views, shaped like JSON-RPC.
+
+    ``kind`` is ``movie``, ``tvshow``, ``season`` or ``episode``; ``filters``
+    are the view's id filters (``tvshowid``, ``season``), ``tag`` is a tag
+    expression (see ``tag_query``) compiled into the WHERE clause,
+    ``titles`` limits the rows to those exact titles and ``limits``
+    (``(start, end)``, as in JSON-RPC) to one page of the view's natural
+    order: season and episode, or ``listing.title_order`` — SQL's LOWER
+    and collations don't match it, so titled views pick the page's ids
+    from a narrow id/title query first.  Returns None when
+    the direct path is off, a property has no column mapping, the schema
+    version isn't recognised or the query fails — callers then use JSON-RPC.
+    """
+    if not _direct_read_enabled():
+        return None
+    spec = _VIEWS[kind]
+    wanted = [p for p in properties if p not in ("art", "tag")]
+    if any(p not in spec["columns"] for p in wanted):
+        return None
+    try:
+        opened = _open_video_db()
+        if opened is None:
+            return None
+        conn, ph, prefix = opened
+
+        id_col, id_key = spec["id"]
+        columns = [id_col]
+        for cols, _conv in [spec["label"]] + [spec["columns"][p] for p in wanted]:
+            columns.extend(c for c in cols if c not in columns)
+        index = {c: i for i, c in enumerate(columns)}
+
+        sql = "SELECT {} FROM {}{}".format(", ".join(columns), prefix,
+                                           spec["view"])
+        where = []
+        args = []
+        for key, value in filters.items():
+            where.append("{} = {}".format(spec["filters"][key], ph))
+            args.append(str(value) if key == "season" else value)
+        if tag:
+            import tag_query
+
+            def tag_sql(name):
+                return (
+                    ("{id} IN (SELECT tl.media_id FROM {p}tag_link tl"
+                     " JOIN {p}tag t ON t.tag_id = tl.tag_id"
+                     " WHERE tl.media_type = {ph} AND t.name = {ph})").format(
+                        id=id_col, p=prefix, ph=ph),
+                    [kind, name],
+                )
+
+            sql_tag, tag_args = tag_query.to_sql(
+                tag_query.parse(tag), tag_sql, spec["watched"])
+            where.append(sql_tag)
+            args.extend(tag_args)
+        if titles is not None:
+            title_col = spec["columns"]["title"][0][0]
+            where.append("{} IN ({})".format(
+                title_col, ", ".join([ph] * len(titles)) or "NULL"))
+            args.extend(titles)
+        page = None
+        if limits is not None and "order" not in spec:
+            page = _title_page(conn, ph, prefix, spec, where, args, limits)
+            where.append("{} IN ({})".format(
+                id_col, ", ".join([ph] * len(page)) or "NULL"))
+            args.extend(page)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if limits is not None and page is None:
+            start, end = limits
+            sql += " ORDER BY {} LIMIT {} OFFSET {}".format(
+                spec["order"], ph, ph)
+            args.extend([end - start, start])
+        cur = conn.cursor()
+        cur.execute(sql, args)
+        rows = cur.fetchall()
+        cur.close()
+        if page is not None:
+            position = {item_id: n for n, item_id in enumerate(page)}
+            rows.sort(key=lambda row: position[row[0]])
+
+        items = []
+        for row in rows:
+            item = {id_key: row[0]}
+            cols, conv = spec["label"]
+            item["label"] = conv([row[index[c]] for c in cols])
+            for prop in wanted:
+                cols, conv = spec["columns"][prop]
+                item[prop] = conv([row[index[c]] for c in cols])
+            items.append(item)
+
+        ids = [item[id_key] for item in items]
+        if "art" in properties and ids:
+            art = _read_art(conn, ph, prefix, kind, ids)
+            for item in items:
+                item["art"] = art.get(item[id_key], {})
+        if "tag" in properties and ids:
+            tags = _read_tags(conn, ph, prefix, kind, ids)
+            for item in items:
+                item["tag"] = tags.get(item[id_key], [])
+        return items
+    except Exception as e:
+        xbmc.log(
+            "{}: direct video DB read failed, using JSON-RPC: {}".format(
+                _ADDON_ID, e),
+            xbmc.LOGWARNING,
+        )
+        return None
+
+
+def read_tag_counts(kind):
+    """Return ``{tag name: item count}`` for ``kind`` from ``tag_link``, or
+    None when the direct path can't answer."""
+    if not _direct_read_enabled():
+        return None
+    try:
+        opened = _open_video_db()
+        if opened is None:
+            return None
+        conn, ph, prefix = opened
+        cur = conn.cursor()
+        cur.execute(
+            ("SELECT t.name, COUNT(*) FROM {p}tag_link tl"
+             " JOIN {p}tag t ON t.tag_id = tl.tag_id"
+             " WHERE tl.media_type = {ph} GROUP BY t.name").format(
+                p=prefix, ph=ph),
+            (kind,),
+        )
+        counts = {name: count for name, count in cur.fetchall()}
+        cur.close()
+        return counts
+    except Exception as e:
+        xbmc.log(
+            "{}: direct video DB read failed, using JSON-RPC: {}".format(
+                _ADDON_ID, e),
+            xbmc.LOGWARNING,
+        )
+        return None
@@ -0,0 +1,114 @@
+"""Loopback IPC between the one-shot plugin process and the background service.
+
+The service hosts a ``LibraryModel`` (see ``library_model``) behind a small
+TCP server bound to 127.0.0.1 — loopback rather than a Unix socket so it
+works the same on Windows and Android.  The port and a per-session token are
+published in the home-window property store; only Kodi processes can read
+them.
+
+The protocol is one JSON request line per connection, answered with one JSON
+document before the server closes the socket.  :func:`query` returns ``None``
+on any failure so callers fall back to their direct JSON-RPC path.
+"""
+
+import json
+import secrets
+import socket
+import socketserver
+import threading
+
+import xbmc
+import xbmcgui
+
+_PROPERTY = "watchorder.ipc"
+_TIMEOUT = 5  # seconds
+
+# Model methods a client may call.
+_QUERIES = (
+    "shows", "movies", "movie_details", "seasons", "linked_movie_ids",
+)
+
+# True inside the service process, which must never query itself.
+_serving = False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from main import ADDON_ID
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            if request.get("token") != self.server.token:
+                return
+            name = request.get("query")
+            if name not in _QUERIES:
+                response = {"error": "unknown query: {}".format(name)}
+            else:
+                method = getattr(self.server.model, name)
+                response = {"result": method(**request.get("args", {}))}
+        except Exception as e:
+            xbmc.log("{}: IPC request failed: {}".format(ADDON_ID, e),
+                     xbmc.LOGWARNING)
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode("utf-8"))
+
+
+class LibraryServer(socketserver.TCPServer):
+    """Serve ``model`` queries on an ephemeral loopback port.
+
+    Requests are handled one at a time on a single background thread, which
+    is the only thread that touches the model.  The video DB and snapshot
+    connections the model loads through are cached per thread (see ``db``
+    and ``snapshot``), so the service's main loop, which reads the library
+    too when it saves the config, opens its own.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, model):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.model = model
+        self.token = secrets.token_hex(16)
+
+    def start(self):
+        global _serving
+        _serving = True
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        xbmcgui.Window(10000).setProperty(_PROPERTY, json.dumps({
+            "port": self.server_address[1],
+            "token": self.token,
+        }))
+
+    def stop(self):
+        global _serving
+        xbmcgui.Window(10000).clearProperty(_PROPERTY)
+        self.shutdown()
+        self.server_close()
+        _serving = False
+
+
+def query(name, **args):
+    """Run a model query in the service.  Returns None if it can't answer."""
+    if _serving:
+        return None
+    raw = xbmcgui.Window(10000).getProperty(_PROPERTY)
+    if not raw:
+        return None
+    try:
+        endpoint = json.loads(raw)
+        request = {"token": endpoint["token"], "query": name, "args": args}
+        with socket.create_connection(
+                ("127.0.0.1", endpoint["port"]), timeout=_TIMEOUT) as sock:
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            chunks = []
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+        response = json.loads(b"".join(chunks).decode("utf-8"))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        from main import ADDON_ID
+        xbmc.log("{}: library service unreachable: {}".format(ADDON_ID, e),
+                 xbmc.LOGWARNING)
+        return None
+    return response.get("result")
@@ -0,0 +1,137 @@
+"""In-memory library model hosted by the background service.
+
+The plugin is a one-shot process that rebuilds everything on each
+navigation; the service lives for the whole session.  ``LibraryModel`` keeps
+the rows the listings need — shows, movies, seasons per show and linked
+movies per show — in memory and answers queries from the plugin over
+``ipc``.
+
+Entries are dropped as soon as the library change log (``library_state``)
+reports a change that touches them, and re-filled on the next query from the
+on-disk snapshot (or JSON-RPC when the snapshot is off).
+"""
+
+import library_state
+
+
+def _project(rows, id_key, properties):
+    keep = set(properties) | {id_key, "label"}
+    return [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+
+def _watched(kind, row):
+    if kind == "tvshow":
+        return 0 < row.get("episode", 0) <= row.get("watchedepisodes", 0)
+    return row.get("playcount", 0) > 0
+
+
+class LibraryModel:
+
+    def __init__(self):
+        self._token = None
+        self._rows = {}      # kind -> rows sorted by title
+        self._seasons = {}   # tvshowid -> season rows
+        self._links = {}     # tvshowid -> linked movie ids
+
+    def _sync(self):
+        """Drop whatever the library change log says is out of date."""
+        token = library_state.current()
+        changes = None
+        if token is not None and self._token is not None:
+            changes = library_state.changes_since(self._token)
+        self._token = token
+        if changes is None:
+            self._rows.clear()
+            self._seasons.clear()
+            self._links.clear()
+            return
+
+        for kind in ("tvshow", "movie"):
+            if kind in changes:
+                self._rows.pop(kind, None)
+        shows = changes.get("tvshow", set())
+        if shows is None or ("episode" in changes and changes["episode"] is None):
+            self._seasons.clear()
+        else:
+            for tvshowid in shows:
+                self._seasons.pop(tvshowid, None)
+        if "movie" in changes:
+            # Linking a movie to a show is reported as a movie update.
+            self._links.clear()
+
+    def _load(self, kind):
+        from listing import title_order
+        from snapshot import _KINDS
+
+        if kind not in self._rows:
+            properties = _KINDS[kind]["properties"]
+            if kind == "tvshow":
+                from tv import _query_library_shows
+                rows = _query_library_shows(None, properties)
+            else:
+                from movies import _query_library_movies
+                rows = _query_library_movies(None, properties)
+            if not rows:
+                # Don't pin an empty/failed fetch.
+                return rows
+            id_key = "tvshowid" if kind == "tvshow" else "movieid"
+            rows.sort(key=lambda r: title_order(r, id_key))
+            self._rows[kind] = rows
+        return self._rows[kind]
+
+    def _items(self, kind, id_key, tag, properties, titles=None, limits=None):
+        from snapshot import _KINDS
+
+        if not set(properties) <= set(_KINDS[kind]["properties"]):
+            return None
+        self._sync()
+        rows = self._load(kind)
+        if tag:
+            import tag_query
+            node = tag_query.parse(tag)
+            rows = [r for r in rows
+                    if tag_query.matches(node, r.get("tag", []),
+                                         _watched(kind, r))]
+        if titles is not None:
+            titles = {t.lower() for t in titles}
+            rows = [r for r in rows if r["title"].lower() in titles]
+        if limits is not None:
+            rows = rows[limits[0]:limits[1]]
+        return _project(rows, id_key, properties)
+
+    def shows(self, tag=None, properties=(), titles=None):
+        return self._items("tvshow", "tvshowid", tag, properties, titles)
+
+    def movies(self, tag=None, properties=(), titles=None, limits=None):
+        return self._items("movie", "movieid", tag, properties, titles,
+                           limits)
+
+    def movie_details(self, movieids, properties=()):
+        """Return rows for ``movieids`` (in that order), skipping unknown ids."""
+        from snapshot import _KINDS
+
+        if not set(properties) <= set(_KINDS["movie"]["properties"]):
+            return None
+        self._sync()
+        by_id = {r["movieid"]: r for r in self._load("movie")}
+        rows = [by_id[i] for i in movieids if i in by_id]
+        return _project(rows, "movieid", properties)
+
+    def seasons(self, tvshowid):
+        from tv import _query_seasons
+
+        self._sync()
+        if tvshowid not in self._seasons:
+            seasons = _query_seasons(tvshowid)
+            if seasons is None:
+                return None
+            self._seasons[tvshowid] = seasons
+        return self._seasons[tvshowid]
+
+    def linked_movie_ids(self, tvshowid):
+        from db import get_linked_movie_ids
+
+        self._sync()
+        if tvshowid not in self._links:
+            self._links[tvshowid] = get_linked_movie_ids(tvshowid)
+        return self._links[tvshowid]
@@ -0,0 +1,177 @@
+"""Library change log shared between the background service and the plugin.
+
+The service's ``LibraryMonitor`` turns Kodi's ``VideoLibrary.*`` notifications
+into a generation counter plus a bounded log of precise invalidations (per
+tvshowid, movieid and episodeid), kept in the home-window property store.
+Plugin-side caches remember the ``(epoch, generation)`` token they were built
+at and ask :func:`changes_since` what has changed since — so they can live
+indefinitely without ever serving stale watched state.
+
+The service is the only writer.  Each service start picks a fresh epoch, so a
+token from a previous Kodi session never matches and forces a full check.
+"""
+
+import json
+import time
+
+import xbmc
+import xbmcgui
+
+_STATE_PROPERTY = "watchorder.library.state"
+
+# Oldest entries are dropped past this size; consumers that fall behind the
+# retained window get a full refresh instead of a partial one.
+_MAX_CHANGES = 1000
+
+_LIBRARY_METHODS = (
+    "VideoLibrary.OnUpdate",
+    "VideoLibrary.OnRemove",
+    "VideoLibrary.OnScanFinished",
+    "VideoLibrary.OnCleanFinished",
+)
+
+
+def _load():
+    raw = xbmcgui.Window(10000).getProperty(_STATE_PROPERTY)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+
+
+def _store(state):
+    xbmcgui.Window(10000).setProperty(_STATE_PROPERTY, json.dumps(state))
+
+
+def start_session():
+    """Begin a new change log.  Called once when the service starts."""
+    _store({
+        "epoch": "{:.6f}".format(time.time()),
+        "generation": 0,
+        "floor": 0,
+        "changes": [],
+    })
+
+
+def current():
+    """Return the current ``[epoch, generation]`` token, or None.
+
+    ``None`` means no service is publishing changes; callers should fall back
+    to their own time-based checks.
+    """
+    state = _load()
+    if state is None:
+        return None
+    return [state["epoch"], state["generation"]]
+
+
+def record(changes):
+    """Log a change set ``{kind: [ids] or None}``; ``None`` means every item."""
+    state = _load()
+    if state is None:
+        return
+    state["generation"] += 1
+    generation = state["generation"]
+    for kind, ids in changes.items():
+        if ids is None:
+            state["changes"].append([generation, kind, None])
+        else:
+            state["changes"].extend([generation, kind, i] for i in ids)
+    overflow = len(state["changes"]) - _MAX_CHANGES
+    if overflow > 0:
+        state["floor"] = state["changes"][overflow - 1][0]
+        del state["changes"][:overflow]
+    _store(state)
+
+
+def record_full():
+    """Invalidate everything recorded so far (scan / clean finished)."""
+    state = _load()
+    if state is None:
+        return
+    state["generation"] += 1
+    state["floor"] = state["generation"]
+    state["changes"] = []
+    _store(state)
+
+
+def changes_since(token):
+    """Return ``{kind: set(ids) or None}`` changed after ``token``.
+
+    Returns ``None`` when the caller has to assume everything changed: no
+    token yet, a token from another session, or one older than the log.
+    """
+    state = _load()
+    if state is None or not token or token[0] != state["epoch"]:
+        return None
+    since = token[1]
+    if since < state["floor"]:
+        return None
+    changed = {}
+    for generation, kind, item_id in state["changes"]:
+        if generation <= since:
+            continue
+        if item_id is None:
+            changed[kind] = None
+        elif kind not in changed or changed[kind] is not None:
+            changed.setdefault(kind, set()).add(item_id)
+    return changed
+
+
+class LibraryMonitor(xbmc.Monitor):
+    """Feeds Kodi's ``VideoLibrary`` notifications into the change log.
+
+    Also serves as the service's abort monitor, so it lives for the whole
+    session.
+    """
+
+    def __init__(self):
+        super().__init__()
+        start_session()
+
+    def onNotification(self, sender, method, data):
+        if method not in _LIBRARY_METHODS:
+            return
+        if method in ("VideoLibrary.OnScanFinished",
+                      "VideoLibrary.OnCleanFinished"):
+            record_full()
+            return
+        try:
+            payload = json.loads(data) if data else {}
+        except ValueError:
+            return
+        # OnUpdate nests the item; OnRemove carries id/type at the top level.
+        item = payload.get("item", payload)
+        kind = item.get("type")
+        item_id = item.get("id")
+        if item_id is None:
+            return
+
+        if kind in ("movie", "tvshow"):
+            record({kind: [item_id]})
+        elif kind in ("episode", "season"):
+            # The show row carries the watched-episode count, so it changes
+            # too.  A removed item can no longer be traced back to its show.
+            tvshowid = None
+            if method == "VideoLibrary.OnUpdate":
+                tvshowid = self._show_for(kind, item_id)
+            changes = {"tvshow": [tvshowid] if tvshowid is not None else None}
+            if kind == "episode":
+                changes["episode"] = [item_id]
+            record(changes)
+
+    @staticmethod
+    def _show_for(kind, item_id):
+        """Return the tvshowid an episode or season belongs to, or None."""
+        from main import jsonrpc
+
+        method = ("VideoLibrary.GetEpisodeDetails" if kind == "episode"
+                  else "VideoLibrary.GetSeasonDetails")
+        result = jsonrpc(method, {
+            "{}id".format(kind): item_id,
+            "properties": ["tvshowid"],
+        })
+        details = (result or {}).get("{}details".format(kind), {})
+        return details.get("tvshowid")
@@ -0,0 +1,163 @@
+"""Directory listings: ListItem construction and bulk emission.
+
+Each library view (shows, movies, episodes) is a :class:`View` compiled once
+from the field table below: the fields it displays map to ``InfoTag``
+setters, and its ``properties`` — the displayed fields plus any the listing
+needs for context menus and URLs — are all it fetches from the library.
+
+``xbmcplugin.addDirectoryItem`` crosses from Python into Kodi once per row.
+Listings instead collect their rows in a :class:`Directory` and hand them
+over with ``addDirectoryItems`` in chunks, each call carrying the final
+``totalItems`` so Kodi can size the list before the first chunk arrives.
+"""
+
+import xbmcgui
+import xbmcplugin
+
+CHUNK_SIZE = 500
+
+
+def _value(v):
+    return (v,) if v else None
+
+
+def _number(v):
+    # Season/episode 0 (specials) is a real value, not an empty one.
+    return None if v is None else (v,)
+
+
+def _resume(v):
+    if v and v.get("position", 0) > 0:
+        return v["position"], v.get("total", 0)
+    return None
+
+
+def title_order(row, id_key):
+    """Sort key for title-ordered pages: the lowercased title, then the id.
+
+    Every backend pages in this one order (the snapshot's ``title_key`` is
+    the same lowercased title), so consecutive pages served by different
+    backends neither repeat nor skip rows.
+    """
+    return (row.get("title") or "").lower(), row[id_key]
+
+
+# Library property -> (InfoTag setter, value -> setter args or None to skip).
+_FIELDS = {
+    "title": ("setTitle", _value),
+    "showtitle": ("setTvShowTitle", _value),
+    "season": ("setSeason", _number),
+    "episode": ("setEpisode", _number),
+    "plot": ("setPlot", _value),
+    "year": ("setYear", _value),
+    "rating": ("setRating", _value),
+    "firstaired": ("setFirstAired", _value),
+    "dateadded": ("setDateAdded", _value),
+    "lastplayed": ("setLastPlayed", _value),
+    "genre": ("setGenres", _value),
+    "director": ("setDirectors", _value),
+    "writer": ("setWriters", _value),
+    "runtime": ("setDuration", _value),
+    "playcount": ("setPlaycount", _value),
+    "resume": ("setResumePoint", _resume),
+}
+
+
+class View:
+    """ListItem template for one media type.
+
+    ``fields`` are displayed (``"art"`` goes to ``setArt``, the rest to the
+    InfoTag); ``extra`` are fetched for the listing's own use only.
+    """
+
+    def __init__(self, media_type, fields, extra=()):
+        self.media_type = media_type
+        self.properties = list(fields) + list(extra)
+        self._art = "art" in fields
+        self._setters = tuple(
+            (field,) + _FIELDS[field] for field in fields if field != "art"
+        )
+
+    def build(self, row, label=None):
+        """Return a ListItem for library ``row`` (labelled by title)."""
+        li = xbmcgui.ListItem(row["title"] if label is None else label)
+        tag = li.getVideoInfoTag()
+        tag.setMediaType(self.media_type)
+        for field, setter, to_args in self._setters:
+            args = to_args(row.get(field))
+            if args is not None:
+                getattr(tag, setter)(*args)
+        if self._art and row.get("art"):
+            li.setArt(row["art"])
+        return li
+
+
+SHOWS = View(
+    "tvshow",
+    ["title", "plot", "year", "rating", "genre", "dateadded", "lastplayed",
+     "art"],
+    extra=["watchedepisodes", "episode"],
+)
+
+MOVIES = View(
+    "movie",
+    ["title", "plot", "year", "rating", "genre", "dateadded", "lastplayed",
+     "runtime", "playcount", "resume", "art"],
+    extra=["file"],
+)
+
+EPISODES = View(
+    "episode",
+    ["title", "showtitle", "season", "episode", "plot", "firstaired",
+     "rating", "playcount", "lastplayed", "dateadded", "runtime", "director",
+     "writer", "resume", "art"],
+    extra=["file"],
+)
+
+
+# Home-screen widgets: just enough to draw a row of posters and play.
+SHOW_WIDGET = View(
+    "tvshow", ["title", "year", "art"],
+    extra=["dateadded", "lastplayed", "watchedepisodes", "episode"],
+)
+
+MOVIE_WIDGET = View(
+    "movie", ["title", "year", "playcount", "resume", "art"],
+    extra=["file", "dateadded", "lastplayed"],
+)
+
+EPISODE_WIDGET = View(
+    "episode",
+    ["title", "showtitle", "season", "episode", "playcount", "resume", "art"],
+    extra=["file", "tvshowid", "dateadded", "lastplayed"],
+)
+
+
+class Directory:
+    """Rows for one directory listing, submitted together by :meth:`flush`."""
+
+    def __init__(self, handle, chunk_size=CHUNK_SIZE):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, url, li, is_folder=False):
+        self.items.append((url, li, is_folder))
+
+    def add_next_page(self, url):
+        """Add the "Next page" folder of a paged listing, kept last by Kodi."""
+        li = xbmcgui.ListItem("Next page")
+        li.setProperty("SpecialSort", "bottom")
+        self.add(url, li, True)
+
+    def flush(self):
+        """Submit the collected rows; call once, before ``endOfDirectory``."""
+        items, self.items = self.items, []
+        total = len(items)
+        for start in range(0, total, self.chunk_size):
+            xbmcplugin.addDirectoryItems(
+                self.handle, items[start:start + self.chunk_size], total,
+            )
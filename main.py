@@ -1,13 +1,15 @@
 import json
+import os
 import sys
-from urllib.parse import parse_qs, urlencode
+from urllib.parse import parse_qs, quote_plus, urlencode
 
 import xbmc
 import xbmcaddon
-import xbmcgui
-import xbmcplugin
 import xbmcvfs
 
+# xbmcgui / xbmcplugin are imported where they are used: the play and
+# set_watched routes, and the service, never build a listing.
+
 ADDON = xbmcaddon.Addon()
 ADDON_ID = ADDON.getAddonInfo("id")
 # When this module is imported by the background service (service.py), there
@@ -21,47 +23,196 @@ CONFIG_DIR = xbmcvfs.translatePath(
 CONFIG_PATH = CONFIG_DIR + "collections.json"
 
 
+# (keys, action) -> ((prefix, key or None), ...).  A listing builds the same
+# few URL shapes once per row and per context-menu entry; the key names and
+# the action are encoded once per shape, leaving only the ids to escape.
+_url_templates = {}
+
+
+def _url_template(keys, action):
+    return tuple(
+        (urlencode({key: action}), None) if key == "action"
+        else (quote_plus(str(key)) + "=", key)
+        for key in keys
+    )
+
+
 def build_url(params):
-    return "{}?{}".format(BASE_URL, urlencode(params))
+    """Return the plugin URL for ``params``, exactly as ``urlencode`` would."""
+    if not isinstance(params, dict):
+        return "{}?{}".format(BASE_URL, urlencode(params))
+    keys = tuple(params)
+    action = params.get("action")
+    try:
+        template = _url_templates[keys, action]
+    except KeyError:
+        template = _url_templates[keys, action] = _url_template(keys, action)
+    except TypeError:  # unhashable action value
+        return "{}?{}".format(BASE_URL, urlencode(params))
+    return BASE_URL + "?" + "&".join([
+        prefix if key is None else prefix + _quote_value(params[key])
+        for prefix, key in template
+    ])
+
+
+def _quote_value(value):
+    # Mirrors urlencode(): bytes are quoted as-is, anything else via str().
+    if type(value) is int:
+        return str(value)
+    if isinstance(value, bytes):
+        return quote_plus(value)
+    return quote_plus(str(value))
+
+
+# Library and settings reads are idempotent within one plugin invocation and
+# are answered from the request memo on repeats; anything else is a write.
+_MEMO_NAMESPACES = ("VideoLibrary", "Settings")
+
+
+def library_filter(tag=None, titles=None):
+    """Return a ``VideoLibrary.Get*`` filter for ``tag`` (an expression,
+    see ``tag_query``) and/or exact ``titles`` (any of), or None for no
+    filter."""
+    rules = []
+    if tag:
+        import tag_query
+        rules.append(tag_query.to_filter(tag_query.parse(tag)))
+    if titles is not None:
+        by_title = [{"field": "title", "operator": "is", "value": t}
+                    for t in titles]
+        rules.append(by_title[0] if len(by_title) == 1 else {"or": by_title})
+    if not rules:
+        return None
+    return rules[0] if len(rules) == 1 else {"and": rules}
+
+
+def _is_read(method):
+    namespace, _, name = method.partition(".")
+    return namespace in _MEMO_NAMESPACES and name.startswith("Get")
 
 
 def jsonrpc(method, params=None):
+    import memo
+
     request = {"jsonrpc": "2.0", "method": method, "id": 1}
     if params:
         request["params"] = params
+    payload = json.dumps(request)
+    key = ("jsonrpc", payload)
     try:
-        response = json.loads(xbmc.executeJSONRPC(json.dumps(request)))
+        if _is_read(method):
+            # The raw text is memoized, not the decoded result, so callers
+            # that mutate what they get back can't affect each other.
+            raw = memo.cached(key, lambda: xbmc.executeJSONRPC(payload))
+        else:
+            memo.invalidate("jsonrpc")
+            raw = xbmc.executeJSONRPC(payload)
+        response = json.loads(raw)
+        if "result" not in response:
+            memo.forget(key)
         return response.get("result")
     except Exception as e:
+        memo.forget(key)
         xbmc.log("{}: JSON-RPC error: {}".format(ADDON_ID, e), xbmc.LOGERROR)
         return None
 
 
+def jsonrpc_batch(calls, errors=None):
+    """Send several JSON-RPC requests in a single round trip.
+
+    ``calls`` is a sequence of ``(method, params)`` pairs.  They go out as one
+    JSON-RPC 2.0 request array and the responses are matched back by id, so
+    the returned list lines up with ``calls``.  An entry is ``None`` when that
+    particular request failed; the others are unaffected.
+
+    Pass a dict as ``errors`` to tell the two kinds of failure apart: it
+    receives ``{index: error}`` for each request Kodi answered with an error
+    (e.g. an id that no longer exists), and stays empty when the round trip
+    itself failed.
+    """
+    import memo
+
+    calls = list(calls)
+    results = [None] * len(calls)
+    if not calls:
+        return results
+    if not all(_is_read(method) for method, _params in calls):
+        memo.invalidate("jsonrpc")
+
+    batch = []
+    for idx, (method, params) in enumerate(calls):
+        request = {"jsonrpc": "2.0", "method": method, "id": idx}
+        if params:
+            request["params"] = params
+        batch.append(request)
+    try:
+        responses = json.loads(xbmc.executeJSONRPC(json.dumps(batch)))
+    except Exception as e:
+        xbmc.log("{}: JSON-RPC batch error: {}".format(ADDON_ID, e),
+                 xbmc.LOGERROR)
+        return results
+
+    # A batch that Kodi cannot parse at all comes back as a single error
+    # object rather than an array.
+    if isinstance(responses, dict):
+        responses = [responses]
+    for response in responses or []:
+        if not isinstance(response, dict):
+            continue
+        rid = response.get("id")
+        if not isinstance(rid, int) or not 0 <= rid < len(results):
+            continue
+        if "error" in response:
+            xbmc.log("{}: JSON-RPC error in batch ({}): {}".format(
+                ADDON_ID, calls[rid][0], response["error"]), xbmc.LOGWARNING)
+            if errors is not None:
+                errors[rid] = response["error"]
+            continue
+        results[rid] = response.get("result")
+    return results
+
+
 # Display-preference settings (flatten tvshows, include specials, select-first-
 # unwatched) are read on most navigations but changed very rarely.  Cache them
-# briefly in the shared window-property store so a browsing session doesn't
-# repeat the lookup on every folder.  The TTL is short so a genuine settings
-# change still takes effect within a few seconds.
-_SETTING_CACHE_TTL = 30
+# in the shared window-property store until Kodi next saves its settings:
+# guisettings.xml is rewritten whenever the settings screens are left, so its
+# modification time is a free version stamp for every value read from it.
+_GUISETTINGS = "special://profile/guisettings.xml"
+
+
+def _settings_generation():
+    try:
+        return os.stat(xbmcvfs.translatePath(_GUISETTINGS)).st_mtime_ns
+    except OSError:
+        return 0
 
 
 def get_kodi_setting(setting_id):
-    from collections_mod import _cache_get, _cache_set
+    from cache import _cache_get, _cache_set
 
     cache_key = "setting." + setting_id
-    cached = _cache_get(cache_key, ttl=_SETTING_CACHE_TTL)
+    generation = _settings_generation()
+    cached = _cache_get(cache_key, generation=generation)
     if cached is not None:
         return cached
 
     result = jsonrpc("Settings.GetSettingValue", {"setting": setting_id})
     if result and "value" in result:
         # Only successful reads are cached — never a failed/None lookup, so a
-        # transient JSON-RPC error doesn't get pinned for the whole TTL.
-        _cache_set(cache_key, result["value"])
+        # transient JSON-RPC error doesn't get pinned.
+        _cache_set(cache_key, result["value"], generation=generation)
         return result["value"]
     return None
 
 
+def get_page_size():
+    """Return the opt-in page size for long listings, or 0 when paging is off."""
+    try:
+        return max(0, int(ADDON.getSetting("page_size") or 0))
+    except ValueError:
+        return 0
+
+
 def _select_first_unwatched(first_unwatched_index):
     if first_unwatched_index is None or first_unwatched_index < 0:
         return
@@ -88,8 +239,64 @@ def watched_menu_item(build_url, media, playcount, **params):
     return (label, "RunPlugin({})".format(build_url(url_params)))
 
 
+# Bulk watched-state writes go out in chunks of this many SetEpisodeDetails
+# requests, so a long show still gets a moving progress bar.
+_WATCHED_BATCH_SIZE = 100
+
+
+def _set_episodes_watched(episodes, playcount):
+    """Set watched state on many episodes with batched JSON-RPC writes.
+
+    ``episodes`` must carry ``playcount`` and ``resume``.  Episodes already in
+    the target state are skipped, so re-marking a mostly-watched show only
+    writes the handful of rows that actually change.
+    """
+    pending = []
+    for ep in episodes:
+        watched = ep.get("playcount", 0) > 0
+        if playcount > 0:
+            # Already watched and nothing to clear — leave the row alone.
+            if watched and not ep.get("resume", {}).get("position"):
+                continue
+        elif not watched:
+            continue
+        details = {"episodeid": ep["episodeid"], "playcount": playcount}
+        if playcount > 0:
+            details["resume"] = {"position": 0, "total": 0}
+        pending.append(("VideoLibrary.SetEpisodeDetails", details))
+    if not pending:
+        return
+
+    progress = None
+    if len(pending) > _WATCHED_BATCH_SIZE:
+        import xbmcgui
+        progress = xbmcgui.DialogProgressBG()
+        progress.create("Watch Order", "Updating watched state...")
+    try:
+        for start in range(0, len(pending), _WATCHED_BATCH_SIZE):
+            jsonrpc_batch(pending[start:start + _WATCHED_BATCH_SIZE])
+            if progress is not None:
+                done = min(start + _WATCHED_BATCH_SIZE, len(pending))
+                progress.update(int(done * 100 / len(pending)))
+    finally:
+        if progress is not None:
+            progress.close()
+
+
+def invalidate_next_up():
+    """Drop the cached collection next-up items (see ``next_up``).
+
+    Bumps the generation through ``cache`` so the watched-state paths don't
+    import the engine itself.
+    """
+    from cache import bump_generation
+    bump_generation("nextup")
+
+
 def action_set_watched(params):
     """Set watched state for a library item via JSON-RPC."""
+    from snapshot import mark_stale
+
     media = params["media"][0]
     playcount = int(params["playcount"][0])
 
@@ -109,24 +316,19 @@ def action_set_watched(params):
         result = jsonrpc("VideoLibrary.GetEpisodes", {
             "tvshowid": int(params["tvshowid"][0]),
             "season": int(params["season"][0]),
-            "properties": ["title"],
+            "properties": ["playcount", "resume"],
         })
-        for ep in (result or {}).get("episodes", []):
-            details = {"episodeid": ep["episodeid"], "playcount": playcount}
-            if playcount > 0:
-                details["resume"] = {"position": 0, "total": 0}
-            jsonrpc("VideoLibrary.SetEpisodeDetails", details)
+        _set_episodes_watched((result or {}).get("episodes", []), playcount)
     elif media == "tvshow":
         result = jsonrpc("VideoLibrary.GetEpisodes", {
             "tvshowid": int(params["tvshowid"][0]),
-            "properties": ["title"],
+            "properties": ["playcount", "resume"],
         })
-        for ep in (result or {}).get("episodes", []):
-            details = {"episodeid": ep["episodeid"], "playcount": playcount}
-            if playcount > 0:
-                details["resume"] = {"position": 0, "total": 0}
-            jsonrpc("VideoLibrary.SetEpisodeDetails", details)
+        _set_episodes_watched((result or {}).get("episodes", []), playcount)
 
+    # The show row's watched-episode count changes with any episode write.
+    mark_stale("movie" if media == "movie" else "tvshow")
+    invalidate_next_up()
     xbmc.executebuiltin("Container.Refresh")
 
 
@@ -234,6 +436,18 @@ class PlaybackMonitor(xbmc.Player):
             self.current_movieid = db_id
             self._session_movieid = db_id
 
+    def _mark_snapshot_stale(self, episodeid, movieid):
+        """Have the next listing pick up the watched/resume change we wrote."""
+        try:
+            from snapshot import mark_stale
+            if episodeid is not None:
+                mark_stale("tvshow")
+            elif movieid is not None:
+                mark_stale("movie")
+        except Exception as e:
+            xbmc.log("{}:Failed to mark library snapshot stale: {}".format(
+                ADDON_ID, e), xbmc.LOGWARNING)
+
     def _clear_state(self):
         self.current_episodeid = None
         self.current_movieid = None
@@ -315,6 +529,9 @@ class PlaybackMonitor(xbmc.Player):
                 xbmc.log("{}:Failed to mark movie as watched: {}".format(
                     ADDON_ID, e), xbmc.LOGERROR)
 
+        if episodeid is not None or movieid is not None:
+            invalidate_next_up()
+        self._mark_snapshot_stale(episodeid, movieid)
         self._clear_state()
         self._clear_session()
 
@@ -371,11 +588,13 @@ class PlaybackMonitor(xbmc.Player):
                         })
                         xbmc.log("{}:Auto-marked movie {} as watched (stopped at {}%)".format(
                             ADDON_ID, self.current_movieid, int(watched_percent)), xbmc.LOGINFO)
+                    invalidate_next_up()
                 else:
                     self._save_resume_point_with(position, duration)
         except Exception as e:
             xbmc.log("{}:Error handling playback stop: {}".format(ADDON_ID, e), xbmc.LOGWARNING)
 
+        self._mark_snapshot_stale(self.current_episodeid, self.current_movieid)
         self._clear_state()
 
     def onPlayBackPaused(self):
@@ -447,14 +666,19 @@ class PlaybackMonitor(xbmc.Player):
         save_thread.start()
 
 
-_forced_views_checked = False
+# Skin whose forced views have been set up.  Kept in the home-window property
+# store, which outlives the plugin process, so the skin-string probes run
+# once per skin (the service does it at login) instead of on every navigation.
+_FORCED_VIEWS_PROPERTY = "watchorder.views.skin"
 
 
 def ensure_forced_views():
-    global _forced_views_checked
-    if _forced_views_checked:
+    import xbmcgui
+
+    win = xbmcgui.Window(10000)
+    skin = xbmc.getSkinDir()
+    if win.getProperty(_FORCED_VIEWS_PROPERTY) == skin:
         return
-    _forced_views_checked = True
     seasons_view = xbmc.getInfoLabel('Skin.String(Skin.ForcedView.seasons)')
     episodes_view = xbmc.getInfoLabel('Skin.String(Skin.ForcedView.episodes)')
     if not seasons_view:
@@ -483,10 +707,14 @@ def ensure_forced_views():
             xbmc.executebuiltin(
                 'Skin.SetString(Skin.ForcedView.movies,{})'.format(name)
             )
+    win.setProperty(_FORCED_VIEWS_PROPERTY, skin)
 
 
 def root_menu():
     """Root directory: TV Shows and Movies."""
+    import xbmcgui
+    import xbmcplugin
+
     xbmcplugin.setContent(HANDLE, "files")
 
     li = xbmcgui.ListItem("TV Shows")
@@ -509,15 +737,53 @@ def root_menu():
     url = build_url({"action": "movie_tags"})
     xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=True)
 
+    import sync_queue
+    if sync_queue.pending():
+        li = xbmcgui.ListItem("Shared collections: sync pending")
+        li.setArt({"icon": "DefaultIconInfo.png", "thumb": "DefaultIconInfo.png"})
+        url = build_url({"action": "sync_status"})
+        xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=False)
+
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_NONE)
     xbmcplugin.endOfDirectory(HANDLE)
 
 
+def action_sync_status():
+    """Report the write-behind queue's state for shared collections."""
+    import sync_queue
+    import xbmcgui
+
+    status = sync_queue.status()
+    if status is None:
+        message = "All changes are synced"
+    elif status[0] == 0:
+        message = "Saving changes to the shared database"
+    else:
+        message = "Shared database unreachable, retrying in {}s".format(status[1])
+    xbmcgui.Dialog().notification(
+        "Watch Order", message, xbmcgui.NOTIFICATION_INFO,
+    )
+
+
 def router():
+    import memo
+
+    memo.begin()
+    try:
+        _route()
+    finally:
+        memo.end()
+
+
+def _route():
+    import reorder
+
     ensure_forced_views()
     params = parse_qs(sys.argv[2].lstrip("?"))
     action = params.get("action", [None])[0]
     tag = params.get("tag", [None])[0]
+    # Leaving a folder that was being reordered saves the staged order.
+    reorder.on_navigate(action, params)
 
     # -- Backward compatibility: bare ?tag= URLs go straight to TV listings --
     if action is None and tag is not None:
@@ -550,9 +816,11 @@ def router():
         list_seasons(int(params["tvshowid"][0]))
     elif action == "episodes":
         from tv import list_episodes
+        season = params.get("season", [None])[0]
         list_episodes(
             int(params["tvshowid"][0]),
-            int(params["season"][0]),
+            None if season is None else int(season),
+            int(params.get("start", ["0"])[0]),
         )
     elif action == "play":
         from tv import play_episode
@@ -607,7 +875,13 @@ def router():
     # -- Movie routes --
     elif action == "root_movies":
         from movies import list_movies
-        list_movies(tag=tag, collections_only=collections_only)
+        list_movies(
+            tag=tag,
+            collections_only=collections_only,
+            start=int(params.get("start", ["0"])[0]),
+            shown=[int(i) for i in params.get("shown", [""])[0].split(",")
+                   if i],
+        )
     elif action == "movie_tags":
         from collections_mod import list_tag_folders
         list_tag_folders("movie")
@@ -648,6 +922,31 @@ def router():
             "movie",
         )
 
+    # -- Home-screen widgets --
+    elif action == "widget_recent":
+        from widgets import list_recent
+        list_recent(params.get("media", ["movie"])[0],
+                    params.get("limit", [None])[0], tag)
+    elif action == "widget_in_progress":
+        from widgets import list_in_progress
+        list_in_progress(params.get("media", ["movie"])[0],
+                         params.get("limit", [None])[0], tag)
+    elif action == "widget_next_up":
+        from widgets import list_next_up
+        list_next_up(params.get("limit", [None])[0], tag)
+    elif action == "widget_random":
+        from widgets import list_random
+        list_random(params.get("media", ["tv"])[0], int(params["index"][0]),
+                    params.get("limit", [None])[0])
+    elif action == "widget_collection_next_up":
+        from widgets import list_collection_next_up
+        index = params.get("index", [None])[0]
+        list_collection_next_up(params.get("limit", [None])[0],
+                                None if index is None else int(index))
+    elif action == "play_next":
+        from next_up import action_play_next
+        action_play_next(int(params["index"][0]))
+
     # -- Watched state --
     elif action == "set_watched":
         action_set_watched(params)
@@ -657,6 +956,14 @@ def router():
         from movies import action_migrate_movie_sets
         action_migrate_movie_sets()
 
+    # -- Shared collections --
+    elif action == "sync_status":
+        action_sync_status()
+
 
 if __name__ == "__main__":
+    # Run directly (older installs point addon.xml here): register this copy
+    # as ``main`` so the ``from main import ...`` in the other modules reuse
+    # it instead of executing the file again.  See plugin.py.
+    sys.modules.setdefault("main", sys.modules[__name__])
     router()
@@ -0,0 +1,78 @@
+"""Request-scoped memoization for one plugin invocation.
+
+A single navigation fans out into helpers that each load the config, ask for
+a show's linked movies or re-read the same JSON-RPC result — ``list_seasons``
+alone reaches ``load_config`` from three places.  While :func:`begin` is in
+effect (the plugin router wraps each invocation in it) :func:`cached` answers
+repeats from memory; outside it every call goes straight through, so the
+long-lived service never serves anything stale from here.
+
+Only reads go through this layer.  Any write clears it (see
+:func:`invalidate`) so a read after a write in the same invocation sees the
+new state.
+"""
+
+import xbmc
+
+_active = False
+_values = {}
+_saved = 0  # duplicate calls answered from the memo this invocation
+
+
+def begin():
+    global _active, _saved
+    _active = True
+    _values.clear()
+    _saved = 0
+
+
+def end():
+    """Stop memoizing and log how many duplicate calls were avoided."""
+    global _active
+    from main import ADDON_ID
+
+    if _active and _saved:
+        xbmc.log("{}: memo removed {} duplicate call(s)".format(
+            ADDON_ID, _saved), xbmc.LOGDEBUG)
+    _active = False
+    _values.clear()
+
+
+def saved():
+    return _saved
+
+
+def cached(key, compute):
+    """Return ``compute()``, reusing the result for ``key`` this invocation.
+
+    ``None`` results are not kept, so a failed read is retried.
+    """
+    global _saved
+    if not _active:
+        return compute()
+    if key in _values:
+        _saved += 1
+        return _values[key]
+    value = compute()
+    if value is not None:
+        _values[key] = value
+    return value
+
+
+def put(key, value):
+    """Record ``value`` for ``key`` (e.g. the config just saved)."""
+    if _active:
+        _values[key] = value
+
+
+def forget(key):
+    _values.pop(key, None)
+
+
+def invalidate(prefix=None):
+    """Forget memoized values whose key starts with ``prefix`` (all if None)."""
+    if prefix is None:
+        _values.clear()
+        return
+    for key in [k for k in _values if k[0] == prefix]:
+        del _values[key]
@@ -2,46 +2,125 @@ import xbmc
 import xbmcgui
 import xbmcplugin
 
-from collections_mod import (
-    load_config, save_config, _get_collections, _set_collections, _items_key,
-)
+from listing import MOVIES
 
+_MOVIE_LIST_PROPS = MOVIES.properties
 
-def get_library_movies(tag=None, properties=None):
-    from main import jsonrpc
+
+def get_library_movies(tag=None, properties=None, titles=None, limits=None):
+    """Return library movies, optionally only those titled exactly ``titles``.
+
+    ``limits`` (``(start, end)``) returns one page of the library in title
+    order.
+    """
+    from ipc import query
     if properties is None:
-        properties = [
-            "title", "art", "year", "genre", "rating", "plot",
-            "dateadded", "lastplayed", "file", "playcount", "runtime",
-            "resume",
-        ]
+        properties = _MOVIE_LIST_PROPS
+    if titles is not None and not titles:
+        return []
+    args = {"tag": tag, "properties": properties}
+    # Sent only when used; a service running older code rejects them and
+    # the local path below answers instead.
+    if titles is not None:
+        args["titles"] = titles
+    if limits is not None:
+        args["limits"] = limits
+    rows = query("movies", **args)
+    if rows is not None:
+        return rows
+    return _query_library_movies(tag, properties, titles, limits)
+
+
+def _query_library_movies(tag, properties, titles=None, limits=None):
+    """Read movies from the video DB or on-disk snapshot, else JSON-RPC."""
+    from db import read_items
+    from main import jsonrpc, library_filter
+    from snapshot import get_rows
+    rows = read_items("movie", properties, tag=tag, titles=titles,
+                      limits=limits)
+    if rows is None:
+        rows = get_rows("movie", properties, tag=tag, titles=titles,
+                        limits=limits)
+    if rows is not None:
+        return rows
     params = {"properties": properties}
-    if tag:
-        params["filter"] = {"field": "tag", "operator": "is", "value": tag}
+    rule = library_filter(tag, titles)
+    if rule:
+        params["filter"] = rule
+    if limits is not None:
+        return _movie_page(params, limits)
     result = jsonrpc("VideoLibrary.GetMovies", params)
     if result and "movies" in result:
         return result["movies"]
     return []
 
 
-def list_movies(tag=None, collections_only=False):
-    """Collection-aware movie browser with 'Filter by Tag' folder."""
-    from main import HANDLE, build_url, watched_menu_item
+def _movie_page(params, limits):
+    """One page in ``listing.title_order`` over JSON-RPC.
+
+    Kodi's own title sort (sort titles, its collation) doesn't match the
+    other backends', so the page is picked from an id/title listing and
+    only its rows are fetched in full, in one batch.
+    """
+    from listing import title_order
+    from main import jsonrpc, jsonrpc_batch
+
+    result = jsonrpc("VideoLibrary.GetMovies",
+                     dict(params, properties=["title"]))
+    rows = sorted((result or {}).get("movies", []),
+                  key=lambda r: title_order(r, "movieid"))
+    page = [r["movieid"] for r in rows[limits[0]:limits[1]]]
+    details = jsonrpc_batch(
+        ("VideoLibrary.GetMovieDetails",
+         {"movieid": movieid, "properties": params["properties"]})
+        for movieid in page
+    )
+    return [d["moviedetails"] for d in details if d and "moviedetails" in d]
+
 
-    config = load_config()
-    collections = _get_collections(config, "movie")
-    library_movies = get_library_movies(tag=tag)
-    library_lookup = {m["title"].lower(): m for m in library_movies}
+def list_movies(tag=None, collections_only=False, start=0, shown=()):
+    """Collection-aware movie browser with 'Filter by Tag' folder.
 
-    title_to_collection = {}
-    for idx, col in enumerate(collections):
-        for movie_title in col.get("movies", []):
-            title_to_collection[movie_title.lower()] = idx
+    With paging on (``get_page_size``) only the page of movies from
+    ``start`` is fetched.  A collection is listed where its first member
+    falls, so ``shown`` carries the collections already listed on earlier
+    pages and the "Next page" URL passes them on.
+    """
+    from collections_mod import (
+        load_config, get_index, _get_collections, _member_lookup)
+    from listing import Directory
+    from main import HANDLE, build_url, get_page_size, watched_menu_item
 
-    sorted_movies = sorted(library_movies, key=lambda m: m["title"].lower())
+    config = load_config()
+    collections = _get_collections(config, "movie")
+    title_index = get_index(config)["movie"]["titles"]
+    page_size = get_page_size()
+    collections_shown = set(shown)
+    has_more = False
+
+    if page_size:
+        sorted_movies = get_library_movies(
+            tag=tag, limits=(start, start + page_size + 1))
+        has_more = len(sorted_movies) > page_size
+        del sorted_movies[page_size:]
+        # Collection rows summarise their members, which may sit on other
+        # pages: fetch the members of the collections new on this page.
+        new_on_page = []
+        for movie in sorted_movies:
+            hit = title_index.get(movie["title"].lower())
+            if (hit is not None and hit[0] not in collections_shown
+                    and hit[0] not in new_on_page):
+                new_on_page.append(hit[0])
+        members = [m for i in new_on_page for m in collections[i]["movies"]]
+        library_lookup = _member_lookup("movie", members, tag)
+    else:
+        library_movies = get_library_movies(tag=tag)
+        library_lookup = {m["title"].lower(): m for m in library_movies}
+        sorted_movies = sorted(library_movies,
+                               key=lambda m: m["title"].lower())
 
     xbmcplugin.setContent(HANDLE, "movies")
-    collections_shown = set()
+    directory = Directory(HANDLE)
 
     # Toggle URL for collections-only filter
     toggle_params = {"action": "root_movies"}
@@ -53,7 +132,8 @@ def list_movies(tag=None, collections_only=False):
     toggle_label = "Show All" if collections_only else "Collections Only"
 
     for movie in sorted_movies:
-        col_idx = title_to_collection.get(movie["title"].lower())
+        hit = title_index.get(movie["title"].lower())
+        col_idx = hit[0] if hit is not None else None
 
         if col_idx is not None:
             if col_idx in collections_shown:
@@ -70,12 +150,6 @@ def list_movies(tag=None, collections_only=False):
             configured_art = col.get("art", {})
             art.update(configured_art)
 
-            li = xbmcgui.ListItem(col["name"])
-            tag_info = li.getVideoInfoTag()
-            tag_info.setMediaType("movie")
-            tag_info.setTitle(col["name"])
-            tag_info.setPlot(col.get("description", ""))
-
             max_lp = ""
             max_da = ""
             for member_title in col["movies"]:
@@ -87,14 +161,14 @@ def list_movies(tag=None, collections_only=False):
                     da = member.get("dateadded", "")
                     if da > max_da:
                         max_da = da
-            if max_lp:
-                tag_info.setLastPlayed(max_lp)
-            if max_da:
-                tag_info.setDateAdded(max_da)
-
-            if art:
-                li.setArt(art)
 
+            li = MOVIES.build({
+                "title": col["name"],
+                "plot": col.get("description", ""),
+                "lastplayed": max_lp,
+                "dateadded": max_da,
+                "art": art,
+            })
             li.addContextMenuItems([
                 (
                     toggle_label,
@@ -117,41 +191,12 @@ def list_movies(tag=None, collections_only=False):
             ])
 
             url = build_url({"action": "movie_collection", "index": col_idx})
-            xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=True)
+            directory.add(url, li, True)
         else:
             if collections_only:
                 continue
 
-            li = xbmcgui.ListItem(movie["title"])
-            tag_info = li.getVideoInfoTag()
-            tag_info.setMediaType("movie")
-            tag_info.setTitle(movie["title"])
-            tag_info.setPlot(movie.get("plot", ""))
-            tag_info.setYear(movie.get("year", 0))
-            tag_info.setRating(movie.get("rating", 0.0))
-            if movie.get("dateadded"):
-                tag_info.setDateAdded(movie["dateadded"])
-            if movie.get("lastplayed"):
-                tag_info.setLastPlayed(movie["lastplayed"])
-            genres = movie.get("genre", [])
-            if genres:
-                tag_info.setGenres(genres)
-            runtime = movie.get("runtime", 0)
-            if runtime:
-                tag_info.setDuration(runtime)
-            playcount = movie.get("playcount", 0)
-            if playcount:
-                tag_info.setPlaycount(playcount)
-
-            resume = movie.get("resume", {})
-            if resume.get("position", 0) > 0:
-                tag_info.setResumePoint(
-                    resume["position"], resume.get("total", 0)
-                )
-
-            if movie.get("art"):
-                li.setArt(movie["art"])
-
+            li = MOVIES.build(movie)
             li.addContextMenuItems([
                 watched_menu_item(build_url, "movie",
                                   movie.get("playcount", 0),
@@ -176,8 +221,20 @@ def list_movies(tag=None, collections_only=False):
                 "movieid": movie["movieid"],
                 "file": movie.get("file", ""),
             })
-            xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=False)
-
+            directory.add(url, li)
+
+    if has_more:
+        next_params = {"action": "root_movies",
+                       "start": start + page_size,
+                       "shown": ",".join(str(i)
+                                         for i in sorted(collections_shown))}
+        if tag:
+            next_params["tag"] = tag
+        if collections_only:
+            next_params["collections_only"] = "1"
+        directory.add_next_page(build_url(next_params))
+
+    directory.flush()
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_NONE)
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_TITLE_IGNORE_THE)
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_VIDEO_YEAR)
@@ -219,6 +276,9 @@ def play_movie(movieid, file):
 
 def action_migrate_movie_sets():
     """Import Kodi movie sets into our movie collections."""
+    from collections_mod import (
+        load_config, save_config, _get_collections, _set_collections,
+    )
     from main import ADDON_ID, jsonrpc
 
     config = load_config()
@@ -0,0 +1,202 @@
+"""Next-up engine: the first unwatched item in a TV collection's watch order.
+
+A TV collection lists shows and ``movie:<id>`` markers in watch order, and
+``show_item_order`` interleaves a show's seasons with its linked movies.
+:func:`next_item` walks that order and returns the first movie that isn't
+watched or the first unwatched episode, so "what do I watch next" follows the
+collection rather than any one show.
+
+The walk is answered from two batched round trips: one ``GetEpisodes`` per
+show, filtered to unwatched episodes and limited to a single row, and the
+movie details for every marker and linked movie involved.  Only when a
+stored show order puts a later season ahead of the show's first unwatched
+one is that season asked for separately.  Specials are skipped, as in
+``tv.next_unwatched_episodes``.  A show without a stored order ends with its
+linked movies, as in the show view.
+
+Results are cached per collection under a generation made of the
+``nextup`` counter (bumped by ``PlaybackMonitor`` and "Set Watched" when a
+playcount changes, and by ``reorder`` when a stage changes), the config's generation and the library change log's
+token.  Without the service there is no change log, so entries also expire
+after ``_CACHE_TTL``.
+"""
+
+import time
+
+_GENERATION = "nextup"  # bumped by main.invalidate_next_up and reorder
+
+
+def invalidate():
+    """Drop every cached next-up item (a playcount changed)."""
+    from main import invalidate_next_up
+    invalidate_next_up()
+
+
+def _generation():
+    import library_state
+    from cache import _CACHE_TTL, get_generation
+    from collections_mod import _config_generation
+
+    token = library_state.current()
+    if token is None:
+        token = int(time.time() // _CACHE_TTL)
+    return [get_generation(_GENERATION), _config_generation(), token]
+
+
+def next_item(collection_index):
+    """Return ``{"type": "episode" | "movie", "row": {...}}`` for the next
+    thing to watch in TV collection ``collection_index``, or None when the
+    collection is finished (or doesn't exist)."""
+    from cache import _cache_get, _cache_set
+
+    key = "nextup.{}".format(collection_index)
+    generation = _generation()
+    cached = _cache_get(key, generation=generation)
+    if cached is not None:
+        return cached.get("item")
+    item = _find(collection_index)
+    _cache_set(key, {"item": item}, generation=generation)
+    return item
+
+
+def _find(collection_index):
+    import reorder
+    from collections_mod import _get_collections, _member_lookup, load_config
+    from listing import EPISODE_WIDGET
+    from tv import (
+        _collection_level_movie_ids, _linked_movie_ids, get_movie_details,
+        next_unwatched_episodes,
+    )
+
+    config = load_config()
+    collections = _get_collections(config, "tv")
+    if not 0 <= collection_index < len(collections):
+        return None
+    entries = reorder.current(reorder.collection_key("tv", collection_index),
+                              collections[collection_index]["shows"])
+
+    shows = _member_lookup("tv", entries)
+    members = []   # (marker movieid, None) or (None, tvshowid)
+    movie_ids = []
+    orders = {}
+    trailing = {}  # linked movies of shows without a stored order
+    placed = _collection_level_movie_ids(config)
+    for entry in entries:
+        if not isinstance(entry, str):
+            continue
+        if entry.startswith("movie:"):
+            try:
+                movieid = int(entry.split(":")[1])
+            except (ValueError, IndexError):
+                continue
+            members.append((movieid, None))
+            movie_ids.append(movieid)
+            continue
+        show = shows.get(entry.lower())
+        if show is None:
+            continue
+        tvshowid = show["tvshowid"]
+        members.append((None, tvshowid))
+        orders[tvshowid] = reorder.show_order(config, tvshowid)
+        movie_ids.extend(i["id"] for i in orders[tvshowid]
+                         if i["type"] == "movie")
+        if not orders[tvshowid]:
+            # As in the show view: linked movies follow the seasons.
+            trailing[tvshowid] = [m for m in _linked_movie_ids(tvshowid)
+                                  if m not in placed]
+            movie_ids.extend(trailing[tvshowid])
+
+    firsts = next_unwatched_episodes(
+        [tvshowid for _m, tvshowid in members if tvshowid is not None],
+        EPISODE_WIDGET.properties)
+    movies = get_movie_details(movie_ids) if movie_ids else {}
+
+    def unwatched_movie(movieid):
+        movie = movies.get(movieid)
+        if movie is not None and not movie.get("playcount"):
+            return {"type": "movie", "row": movie}
+        return None
+
+    for movieid, tvshowid in members:
+        if movieid is not None:
+            found = unwatched_movie(movieid)
+        else:
+            found = _walk_show(tvshowid, orders[tvshowid],
+                               firsts.get(tvshowid), unwatched_movie,
+                               trailing.get(tvshowid, ()))
+        if found is not None:
+            return found
+    return None
+
+
+def _walk_show(tvshowid, order, first, unwatched_movie, trailing=()):
+    """First unwatched item of one show, following its stored order.
+
+    ``first`` is the show's first unwatched episode in season order: every
+    season before it is watched, later ones may not be.  ``trailing`` movie
+    ids come after every season.
+    """
+    first_season = first["season"] if first is not None else None
+    for item in order:
+        if item["type"] == "movie":
+            found = unwatched_movie(item["id"])
+            if found is not None:
+                return found
+        elif first_season is None or item["id"] < first_season:
+            continue
+        elif item["id"] == first_season:
+            return {"type": "episode", "row": first}
+        else:
+            found = _first_in_season(tvshowid, item["id"])
+            if found is not None:
+                return found
+    # No stored order, or the first unwatched episode's season isn't in it
+    # (added since the order was saved): such seasons follow the stored ones.
+    if first is not None:
+        return {"type": "episode", "row": first}
+    for movieid in trailing:
+        found = unwatched_movie(movieid)
+        if found is not None:
+            return found
+    return None
+
+
+def _first_in_season(tvshowid, season):
+    from listing import EPISODE_WIDGET
+    from main import jsonrpc
+
+    if season <= 0:
+        return None
+    result = jsonrpc("VideoLibrary.GetEpisodes", {
+        "tvshowid": tvshowid,
+        "season": season,
+        "properties": EPISODE_WIDGET.properties,
+        "filter": {"field": "playcount", "operator": "is", "value": "0"},
+        "sort": {"method": "episode"},
+        "limits": {"start": 0, "end": 1},
+    })
+    rows = (result or {}).get("episodes")
+    return {"type": "episode", "row": rows[0]} if rows else None
+
+
+def action_play_next(collection_index):
+    """Context menu "Play Next": start the collection's next item."""
+    import xbmc
+    import xbmcgui
+    from main import build_url
+
+    item = next_item(collection_index)
+    if item is None:
+        xbmcgui.Dialog().notification(
+            "TV Collections", "Nothing left to watch",
+            xbmcgui.NOTIFICATION_INFO,
+        )
+        return
+    row = item["row"]
+    if item["type"] == "movie":
+        url = build_url({"action": "play_movie", "movieid": row["movieid"],
+                         "file": row.get("file", "")})
+    else:
+        url = build_url({"action": "play", "episodeid": row["episodeid"],
+                         "file": row.get("file", "")})
+    xbmc.executebuiltin("PlayMedia({})".format(url))
@@ -0,0 +1,14 @@
+"""Watchorder plugin entry point (``library`` in ``addon.xml``).
+
+Kodi executes the plugin's library file as ``__main__`` on every navigation.
+When that file was ``main.py`` itself, the first ``from main import ...`` in
+``tv``/``movies``/``collections_mod`` imported it a second time under its
+real name, repeating ``xbmcaddon.Addon()``, ``getAddonInfo`` and
+``translatePath`` and leaving two copies of every module global.  This shim
+imports ``main`` once, as an ordinary module, and hands over to its router.
+"""
+
+from main import router
+
+if __name__ == "__main__":
+    router()
@@ -0,0 +1,194 @@
+"""Reorder sessions: batch rapid Move Up/Down clicks into one config save.
+
+Each Move Up/Down used to load the config, swap two entries, save (and sync
+to MySQL) and refresh the listing.  With the background service running,
+a move now only updates a *staged* order for that folder in the home-window
+property store and refreshes; listings show the staged order in place of the
+stored one.  The staged orders are written back as one ``save_config`` when
+
+* the folder has been left alone for ``_QUIET_PERIOD`` seconds (the service
+  checks from its main loop), or
+* the plugin is invoked for anything other than that folder or its moves
+  (i.e. the user navigated away).
+
+Without the service nothing would be left to flush a forgotten stage, so
+moves are saved immediately as before.  "Move to Position…" is a single
+move and is always saved immediately.
+
+A stage is keyed by the folder it reorders: ``collection:<media>:<index>``
+holds a collection's entries, ``show:<tvshowid>`` a show's
+``show_item_order`` list.  Like a collection stage, a show stage gives way
+if the stored order changes underneath it.
+"""
+
+import json
+import time
+
+_CACHE_KEY = "reorder"
+_QUIET_PERIOD = 10  # seconds
+
+
+def collection_key(media_type, collection_index):
+    return "collection:{}:{}".format(media_type, collection_index)
+
+
+def show_key(tvshowid):
+    return "show:{}".format(tvshowid)
+
+
+def _stages():
+    from cache import _cache_get
+    return _cache_get(_CACHE_KEY, ttl=float("inf")) or {}
+
+
+def _store(stages):
+    from cache import _cache_clear, _cache_set, bump_generation
+    if stages:
+        _cache_set(_CACHE_KEY, stages)
+    else:
+        _cache_clear(_CACHE_KEY)
+    # next_up walks the staged orders, so its cached items are stale too.
+    bump_generation("nextup")
+
+
+def staged(key):
+    """Return the staged order for ``key``, or None."""
+    entry = _stages().get(key)
+    return entry["items"] if entry else None
+
+
+def current(key, stored):
+    """Return the staged order for ``key`` if it still matches ``stored``.
+
+    A stage holds the same entries as the stored order, rearranged; if the
+    stored entries changed underneath it (added, removed, edited elsewhere)
+    the stage is stale and the stored order wins.
+    """
+    items = staged(key)
+    if items is not None and _same_entries(items, stored):
+        return items
+    return stored
+
+
+def show_order(config, tvshowid):
+    """Return a show's staged item order, else its stored one.
+
+    A show's stage is kept only while the stored order it started from is
+    still the stored one (see :func:`_apply`).
+    """
+    stored = config.get("show_item_order", {}).get(str(tvshowid), [])
+    entry = _stages().get(show_key(tvshowid))
+    if entry and entry.get("base", stored) == stored:
+        return entry["items"]
+    return stored
+
+
+def _same_entries(a, b):
+    def dump(items):
+        return sorted(json.dumps(i, sort_keys=True) for i in items)
+    return dump(a) == dump(b)
+
+
+def move(items, pos, new_pos):
+    """Move ``items[pos]`` to ``new_pos`` in place (clamped to the list)."""
+    new_pos = max(0, min(new_pos, len(items) - 1))
+    items.insert(new_pos, items.pop(pos))
+
+
+def commit(config, key, items, immediate=False):
+    """Record ``items`` as the new order for ``key``.
+
+    Staged when a reorder session is possible, otherwise (or when
+    ``immediate``) written to ``config`` and saved together with any other
+    staged orders.
+    """
+    import sync_queue
+    from collections_mod import save_config
+
+    if not immediate and sync_queue.service_running():
+        stages = _stages()
+        entry = stages.get(key) or {}
+        entry.update(items=items, touched=time.time())
+        kind, _, rest = key.partition(":")
+        if kind == "show":
+            # The stored order the first move started from; see _apply.
+            entry.setdefault(
+                "base", config.get("show_item_order", {}).get(rest, []))
+        stages[key] = entry
+        _store(stages)
+        return
+    stages = _stages()
+    stages.pop(key, None)
+    _apply(config, stages)
+    _apply(config, {key: {"items": items}})
+    _store({})
+    save_config(config)
+
+
+def flush(keys=None):
+    """Save the staged orders for ``keys`` (all if None) in one write."""
+    from collections_mod import load_config, save_config
+
+    stages = _stages()
+    flushing = {k: v for k, v in stages.items() if keys is None or k in keys}
+    if not flushing:
+        return False
+    _store({k: v for k, v in stages.items() if k not in flushing})
+    config = load_config()
+    _apply(config, flushing)
+    save_config(config)
+    return True
+
+
+def flush_idle():
+    """Flush stages untouched for the quiet period (called by the service)."""
+    now = time.time()
+    idle = [k for k, v in _stages().items()
+            if now - v["touched"] >= _QUIET_PERIOD]
+    return flush(idle) if idle else False
+
+
+def on_navigate(action, params):
+    """Flush every stage except the one for the folder being shown/reordered."""
+    stages = _stages()
+    if not stages:
+        return
+    keep = _route_key(action, params)
+    others = [k for k in stages if k != keep]
+    if others:
+        flush(others)
+
+
+def _route_key(action, params):
+    def param(name):
+        return params.get(name, [None])[0]
+
+    if action in ("collection", "move_in_collection"):
+        return collection_key("tv", param("index"))
+    if action in ("movie_collection", "move_in_movie_collection"):
+        return collection_key("movie", param("index"))
+    if action in ("seasons", "move_show_item"):
+        return show_key(param("tvshowid"))
+    return None
+
+
+def _apply(config, stages):
+    from collections_mod import _get_collections, _items_key
+
+    for key, entry in stages.items():
+        kind, _, rest = key.partition(":")
+        if kind == "collection":
+            media_type, _, index = rest.partition(":")
+            collections = _get_collections(config, media_type)
+            index = int(index)
+            ikey = _items_key(media_type)
+            if (index < len(collections)
+                    and _same_entries(collections[index][ikey], entry["items"])):
+                collections[index][ikey] = entry["items"]
+        elif kind == "show":
+            # A show's items are rebuilt from the library, so its stage can't
+            # be checked entry by entry; it is dropped instead if the stored
+            # order changed since the stage began (saved elsewhere).
+            orders = config.setdefault("show_item_order", {})
+            if entry.get("base", orders.get(rest, [])) == orders.get(rest, []):
+                orders[rest] = entry["items"]
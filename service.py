@@ -2,19 +2,45 @@
 
 Kodi runs this once at login and keeps it alive for the session, which is what
 keeps the ``PlaybackMonitor`` callbacks (``onAVStarted`` / ``onPlayBackStopped``
-/ ``onPlayBackEnded``) wired up. The plugin script (``main.py``) is a one-shot
+/ ``onPlayBackEnded``) wired up. The plugin script (``plugin.py``) is a one-shot
 process and cannot host long-lived monitors.
+
+The ``LibraryMonitor`` doubles as the abort monitor and publishes library
+change notifications for the plugin's caches (see ``library_state``).  The
+service also hosts the in-memory ``LibraryModel`` that answers the plugin's
+listing queries over loopback IPC (see ``ipc``), and drains the write-behind
+queue of shared config saves (see ``sync_queue``) and flushes reorder
+sessions once they go quiet (see ``reorder``).
 """
 
 import xbmc
 
-from main import ADDON_ID, PlaybackMonitor
+import reorder
+import sync_queue
+from main import ADDON_ID, PlaybackMonitor, ensure_forced_views
+from ipc import LibraryServer
+from library_model import LibraryModel
+from library_state import LibraryMonitor
 
 xbmc.log("{}: service starting".format(ADDON_ID), xbmc.LOGINFO)
+# Set up the skin's forced views now so the first navigation doesn't have to.
+ensure_forced_views()
 player = PlaybackMonitor()
-abort_monitor = xbmc.Monitor()
-xbmc.log("{}: PlaybackMonitor active".format(ADDON_ID), xbmc.LOGINFO)
-while not abort_monitor.abortRequested():
-    if abort_monitor.waitForAbort(1):
+library_monitor = LibraryMonitor()
+server = LibraryServer(LibraryModel())
+server.start()
+sync_queue.start()
+xbmc.log("{}: PlaybackMonitor, LibraryMonitor and library server active".format(
+    ADDON_ID), xbmc.LOGINFO)
+while not library_monitor.abortRequested():
+    reorder.flush_idle()
+    sync_queue.drain()
+    if library_monitor.waitForAbort(1):
         break
+# Save any reorder still in progress, then make one last attempt so a save
+# made just before exit isn't left for next login.
+reorder.flush()
+sync_queue.drain()
+sync_queue.stop()
+server.stop()
 xbmc.log("{}: service exiting".format(ADDON_ID), xbmc.LOGINFO)
@@ -0,0 +1,396 @@
+"""Persistent on-disk snapshot of the library rows used by listings.
+
+``get_library_shows`` / ``get_library_movies`` used to pull every show or
+movie with art, plot and genre on every navigation.  The snapshot keeps those
+projected rows in an indexed SQLite file under ``CONFIG_DIR`` so a listing is
+a local read.
+
+The snapshot is brought up to date incrementally: a cheap "fingerprint"
+listing (ids plus the handful of fields that change when an item is watched,
+tagged or edited) is compared against the stored rows, and only new or changed rows
+are re-fetched in one batched JSON-RPC round trip.  While the background
+service is running, its library change log (``library_state``) names the
+exact rows to re-fetch instead; otherwise the fingerprint probe runs at most
+once per ``_CHECK_TTL`` unless a local write marks the kind stale.  Edits
+the fingerprint can't see (artwork, plot, genre) are picked up by a full
+rebuild every ``_REBUILD_TTL``, which also happens when the schema or addon
+version changes.
+
+Any failure returns ``None`` so callers fall back to plain JSON-RPC.
+"""
+
+import json
+import threading
+import time
+
+import xbmc
+import xbmcvfs
+
+SNAPSHOT_FILE = "library.db"
+SCHEMA_VERSION = 2
+
+# How long a fingerprint check stays valid before the next listing re-probes.
+_CHECK_TTL = 120  # seconds
+# How long a full build stands in for the fields the fingerprint leaves out.
+_REBUILD_TTL = 24 * 3600  # seconds
+
+_KINDS = {
+    "tvshow": {
+        "method": "VideoLibrary.GetTVShows",
+        "result_key": "tvshows",
+        "details_method": "VideoLibrary.GetTVShowDetails",
+        "details_key": "tvshowdetails",
+        "id_key": "tvshowid",
+        "properties": [
+            "title", "art", "year", "genre", "rating", "plot",
+            "dateadded", "lastplayed", "watchedepisodes", "episode", "tag",
+        ],
+        "fingerprint": [
+            "title", "watchedepisodes", "episode", "lastplayed", "dateadded",
+            "tag",
+        ],
+        "watched": (
+            "COALESCE(json_extract(i.row, '$.episode'), 0) > 0 AND"
+            " COALESCE(json_extract(i.row, '$.watchedepisodes'), 0)"
+            " >= json_extract(i.row, '$.episode')"
+        ),
+    },
+    "movie": {
+        "method": "VideoLibrary.GetMovies",
+        "result_key": "movies",
+        "details_method": "VideoLibrary.GetMovieDetails",
+        "details_key": "moviedetails",
+        "id_key": "movieid",
+        "properties": [
+            "title", "art", "year", "genre", "rating", "plot",
+            "dateadded", "lastplayed", "file", "playcount", "runtime",
+            "resume", "tag",
+        ],
+        "fingerprint": [
+            "title", "playcount", "resume", "lastplayed", "dateadded", "tag",
+        ],
+        "watched": "COALESCE(json_extract(i.row, '$.playcount'), 0) > 0",
+    },
+}
+
+# Connection cache (reset each plugin invocation), one per thread: the
+# service's IPC server thread and its main loop both read the snapshot, and a
+# sqlite3 connection only works on the thread that opened it.
+_local = threading.local()
+
+
+def enabled():
+    """Return True if the on-disk snapshot is switched on in addon settings."""
+    from main import ADDON
+    try:
+        return ADDON.getSetting("library_snapshot") == "true"
+    except Exception:
+        return False
+
+
+def _version():
+    from main import ADDON
+    return "{}:{}".format(SCHEMA_VERSION, ADDON.getAddonInfo("version"))
+
+
+def _ensure_schema(conn):
+    """Create the snapshot tables, wiping them on a schema/version mismatch."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS meta ("
+        "  key TEXT PRIMARY KEY,"
+        "  value TEXT NOT NULL)"
+    )
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is not None and row[0] == _version():
+        return
+    conn.execute("DROP TABLE IF EXISTS items")
+    conn.execute("DROP TABLE IF EXISTS tags")
+    conn.execute("DELETE FROM meta")
+    conn.execute(
+        "CREATE TABLE items ("
+        "  kind TEXT NOT NULL,"
+        "  id INTEGER NOT NULL,"
+        "  title_key TEXT NOT NULL,"
+        "  fingerprint TEXT NOT NULL,"
+        "  row TEXT NOT NULL,"
+        "  PRIMARY KEY (kind, id))"
+    )
+    conn.execute("CREATE INDEX items_title ON items (kind, title_key)")
+    conn.execute(
+        "CREATE TABLE tags ("
+        "  kind TEXT NOT NULL,"
+        "  id INTEGER NOT NULL,"
+        "  tag TEXT NOT NULL COLLATE NOCASE)"
+    )
+    conn.execute("CREATE INDEX tags_tag ON tags (kind, tag)")
+    conn.execute("CREATE INDEX tags_id ON tags (kind, id)")
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('version', ?)", (_version(),)
+    )
+    conn.commit()
+
+
+def _get_connection():
+    """Return a cached connection to the snapshot file."""
+    import sqlite3
+    from main import CONFIG_DIR
+
+    conn = getattr(_local, "connection", None)
+    if conn is not None:
+        return conn
+    if not xbmcvfs.exists(CONFIG_DIR):
+        xbmcvfs.mkdirs(CONFIG_DIR)
+    conn = sqlite3.connect(CONFIG_DIR + SNAPSHOT_FILE, timeout=5)
+    _ensure_schema(conn)
+    _local.connection = conn
+    return conn
+
+
+def _fingerprint(spec, row):
+    return json.dumps([row.get(p) for p in spec["fingerprint"]], sort_keys=True)
+
+
+def _store(conn, kind, spec, rows):
+    """Insert or replace full rows (and their tags)."""
+    for row in rows:
+        item_id = row[spec["id_key"]]
+        conn.execute(
+            "INSERT OR REPLACE INTO items (kind, id, title_key, fingerprint, row)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (kind, item_id, row.get("title", "").lower(),
+             _fingerprint(spec, row), json.dumps(row)),
+        )
+        conn.execute("DELETE FROM tags WHERE kind = ? AND id = ?", (kind, item_id))
+        conn.executemany(
+            "INSERT INTO tags (kind, id, tag) VALUES (?, ?, ?)",
+            [(kind, item_id, t) for t in row.get("tag", [])],
+        )
+
+
+def _delete(conn, kind, ids):
+    for item_id in ids:
+        conn.execute("DELETE FROM items WHERE kind = ? AND id = ?", (kind, item_id))
+        conn.execute("DELETE FROM tags WHERE kind = ? AND id = ?", (kind, item_id))
+
+
+def _rebuild(conn, kind, spec):
+    """Replace every row of ``kind`` with a fresh full listing."""
+    from main import jsonrpc
+
+    result = jsonrpc(spec["method"], {"properties": spec["properties"]})
+    if result is None:
+        return False
+    conn.execute("DELETE FROM items WHERE kind = ?", (kind,))
+    conn.execute("DELETE FROM tags WHERE kind = ?", (kind,))
+    _store(conn, kind, spec, result.get(spec["result_key"], []))
+    conn.commit()
+    _meta_set(conn, "built." + kind, str(time.time()))
+    return True
+
+
+def _refresh(conn, kind, spec):
+    """Re-fetch only the rows whose fingerprint changed; drop removed rows."""
+    from main import jsonrpc, jsonrpc_batch
+
+    result = jsonrpc(spec["method"], {"properties": spec["fingerprint"]})
+    if result is None:
+        return False
+    current = {
+        row[spec["id_key"]]: _fingerprint(spec, row)
+        for row in result.get(spec["result_key"], [])
+    }
+    stored = dict(conn.execute(
+        "SELECT id, fingerprint FROM items WHERE kind = ?", (kind,)
+    ).fetchall())
+
+    changed = [i for i, fp in current.items() if stored.get(i) != fp]
+    removed = [i for i in stored if i not in current]
+    if changed:
+        details = jsonrpc_batch(
+            (spec["details_method"],
+             {spec["id_key"]: i, "properties": spec["properties"]})
+            for i in changed
+        )
+        _store(conn, kind, spec, [
+            d[spec["details_key"]] for d in details
+            if d and spec["details_key"] in d
+        ])
+    _delete(conn, kind, removed)
+    conn.commit()
+    return True
+
+
+def _refetch(conn, kind, spec, ids):
+    """Re-fetch specific rows; ids Kodi reports as errors are dropped.
+
+    An id with neither a row nor an error means the round trip failed, so
+    the sync fails (and is retried) rather than treating it as removed.
+    """
+    from main import jsonrpc_batch
+
+    ids = sorted(ids)
+    errors = {}
+    details = jsonrpc_batch(
+        ((spec["details_method"],
+          {spec["id_key"]: i, "properties": spec["properties"]})
+         for i in ids),
+        errors=errors,
+    )
+    found = [d[spec["details_key"]] for d in details
+             if d and spec["details_key"] in d]
+    _store(conn, kind, spec, found)
+    _delete(conn, kind, [ids[n] for n in errors])
+    conn.commit()
+    return len(found) + len(errors) == len(ids)
+
+
+def _meta_get(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _meta_set(conn, key, value):
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+    )
+    conn.commit()
+
+
+def _sync(conn, kind):
+    """Make sure the stored rows for ``kind`` are current.
+
+    With the background service running, the library change log says exactly
+    which rows changed since the snapshot's last sync, so only the
+    ``_REBUILD_TTL`` full build expires on a timer.  Without it, the
+    fingerprint probe runs at most every ``_CHECK_TTL`` seconds.
+    """
+    from cache import _cache_get, _cache_set
+    import library_state
+
+    spec = _KINDS[kind]
+    check_key = "snapshot.checked." + kind
+    token = library_state.current()
+    built = _meta_get(conn, "built." + kind)
+    if built is None or time.time() - float(built) >= _REBUILD_TTL:
+        ok = _rebuild(conn, kind, spec)
+    elif token is None:
+        if _cache_get(check_key, ttl=_CHECK_TTL) is not None:
+            return True
+        ok = _refresh(conn, kind, spec)
+    else:
+        stored = _meta_get(conn, "token." + kind)
+        changes = None
+        if _cache_get(check_key, ttl=float("inf")) is not None:
+            changes = library_state.changes_since(
+                json.loads(stored) if stored else None
+            )
+        if changes is None or (kind in changes and changes[kind] is None):
+            ok = _refresh(conn, kind, spec)
+        elif changes.get(kind):
+            ok = _refetch(conn, kind, spec, changes[kind])
+        else:
+            ok = True
+    if ok:
+        _cache_set(check_key, True)
+        if token is not None:
+            _meta_set(conn, "token." + kind, json.dumps(token))
+    return ok
+
+
+def mark_stale(kind):
+    """Force the next listing of ``kind`` to re-check the library.
+
+    Call after a local write (watched state, resume point) so the change is
+    visible on the very next ``Container.Refresh``.
+    """
+    from cache import _cache_clear
+    _cache_clear("snapshot.checked." + kind)
+
+
+def get_rows(kind, properties, tag=None, titles=None, limits=None):
+    """Return snapshot rows projected to ``properties``, or None.
+
+    ``tag`` is a tag expression (see ``tag_query``) compiled into the query;
+    ``titles`` limits the rows to those titles (matched case-insensitively,
+    through the title index) and ``limits`` (``(start, end)``) to one page
+    in title order.
+
+    ``None`` means the snapshot cannot answer (disabled, unknown property,
+    sync failure) and the caller should query JSON-RPC directly.
+    """
+    import sqlite3
+
+    if not enabled():
+        return None
+    spec = _KINDS[kind]
+    if not set(properties) <= set(spec["properties"]):
+        return None
+    try:
+        conn = _get_connection()
+        if not _sync(conn, kind):
+            return None
+        sql = "SELECT i.row FROM items i"
+        where = ["i.kind = ?"]
+        args = [kind]
+        if tag:
+            import tag_query
+
+            def tag_sql(name):
+                return ("EXISTS (SELECT 1 FROM tags t WHERE t.kind = i.kind"
+                        " AND t.id = i.id AND t.tag = ?)", [name])
+
+            sql_tag, tag_args = tag_query.to_sql(
+                tag_query.parse(tag), tag_sql, spec["watched"])
+            where.append(sql_tag)
+            args.extend(tag_args)
+        if titles is not None:
+            where.append("i.title_key IN ({})".format(
+                ", ".join("?" * len(titles)) or "NULL"))
+            args.extend(t.lower() for t in titles)
+        # listing.title_order: lowercased title, then id.
+        sql += (" WHERE " + " AND ".join(where)
+                + " ORDER BY i.title_key, i.id")
+        if limits is not None:
+            sql += " LIMIT ? OFFSET ?"
+            args.extend([limits[1] - limits[0], limits[0]])
+        cur = conn.execute(sql, args)
+        rows = [json.loads(r[0]) for r in cur.fetchall()]
+    except sqlite3.Error as e:
+        from main import ADDON_ID
+        xbmc.log(
+            "{}: library snapshot unavailable: {}".format(ADDON_ID, e),
+            xbmc.LOGWARNING,
+        )
+        return None
+
+    keep = set(properties) | {spec["id_key"], "label"}
+    return [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+
+def get_tag_counts(kind):
+    """Return ``{tag: item count}`` for ``kind`` from the tag index, or None.
+
+    Tags differing only in case are counted together, as Kodi's tag filter
+    matches them alike.
+    """
+    import sqlite3
+
+    if not enabled():
+        return None
+    try:
+        conn = _get_connection()
+        if not _sync(conn, kind):
+            return None
+        cur = conn.execute(
+            "SELECT MIN(tag), COUNT(DISTINCT id) FROM tags WHERE kind = ?"
+            " GROUP BY tag",
+            (kind,),
+        )
+        return {tag: count for tag, count in cur.fetchall()}
+    except sqlite3.Error as e:
+        from main import ADDON_ID
+        xbmc.log(
+            "{}: library snapshot unavailable: {}".format(ADDON_ID, e),
+            xbmc.LOGWARNING,
+        )
+        return None
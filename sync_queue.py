@@ -0,0 +1,185 @@
+"""Write-behind queue for shared (MySQL) config saves.
+
+``save_config`` commits the config to local JSON and, while the background
+service is running, hands the MySQL write to this queue instead of waiting
+on the network.  The queue is a single file under ``CONFIG_DIR`` holding the
+latest snapshot: each config is a complete snapshot, so a newer save simply
+replaces one that hasn't been written yet, and a burst of Move Up/Down clicks
+reaches MySQL as one write.
+
+The service calls :func:`drain` from its main loop; with nothing pending it
+returns without reading anything.  Otherwise it first claims the queued
+snapshot by renaming it to ``PROCESSING_FILE`` (atomically), so a save that
+arrives while the write is in flight lands in a fresh queue file instead of
+being removed along with the one just written.  Failed writes are retried with
+exponential backoff unless a newer snapshot is queued.  While anything is
+queued the home-window property ``watchorder.sync.pending`` is ``"true"`` so
+skins and the root menu can show it, and ``load_config`` reads local JSON
+rather than the (older) MySQL copy.
+"""
+
+import json
+import os
+import time
+
+import xbmc
+import xbmcgui
+import xbmcvfs
+
+QUEUE_FILE = "sync_queue.json"
+PROCESSING_FILE = "sync_queue.processing.json"
+PENDING_PROPERTY = "watchorder.sync.pending"
+_SERVICE_PROPERTY = "watchorder.sync.service"
+_BASE_BACKOFF = 5  # seconds
+_MAX_BACKOFF = 300
+
+
+def _path(name=QUEUE_FILE):
+    from main import CONFIG_DIR
+    return CONFIG_DIR + name
+
+
+def _read(name=QUEUE_FILE):
+    try:
+        with xbmcvfs.File(_path(name), "r") as f:
+            return json.loads(f.read())
+    except Exception:
+        return None
+
+
+def _write(entry, name=QUEUE_FILE):
+    """Replace the file atomically so a reader never sees half a write."""
+    from main import CONFIG_DIR
+    if not xbmcvfs.exists(CONFIG_DIR):
+        xbmcvfs.mkdirs(CONFIG_DIR)
+    tmp = _path(name) + ".tmp"
+    with xbmcvfs.File(tmp, "w") as f:
+        f.write(json.dumps(entry))
+    os.replace(xbmcvfs.translatePath(tmp), xbmcvfs.translatePath(_path(name)))
+
+
+def _remove(name):
+    try:
+        os.remove(xbmcvfs.translatePath(_path(name)))
+    except OSError:
+        pass
+
+
+def _claim():
+    """Move a newly queued snapshot into the processing slot.
+
+    It supersedes any snapshot still waiting there for a retry.  Only the
+    service writes the processing file, so nothing else can race with it.
+    """
+    try:
+        os.replace(xbmcvfs.translatePath(_path()),
+                   xbmcvfs.translatePath(_path(PROCESSING_FILE)))
+    except OSError:
+        pass  # nothing new queued
+
+
+def _current():
+    """The newest snapshot still to be written, or None."""
+    return _read() or _read(PROCESSING_FILE)
+
+
+def _set_pending(pending):
+    win = xbmcgui.Window(10000)
+    if pending:
+        win.setProperty(PENDING_PROPERTY, "true")
+    else:
+        win.clearProperty(PENDING_PROPERTY)
+
+
+def service_running():
+    return xbmcgui.Window(10000).getProperty(_SERVICE_PROPERTY) == "true"
+
+
+def start():
+    """Mark the queue as drained by this (service) process."""
+    xbmcgui.Window(10000).setProperty(_SERVICE_PROPERTY, "true")
+    _set_pending(_current() is not None)
+
+
+def stop():
+    xbmcgui.Window(10000).clearProperty(_SERVICE_PROPERTY)
+
+
+def enqueue(config):
+    """Queue ``config`` for MySQL, replacing any snapshot not yet written."""
+    previous = _current() or {}
+    _write({
+        "seq": previous.get("seq", 0) + 1,
+        "config": config,
+        "queued_at": time.time(),
+        "attempts": 0,
+        "next_try": 0,
+    })
+    _set_pending(True)
+
+
+def pending():
+    """True while a snapshot is waiting to reach MySQL."""
+    return xbmcgui.Window(10000).getProperty(PENDING_PROPERTY) == "true"
+
+
+def status():
+    """Return ``(attempts, seconds until the next try)`` or None if idle."""
+    entry = _current()
+    if entry is None:
+        return None
+    return entry["attempts"], max(0, int(entry["next_try"] - time.time()))
+
+
+def drain():
+    """Try to write the queued snapshot to MySQL.  Returns True if idle after."""
+    from main import ADDON_ID
+    from db import _shared_collections_enabled, db_save_config
+
+    # Called every second: an idle queue costs one property read and a stat.
+    if not pending() and not xbmcvfs.exists(_path(PROCESSING_FILE)):
+        return True
+    _claim()
+    entry = _read(PROCESSING_FILE)
+    if entry is None:
+        return _finish()
+    if not _shared_collections_enabled():
+        # Sharing was switched off; there is nowhere to sync to.
+        _remove(PROCESSING_FILE)
+        return _finish()
+    if time.time() < entry["next_try"]:
+        return False
+
+    if db_save_config(entry["config"]):
+        _remove(PROCESSING_FILE)
+        return _finish()
+
+    entry["attempts"] += 1
+    backoff = min(_BASE_BACKOFF * 2 ** (entry["attempts"] - 1), _MAX_BACKOFF)
+    entry["next_try"] = time.time() + backoff
+    _write(entry, PROCESSING_FILE)
+    xbmc.log("{}: config sync failed, retrying in {}s".format(
+        ADDON_ID, backoff), xbmc.LOGWARNING)
+    return False
+
+
+def discard():
+    """Drop any queued snapshot (a newer config reached MySQL directly)."""
+    _remove(QUEUE_FILE)
+    _remove(PROCESSING_FILE)
+    _finish()
+
+
+def _finish():
+    """Clear the pending flag unless a newer snapshot was queued meanwhile.
+
+    Returns True if the queue is idle.  The flag is cleared before the file
+    is checked: ``enqueue`` writes the file before setting the flag, so a
+    save racing with this either finds the flag cleared and sets it, or its
+    file is seen here.
+    """
+    _set_pending(False)
+    if _read() is None:
+        return True
+    _set_pending(True)
+    return False
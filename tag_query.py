@@ -0,0 +1,155 @@
+"""Boolean tag expressions for ``?tag=`` (``anime AND is:unwatched``).
+
+A ``tag`` argument may combine tag names with ``AND``, ``OR``, ``NOT`` and
+parentheses; the pseudo-terms ``is:watched`` and ``is:unwatched`` match on
+watched state.  Operators are upper case and a name is whatever lies between
+them, so an ordinary tag (spaces and all) is still just that tag.  Quote a
+name that contains an operator or a parenthesis (``"Rock AND Roll"``).  Text
+that doesn't parse is taken as one literal tag name.
+
+An expression is parsed once into a small tree and compiled for whichever
+path answers the listing — a JSON-RPC filter, a SQL condition for the video
+DB or the snapshot, or a row predicate for the service's in-memory model —
+so the filtering happens where the rows are rather than in the plugin.
+
+Tree nodes are ``("tag", name)``, ``("watched", bool)``, ``("not", node)``
+and ``("and" | "or", [nodes])``.
+"""
+
+import re
+
+# Operator words count only when they stand alone (between spaces or
+# parentheses), so "ROCK-AND-ROLL" stays one name.
+_TOKENS = re.compile(
+    r'("[^"]*"|\(|\)|(?<![^\s()])(?:AND|OR|NOT)(?![^\s()]))')
+_OPERATORS = ("AND", "OR", "NOT", "(", ")")
+_WATCHED = {"is:watched": True, "is:unwatched": False}
+
+
+def parse(text):
+    """Return the tree for ``text`` (a literal tag if it doesn't parse)."""
+    tokens = []
+    for piece in _TOKENS.split(text):
+        if piece.startswith('"') and piece.endswith('"') and len(piece) > 1:
+            tokens.append(("term", piece[1:-1]))
+        elif piece in _OPERATORS:
+            tokens.append((piece, None))
+        elif piece.strip():
+            tokens.append(("term", piece.strip()))
+    try:
+        node, pos = _parse_or(tokens, 0)
+    except (IndexError, ValueError):
+        return ("tag", text)
+    if pos != len(tokens):
+        return ("tag", text)
+    return node
+
+
+def _parse_or(tokens, pos):
+    node, pos = _parse_and(tokens, pos)
+    nodes = [node]
+    while pos < len(tokens) and tokens[pos][0] == "OR":
+        node, pos = _parse_and(tokens, pos + 1)
+        nodes.append(node)
+    return (nodes[0] if len(nodes) == 1 else ("or", nodes)), pos
+
+
+def _parse_and(tokens, pos):
+    node, pos = _parse_unary(tokens, pos)
+    nodes = [node]
+    while pos < len(tokens) and tokens[pos][0] == "AND":
+        node, pos = _parse_unary(tokens, pos + 1)
+        nodes.append(node)
+    return (nodes[0] if len(nodes) == 1 else ("and", nodes)), pos
+
+
+def _parse_unary(tokens, pos):
+    kind, value = tokens[pos]
+    if kind == "NOT":
+        node, pos = _parse_unary(tokens, pos + 1)
+        return ("not", node), pos
+    if kind == "(":
+        node, pos = _parse_or(tokens, pos + 1)
+        if tokens[pos][0] != ")":
+            raise ValueError("unbalanced parenthesis")
+        return node, pos + 1
+    if kind != "term":
+        raise ValueError("unexpected {}".format(kind))
+    if value.lower() in _WATCHED:
+        return ("watched", _WATCHED[value.lower()]), pos + 1
+    return ("tag", value), pos + 1
+
+
+def quote(name):
+    """Return ``name`` as an expression matching exactly that tag."""
+    if parse(name) == ("tag", name) or '"' in name:
+        return name
+    return '"{}"'.format(name)
+
+
+def to_filter(node):
+    """Compile to a ``VideoLibrary.Get*`` filter.
+
+    JSON-RPC filters have no ``not``, so negations are pushed down to the
+    terms (``tag isnot``, the opposite playcount test).
+    """
+    kind, value = node
+    if kind == "tag":
+        return {"field": "tag", "operator": "is", "value": value}
+    if kind == "watched":
+        if value:
+            return {"field": "playcount", "operator": "greaterthan",
+                    "value": "0"}
+        return {"field": "playcount", "operator": "is", "value": "0"}
+    if kind == "not":
+        return _negated_filter(value)
+    return {kind: [to_filter(n) for n in value]}
+
+
+def _negated_filter(node):
+    kind, value = node
+    if kind == "tag":
+        return {"field": "tag", "operator": "isnot", "value": value}
+    if kind == "watched":
+        return to_filter(("watched", not value))
+    if kind == "not":
+        return to_filter(value)
+    flipped = "or" if kind == "and" else "and"
+    return {flipped: [_negated_filter(n) for n in value]}
+
+
+def to_sql(node, tag_sql, watched_sql):
+    """Compile to a SQL condition; returns ``(sql, args)``.
+
+    ``tag_sql(name)`` returns the ``(sql, args)`` test for one tag and
+    ``watched_sql`` is the condition for a watched row.
+    """
+    kind, value = node
+    if kind == "tag":
+        return tag_sql(value)
+    if kind == "watched":
+        sql = "({})".format(watched_sql)
+        return (sql if value else "NOT " + sql), []
+    if kind == "not":
+        sql, args = to_sql(value, tag_sql, watched_sql)
+        return "NOT ({})".format(sql), args
+    parts, args = [], []
+    for n in value:
+        sql, more = to_sql(n, tag_sql, watched_sql)
+        parts.append(sql)
+        args.extend(more)
+    return "({})".format(" {} ".format(kind.upper()).join(parts)), args
+
+
+def matches(node, tags, watched):
+    """Evaluate against one row's ``tags`` and ``watched`` state."""
+    kind, value = node
+    if kind == "tag":
+        value = value.lower()
+        return any(t.lower() == value for t in tags)
+    if kind == "watched":
+        return watched == value
+    if kind == "not":
+        return not matches(value, tags, watched)
+    test = all if kind == "and" else any
+    return test(matches(n, tags, watched) for n in value)
@@ -33,6 +33,7 @@ def _install_kodi_fakes() -> None:
 
     # --- xbmc ---------------------------------------------------------------
     xbmc = types.ModuleType("xbmc")
+    xbmc.LOGDEBUG = 0
     xbmc.LOGINFO = 1
     xbmc.LOGERROR = 4
     xbmc.LOGWARNING = 3
@@ -42,6 +43,7 @@ def _install_kodi_fakes() -> None:
     xbmc.executeJSONRPC = MagicMock(return_value='{"result": {}}')
     xbmc.getInfoLabel = MagicMock(return_value="")
     xbmc.getCondVisibility = MagicMock(return_value=False)
+    xbmc.getSkinDir = MagicMock(return_value="skin.estuary")
 
     class _Monitor:
         def __init__(self):  # pragma: no cover - trivial
@@ -110,9 +112,13 @@ def _install_kodi_fakes() -> None:
     xbmcgui = types.ModuleType("xbmcgui")
     xbmcgui.ListItem = MagicMock()
     xbmcgui.Dialog = MagicMock()
+    xbmcgui.DialogProgressBG = MagicMock()
+    xbmcgui.NOTIFICATION_INFO = "info"
+    xbmcgui.NOTIFICATION_WARNING = "warning"
+    xbmcgui.NOTIFICATION_ERROR = "error"
 
     # Home-window property store backs the addon's lightweight cache
-    # (collections_mod._cache_get/_set, used by config and settings caching).
+    # (cache._cache_get/_set, used by config and settings caching).
     _window_props = {}
 
     class _Window:
@@ -134,12 +140,42 @@ def _install_kodi_fakes() -> None:
     xbmcplugin.setContent = MagicMock()
     xbmcplugin.setResolvedUrl = MagicMock()
     xbmcplugin.addDirectoryItem = MagicMock()
+    xbmcplugin.addDirectoryItems = MagicMock(return_value=True)
     xbmcplugin.addSortMethod = MagicMock()
     xbmcplugin.endOfDirectory = MagicMock()
     xbmcplugin.SORT_METHOD_NONE = 0
+    for _i, _name in enumerate(("UNSORTED", "LABEL", "TITLE_IGNORE_THE",
+                                "VIDEO_YEAR", "GENRE", "DATEADDED",
+                                "LASTPLAYED", "VIDEO_RATING"), 1):
+        setattr(xbmcplugin, "SORT_METHOD_" + _name, _i)
 
     xbmcvfs = types.ModuleType("xbmcvfs")
     xbmcvfs.translatePath = MagicMock(side_effect=lambda p: p)
+    xbmcvfs.exists = os.path.exists
+    xbmcvfs.mkdirs = lambda p: os.makedirs(p, exist_ok=True) or True
+
+    class _File:
+        # xbmcvfs.File is a context manager over a path, like open().
+        def __init__(self, path, mode="r"):
+            self._f = open(path, mode)
+
+        def read(self):
+            return self._f.read()
+
+        def write(self, data):
+            self._f.write(data)
+            return True
+
+        def close(self):
+            self._f.close()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            self.close()
+
+    xbmcvfs.File = _File
 
     sys.modules["xbmc"] = xbmc
     sys.modules["xbmcaddon"] = xbmcaddon
@@ -170,6 +206,22 @@ def main():
     return main_module
 
 
+@pytest.fixture
+def listed():
+    """Return a callable giving every ``(url, li, isFolder)`` row added with
+    ``xbmcplugin.addDirectoryItems`` since the test started, in order."""
+
+    import xbmcplugin
+
+    xbmcplugin.addDirectoryItems.reset_mock()
+
+    def _rows():
+        return [row for call in xbmcplugin.addDirectoryItems.call_args_list
+                for row in call.args[1]]
+
+    return _rows
+
+
 @pytest.fixture
 def jsonrpc_calls(monkeypatch, main):
     """Capture every ``main.jsonrpc(method, params)`` invocation."""
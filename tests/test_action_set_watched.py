@@ -77,24 +77,34 @@ def test_set_unwatched_movie_does_not_touch_resume(main, jsonrpc_calls):
 @pytest.fixture
 def bulk_main(main, monkeypatch):
     """Patch :func:`jsonrpc` so GetEpisodes returns a canned episode list and
-    SetEpisodeDetails records its calls."""
+    record every SetEpisodeDetails sent through :func:`jsonrpc_batch`."""
 
     recorded = []
+    batches = []
+    episodes = [
+        {"episodeid": 1, "playcount": 0, "resume": {"position": 0, "total": 0}},
+        {"episodeid": 2, "playcount": 0, "resume": {"position": 0, "total": 0}},
+        {"episodeid": 3, "playcount": 0, "resume": {"position": 0, "total": 0}},
+    ]
 
     def fake_jsonrpc(method, params=None):
         if method == "VideoLibrary.GetEpisodes":
-            return {
-                "episodes": [
-                    {"episodeid": 1, "title": "Pilot"},
-                    {"episodeid": 2, "title": "Chapter Two"},
-                    {"episodeid": 3, "title": "Chapter Three"},
-                ],
-            }
+            assert "playcount" in params["properties"]
+            return {"episodes": [dict(ep) for ep in episodes]}
         recorded.append((method, params))
         return {}
 
+    def fake_batch(calls):
+        calls = list(calls)
+        batches.append(calls)
+        recorded.extend(calls)
+        return [{}] * len(calls)
+
     monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    monkeypatch.setattr(main, "jsonrpc_batch", fake_batch)
     main._recorded = recorded  # type: ignore[attr-defined]
+    main._batches = batches  # type: ignore[attr-defined]
+    main._episodes = episodes  # type: ignore[attr-defined]
     return main
 
 
@@ -108,12 +118,17 @@ def test_set_watched_season_marks_every_episode(bulk_main):
 
     ids = [p["episodeid"] for (_m, p) in bulk_main._recorded]
     assert ids == [1, 2, 3]
-    for (_m, params) in bulk_main._recorded:
+    for (method, params) in bulk_main._recorded:
+        assert method == "VideoLibrary.SetEpisodeDetails"
         assert params["playcount"] == 1
         assert params["resume"] == {"position": 0, "total": 0}
+    # All three writes share one round trip.
+    assert len(bulk_main._batches) == 1
 
 
 def test_set_unwatched_season_leaves_resume_alone(bulk_main):
+    for ep in bulk_main._episodes:
+        ep["playcount"] = 1
     bulk_main.action_set_watched({
         "media": ["season"],
         "playcount": ["0"],
@@ -121,6 +136,7 @@ def test_set_unwatched_season_leaves_resume_alone(bulk_main):
         "season": ["1"],
     })
 
+    assert len(bulk_main._recorded) == 3
     for (_m, params) in bulk_main._recorded:
         assert "resume" not in params
         assert params["playcount"] == 0
@@ -137,3 +153,48 @@ def test_set_watched_tvshow_marks_every_episode(bulk_main):
     for (_m, params) in bulk_main._recorded:
         assert params["playcount"] == 1
         assert params["resume"] == {"position": 0, "total": 0}
+
+
+def test_bulk_skips_episodes_already_in_target_state(bulk_main):
+    bulk_main._episodes[0]["playcount"] = 1
+    # Watched but with a stale resume point — still needs the write.
+    bulk_main._episodes[1]["playcount"] = 2
+    bulk_main._episodes[1]["resume"] = {"position": 300, "total": 1400}
+    bulk_main.action_set_watched({
+        "media": ["tvshow"],
+        "playcount": ["1"],
+        "tvshowid": ["10"],
+    })
+
+    assert [p["episodeid"] for (_m, p) in bulk_main._recorded] == [2, 3]
+
+
+def test_bulk_unwatched_skips_unwatched_episodes(bulk_main):
+    bulk_main._episodes[2]["playcount"] = 1
+    bulk_main.action_set_watched({
+        "media": ["tvshow"],
+        "playcount": ["0"],
+        "tvshowid": ["10"],
+    })
+
+    assert [p["episodeid"] for (_m, p) in bulk_main._recorded] == [3]
+
+
+def test_long_show_is_chunked_with_progress(bulk_main):
+    import xbmcgui
+
+    bulk_main._episodes[:] = [
+        {"episodeid": i, "playcount": 0} for i in range(1, 501)
+    ]
+    xbmcgui.DialogProgressBG.reset_mock()
+    bulk_main.action_set_watched({
+        "media": ["tvshow"],
+        "playcount": ["1"],
+        "tvshowid": ["10"],
+    })
+
+    assert len(bulk_main._recorded) == 500
+    assert len(bulk_main._batches) == 500 // bulk_main._WATCHED_BATCH_SIZE
+    progress = xbmcgui.DialogProgressBG.return_value
+    progress.create.assert_called_once()
+    progress.close.assert_called_once()
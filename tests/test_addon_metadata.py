@@ -35,3 +35,13 @@ def test_service_extension_registered():
     ]
     assert len(services) == 1
     assert services[0].get("library") == "service.py"
+
+
+def test_plugin_entry_point_is_the_shim():
+    """``main.py`` as the entry would be executed twice per navigation."""
+    root = _parse_addon()
+    sources = [
+        e for e in root.findall("extension")
+        if e.get("point") == "xbmc.python.pluginsource"
+    ]
+    assert [e.get("library") for e in sources] == ["plugin.py"]
@@ -0,0 +1,68 @@
+"""``main.build_url`` templates produce exactly the ``urlencode`` URLs."""
+
+from __future__ import annotations
+
+from urllib.parse import urlencode
+
+import pytest
+
+
+CASES = [
+    {"action": "root_tv"},
+    {"action": "root_tv", "tag": "anime", "collections_only": "1"},
+    {"action": "collection", "index": 3},
+    {"action": "move_in_collection", "index": 0, "pos": 12,
+     "direction": "up"},
+    {"action": "play_movie", "movieid": 41,
+     "file": "smb://nas/Movies/Alien (1979)/Alien & Aliens?.mkv"},
+    {"action": "add_to_collection", "title": "Shōgun: 将軍 + 100% ~#"},
+    {"action": "set_watched", "media": "tvshow", "playcount": 0,
+     "tvshowid": -1},
+    {"action": "seasons", "tvshowid": True},
+    {"action": "root_movies", "tag": None},
+    {"action": "raw", "blob": b"a b/c"},
+    {"action": "weird value/&=", "x": 1.5},
+    {"index": 2, "action": "collection"},  # action not first
+    {"tag": "Sci-Fi"},  # bare tag URL, no action
+    {},
+]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_matches_urlencode(main, params):
+    expected = "{}?{}".format(main.BASE_URL, urlencode(params))
+    assert main.build_url(params) == expected
+    assert main.build_url(params) == expected  # from the cached template
+
+
+def test_templates_are_per_action_and_key_order(main):
+    main.build_url({"action": "collection", "index": 1})
+    main.build_url({"action": "collection", "index": 2})
+    main.build_url({"action": "seasons", "tvshowid": 2})
+    assert len(main._url_templates) == 2
+
+
+def test_sequence_params_fall_back_to_urlencode(main):
+    pairs = [("action", "root_tv"), ("tag", "a b")]
+    assert main.build_url(pairs) == "{}?{}".format(
+        main.BASE_URL, urlencode(pairs))
+
+
+def test_rows_reuse_one_template_per_shape(main, monkeypatch):
+    """Context-menu URLs for 18k rows encode each URL shape once."""
+    rows = [{"action": "move_in_movie_collection", "index": i % 40,
+             "pos": i, "direction": "down"} for i in range(9000)]
+    rows += [{"action": "add_to_movie_collection",
+              "title": "Movie number {}".format(i)} for i in range(9000)]
+    built = []
+    make = main._url_template
+
+    def counting(keys, action):
+        built.append(action)
+        return make(keys, action)
+
+    monkeypatch.setattr(main, "_url_template", counting)
+    urls = [main.build_url(p) for p in rows]
+    assert urls == ["{}?{}".format(main.BASE_URL, urlencode(p))
+                    for p in rows]
+    assert built == ["move_in_movie_collection", "add_to_movie_collection"]
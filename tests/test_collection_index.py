@@ -0,0 +1,198 @@
+"""Collection index derived by ``save_config`` and returned by ``load_config``.
+
+Listings look titles, show ids and linked-movie markers up in the index
+instead of scanning every collection; these tests pin what it holds and when
+it is rebuilt.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def store(main, monkeypatch, tmp_path):
+    """Local-JSON config under a temp dir and a fake library of shows."""
+    import collections_mod
+    import db
+
+    monkeypatch.setattr(main, "CONFIG_DIR", str(tmp_path) + "/")
+    monkeypatch.setattr(main, "CONFIG_PATH", str(tmp_path) + "/collections.json")
+    monkeypatch.setattr(db, "db_load_config", lambda: None)
+    monkeypatch.setattr(db, "db_save_config", lambda _config: None)
+    collections_mod._cache_clear("config")
+    collections_mod._cache_clear("ipc")
+
+    shows = [
+        {"tvshowid": 1, "title": "Stargate SG-1"},
+        {"tvshowid": 2, "title": "Stargate Atlantis"},
+        {"tvshowid": 3, "title": "Firefly"},
+    ]
+    calls = []
+
+    def fake_jsonrpc(method, params=None):
+        calls.append(method)
+        if method == "VideoLibrary.GetTVShows":
+            return {"tvshows": list(shows)}
+        if method == "VideoLibrary.GetTVShowDetails":
+            show = next(s for s in shows if s["tvshowid"] == params["tvshowid"])
+            return {"tvshowdetails": show}
+        return {}
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    yield collections_mod, shows, calls
+    collections_mod._cache_clear("config")
+
+
+CONFIG = {
+    "collections": [
+        {"name": "Stargate",
+         "shows": ["Stargate SG-1", "movie:7", "STARGATE ATLANTIS", "movie:x"]},
+        {"name": "Whedon", "shows": ["Firefly", "Dollhouse"]},
+    ],
+    "movie_collections": [
+        {"name": "Alien", "movies": ["Alien", "Aliens"]},
+    ],
+}
+
+
+def _fresh_config():
+    import copy
+    return copy.deepcopy(CONFIG)
+
+
+def test_save_builds_index(store):
+    collections_mod, _shows, _calls = store
+    collections_mod.save_config(_fresh_config())
+    index = collections_mod.load_config()["_index"]
+
+    assert index["tv"]["titles"] == {
+        "stargate sg-1": [0, 0], "stargate atlantis": [0, 2],
+        "firefly": [1, 0], "dollhouse": [1, 1],
+    }
+    assert index["tv"]["counts"] == [4, 2]
+    assert index["movie"]["titles"] == {"alien": [0, 0], "aliens": [0, 1]}
+    assert index["markers"] == {"movie:7": 0}
+    assert index["tvshowids"] == {"1": 0, "2": 0, "3": 1}
+    assert index["unresolved"] == ["dollhouse"]
+
+
+def test_index_is_not_written_into_the_config(store, main):
+    import json
+
+    collections_mod, _shows, _calls = store
+    collections_mod.save_config(_fresh_config())
+    with open(main.CONFIG_PATH) as f:
+        assert "_index" not in json.load(f)
+
+
+def test_stored_index_is_reused_until_the_config_changes(store, main):
+    import json
+
+    collections_mod, _shows, calls = store
+    collections_mod.save_config(_fresh_config())
+    collections_mod._cache_clear("config")
+    calls.clear()
+
+    collections_mod.load_config()
+    assert calls == []
+
+    # Edited elsewhere: the digest no longer matches, so it is rebuilt.
+    config = _fresh_config()
+    config["collections"][1]["shows"].remove("Firefly")
+    with open(main.CONFIG_PATH, "w") as f:
+        json.dump(config, f)
+    collections_mod._cache_clear("config")
+    index = collections_mod.load_config()["_index"]
+    assert "firefly" not in index["tv"]["titles"]
+    assert index["tvshowids"] == {"1": 0, "2": 0}
+
+
+def test_find_collection_for_show_uses_ids(store, main):
+    import tv
+
+    collections_mod, shows, calls = store
+    collections_mod.save_config(_fresh_config())
+    config = collections_mod.load_config()
+    calls.clear()
+
+    assert tv._find_collection_for_show(2, main.jsonrpc, config=config) == 0
+    assert tv._find_collection_for_show(3, main.jsonrpc, config=config) == 1
+    assert calls == []
+    assert tv._collection_level_movie_ids(config=config) == {7}
+
+    # A show added after the index was built may be an unresolved member.
+    shows.append({"tvshowid": 9, "title": "Dollhouse"})
+    assert tv._find_collection_for_show(9, main.jsonrpc, config=config) == 1
+    assert calls == ["VideoLibrary.GetTVShowDetails"]
+
+
+def test_listing_re_resolves_changed_show_ids(store):
+    collections_mod, shows, _calls = store
+    collections_mod.save_config(_fresh_config())
+    config = collections_mod.load_config()
+
+    shows[2] = {"tvshowid": 30, "title": "Firefly"}
+    collections_mod.refresh_show_ids(config, shows)
+    assert config["_index"]["tvshowids"] == {"1": 0, "2": 0, "30": 1}
+    assert collections_mod.load_config()["_index"]["tvshowids"]["30"] == 1
+
+
+def test_cached_config_is_valid_until_its_generation_changes(store, main,
+                                                             monkeypatch):
+    import json
+    import db
+
+    collections_mod, _shows, _calls = store
+    collections_mod.save_config(_fresh_config())
+
+    # Rewritten on disk behind the cache's back: still served from cache.
+    config = _fresh_config()
+    config["collections"][0]["name"] = "SG"
+    with open(main.CONFIG_PATH, "w") as f:
+        json.dump(config, f)
+    assert collections_mod.load_config()["collections"][0]["name"] == "Stargate"
+
+    # A local save in any process bumps the generation...
+    collections_mod.bump_generation("config")
+    assert collections_mod.load_config()["collections"][0]["name"] == "SG"
+
+    # ...and so does a different version stamp on the shared MySQL row.
+    config["collections"][0]["name"] = "Remote"
+    monkeypatch.setattr(db, "db_config_version", lambda: "2026-01-01:42")
+    monkeypatch.setattr(db, "db_load_config", lambda: json.loads(json.dumps(config)))
+    assert collections_mod.load_config()["collections"][0]["name"] == "Remote"
+
+
+def test_saves_look_up_only_new_titles(store, main, monkeypatch):
+    collections_mod, shows, calls = store
+    collections_mod.save_config(_fresh_config())
+    fetched = []
+    fake_jsonrpc = main.jsonrpc
+
+    def recording(method, params=None):
+        if method == "VideoLibrary.GetTVShows":
+            fetched.append(params.get("filter"))
+        return fake_jsonrpc(method, params)
+
+    monkeypatch.setattr(main, "jsonrpc", recording)
+
+    # A reorder keeps every title: resolved ids are reused, and only the
+    # member still missing from the library is asked for, by title.
+    config = collections_mod.load_config()
+    config["collections"][0]["shows"].reverse()
+    collections_mod.save_config(config)
+    assert fetched == [{"field": "title", "operator": "is",
+                        "value": "Dollhouse"}]
+    assert config["_index"]["tvshowids"] == {"1": 0, "2": 0, "3": 1}
+
+    # A new member is looked up by its title alone.
+    fetched.clear()
+    shows.append({"tvshowid": 4, "title": "Angel"})
+    config = collections_mod.load_config()
+    config["collections"][1]["shows"].append("Angel")
+    collections_mod.save_config(config)
+    assert fetched == [{"or": [
+        {"field": "title", "operator": "is", "value": "Dollhouse"},
+        {"field": "title", "operator": "is", "value": "Angel"}]}]
+    assert config["_index"]["tvshowids"]["4"] == 1
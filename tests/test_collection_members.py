@@ -0,0 +1,132 @@
+"""Opening a collection fetches only its members (``_member_lookup``)."""
+
+from __future__ import annotations
+
+import pytest
+
+
+SHOWS = {
+    "Stargate SG-1": 1, "Stargate Atlantis": 2, "Firefly": 3, "Dollhouse": 4,
+}
+MOVIES = {"Alien": 1, "Aliens": 2}
+
+
+@pytest.fixture
+def library(main, monkeypatch):
+    """No service, direct read or snapshot: every read is JSON-RPC."""
+    import collections_mod
+    import db
+    import snapshot
+
+    monkeypatch.setattr(db, "_direct_read_enabled", lambda: False)
+    monkeypatch.setattr(snapshot, "enabled", lambda: False)
+    monkeypatch.setattr(collections_mod, "load_config", lambda: {
+        "collections": [{"name": "Stargate",
+                         "shows": ["Stargate SG-1", "movie:7",
+                                   "Stargate Atlantis"]}],
+        "movie_collections": [],
+    })
+    calls = []
+
+    def fake_jsonrpc(method, params=None):
+        calls.append((method, params))
+        if method == "VideoLibrary.GetTVShows":
+            kind, items = "tvshow", SHOWS
+        elif method == "VideoLibrary.GetMovies":
+            kind, items = "movie", MOVIES
+        else:
+            return {}
+        rule = params.get("filter")
+        if rule is None:
+            wanted = set(items)
+        else:
+            rules = rule.get("or", [rule])
+            wanted = {r["value"] for r in rules}
+        return {kind + "s": [{kind + "id": i, "title": t, "label": t}
+                             for t, i in items.items() if t in wanted]}
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    return calls
+
+
+def _shows_calls(calls):
+    return [p for m, p in calls if m == "VideoLibrary.GetTVShows"]
+
+
+def _movies_calls(calls):
+    return [p for m, p in calls if m == "VideoLibrary.GetMovies"]
+
+
+def test_listing_fetches_members_with_a_title_filter(library, listed):
+    import collections_mod
+
+    collections_mod.list_collection_items(0, "tv")
+    (params,) = _shows_calls(library)
+    assert params["filter"] == {"or": [
+        {"field": "title", "operator": "is", "value": "Stargate SG-1"},
+        {"field": "title", "operator": "is", "value": "Stargate Atlantis"},
+    ]}
+    assert [url.split("tvshowid=")[1] for url, _li, _f in listed()] == [
+        "1", "2"]
+
+
+def test_case_mismatch_falls_back_to_the_library(library, monkeypatch):
+    import collections_mod
+
+    lookup = collections_mod._member_lookup("tv", ["firefly", "Dollhouse"])
+    assert lookup["firefly"]["tvshowid"] == 3
+    assert lookup["dollhouse"]["tvshowid"] == 4
+    assert [("filter" in p) for p in _shows_calls(library)] == [True, False]
+
+
+def test_unresolved_show_skips_the_library_fetch(library, monkeypatch):
+    import collections_mod
+
+    config = {"collections": [{"name": "Whedon",
+                               "shows": ["Firefly", "Angel"]}],
+              "movie_collections": []}
+    index = collections_mod.build_index(config, resolve_shows=False)
+    index["unresolved"] = ["angel"]
+    config[collections_mod._INDEX_KEY] = index
+    monkeypatch.setattr(collections_mod, "load_config", lambda: config)
+
+    lookup = collections_mod._member_lookup("tv", ["Firefly", "Angel"])
+    assert list(lookup) == ["firefly"]
+    assert [("filter" in p) for p in _shows_calls(library)] == [True]
+
+
+def test_missing_movie_costs_one_library_fetch(library, main, monkeypatch,
+                                               tmp_path):
+    import collections_mod
+
+    config = {"collections": [],
+              "movie_collections": [{"name": "Alien",
+                                     "movies": ["Alien", "Alien 3"]}]}
+    monkeypatch.setattr(collections_mod, "load_config", lambda: config)
+    monkeypatch.setattr(main, "CONFIG_DIR", str(tmp_path) + "/")
+
+    for _ in range(3):
+        lookup = collections_mod._member_lookup("movie", ["Alien", "Alien 3"])
+        assert lookup["alien"]["movieid"] == 1
+    calls = _movies_calls(library)
+    assert [("filter" in p) for p in calls] == [True, False, True, True]
+    assert config[collections_mod._INDEX_KEY]["unresolved_movies"] == [
+        "alien 3"]
+
+
+def test_empty_collection_queries_nothing(library):
+    import collections_mod
+
+    assert collections_mod._member_lookup("tv", ["movie:7"]) == {}
+    assert _shows_calls(library) == []
+
+
+def test_library_filter_shapes(main):
+    assert main.library_filter() is None
+    assert main.library_filter(titles=["A"]) == {
+        "field": "title", "operator": "is", "value": "A"}
+    assert main.library_filter(tag="anime", titles=["A", "B"]) == {"and": [
+        {"field": "tag", "operator": "is", "value": "anime"},
+        {"or": [{"field": "title", "operator": "is", "value": "A"},
+                {"field": "title", "operator": "is", "value": "B"}]},
+    ]}
@@ -0,0 +1,212 @@
+"""Direct SQL read path (``db.read_items``).
+
+Listings can be served straight from MyVideos' views.  These tests build a
+tiny SQLite ``MyVideos131.db`` whose views are plain tables with the columns
+the column maps read, and check the rows come back shaped like JSON-RPC —
+and that an unrecognised schema version falls back.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+
+
+def _make_video_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE movie_view (
+            idMovie INTEGER, c00 TEXT, c01 TEXT, c11 TEXT, c14 TEXT,
+            premiered TEXT, rating REAL, playCount INTEGER, lastPlayed TEXT,
+            dateAdded TEXT, strPath TEXT, strFileName TEXT,
+            resumeTimeInSeconds REAL, totalTimeInSeconds REAL);
+        CREATE TABLE episode_view (
+            idEpisode INTEGER, c00 TEXT, c01 TEXT, c04 TEXT, c05 TEXT,
+            c09 TEXT, c10 TEXT, c12 TEXT, c13 TEXT, strTitle TEXT,
+            idShow INTEGER, rating REAL, playCount INTEGER, lastPlayed TEXT,
+            dateAdded TEXT, strPath TEXT, strFileName TEXT,
+            resumeTimeInSeconds REAL, totalTimeInSeconds REAL);
+        CREATE TABLE art (media_id INTEGER, media_type TEXT, type TEXT,
+                          url TEXT);
+        CREATE TABLE tag (tag_id INTEGER, name TEXT);
+        CREATE TABLE tag_link (tag_id INTEGER, media_id INTEGER,
+                               media_type TEXT);
+
+        INSERT INTO movie_view VALUES
+            (1, 'Alien', 'In space.', '7020', 'Horror / Sci-Fi',
+             '1979-05-25', 8.4, 1, '2024-01-01 10:00:00',
+             '2020-01-01 00:00:00', '/m/', 'alien.mkv', NULL, NULL),
+            (2, 'Heat', 'Cops.', '10200', 'Crime', '1995-12-15', 8.3,
+             NULL, NULL, '2020-01-02 00:00:00', '/m/', 'heat.mkv',
+             600, 10200);
+        INSERT INTO episode_view VALUES
+            (10, 'Pilot', 'p', 'W1 / W2', '2001-01-01', '1380', 'D1',
+             '1', '1', 'Show', 5, 7.0, 0, NULL, NULL, '/s/', 'e1.mkv',
+             NULL, NULL),
+            (11, 'Two', 'q', '', '2001-01-08', '1380', '', '1', '2',
+             'Show', 5, 7.1, 1, NULL, NULL, '/s/', 'e2.mkv', NULL, NULL),
+            (12, 'Other', 'r', '', '', '0', '', '2', '1', 'Show', 5, 0,
+             0, NULL, NULL, '/s/', 's2e1.mkv', NULL, NULL);
+        INSERT INTO art VALUES (1, 'movie', 'poster', 'http://p/alien'),
+                               (2, 'movie', 'poster', 'http://p/heat'),
+                               (10, 'episode', 'thumb', 'http://t/10');
+        INSERT INTO tag VALUES (1, 'classic');
+        INSERT INTO tag_link VALUES (1, 1, 'movie');
+    """)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def video_db(main, monkeypatch, tmp_path):
+    import db
+    import xbmcvfs
+
+    def listdir(path):
+        return [], sorted(p.name for p in tmp_path.iterdir())
+
+    monkeypatch.setattr(xbmcvfs, "listdir", listdir, raising=False)
+    monkeypatch.setattr(
+        xbmcvfs, "translatePath",
+        lambda p: str(tmp_path) + "/" if p == "special://database/" else p,
+    )
+    monkeypatch.setattr(db, "_direct_read_enabled", lambda: True)
+    monkeypatch.setattr(db, "get_mysql_settings", lambda: None)
+    monkeypatch.setattr(db, "_local", threading.local())
+    _make_video_db(str(tmp_path / "MyVideos131.db"))
+    yield tmp_path
+    conn = getattr(db._local, "video_sqlite", None)
+    if conn is not None:
+        conn.close()
+
+
+def test_movies_are_shaped_like_jsonrpc(video_db):
+    import db
+
+    rows = db.read_items("movie", [
+        "title", "year", "genre", "runtime", "playcount", "file", "resume",
+        "lastplayed", "art",
+    ])
+    alien, heat = sorted(rows, key=lambda r: r["movieid"])
+    assert alien == {
+        "movieid": 1, "label": "Alien", "title": "Alien", "year": 1979,
+        "genre": ["Horror", "Sci-Fi"], "runtime": 7020, "playcount": 1,
+        "file": "/m/alien.mkv", "resume": {"position": 0.0, "total": 0.0},
+        "lastplayed": "2024-01-01 10:00:00",
+        "art": {"poster": "http://p/alien"},
+    }
+    assert heat["playcount"] == 0
+    assert heat["lastplayed"] == ""
+    assert heat["resume"] == {"position": 600.0, "total": 10200.0}
+
+
+def test_only_requested_columns_are_projected(video_db):
+    import db
+
+    rows = db.read_items("movie", ["title"])
+    assert sorted(rows, key=lambda r: r["movieid"]) == [
+        {"movieid": 1, "label": "Alien", "title": "Alien"},
+        {"movieid": 2, "label": "Heat", "title": "Heat"},
+    ]
+
+
+def test_tag_filter(video_db):
+    import db
+
+    rows = db.read_items("movie", ["title", "tag"], tag="classic")
+    assert rows == [{"movieid": 1, "label": "Alien", "title": "Alien",
+                     "tag": ["classic"]}]
+
+
+@pytest.mark.parametrize("expression, titles", [
+    ("classic AND is:watched", ["Alien"]),
+    ("NOT classic", ["Heat"]),
+    ("is:unwatched OR classic", ["Alien", "Heat"]),
+])
+def test_tag_expression_is_one_where_clause(video_db, expression, titles):
+    import db
+
+    rows = db.read_items("movie", ["title"], tag=expression)
+    assert sorted(r["title"] for r in rows) == titles
+
+
+def test_limits_page_in_view_order(video_db):
+    import db
+
+    assert db.read_items("movie", ["title"], limits=(1, 5)) == [
+        {"movieid": 2, "label": "Heat", "title": "Heat"}]
+    rows = db.read_items("episode", ["season", "episode"], limits=(1, 3),
+                         tvshowid=5)
+    assert [r["episodeid"] for r in rows] == [11, 12]
+
+
+def test_title_pages_follow_the_shared_order(video_db):
+    import db
+    from listing import title_order
+
+    conn = sqlite3.connect(str(video_db / "MyVideos131.db"))
+    conn.executemany(
+        "INSERT INTO movie_view (idMovie, c00) VALUES (?, ?)",
+        [(3, "\u00c1bd"), (4, "\u00e1bc"), (5, "heat")])
+    conn.commit()
+    conn.close()
+
+    rows = db.read_items("movie", ["title"], limits=(0, 10))
+    # SQLite's LOWER() only folds ASCII and would put "Abd" (accented)
+    # first; the page follows listing.title_order, ties broken by id.
+    assert rows == sorted(rows, key=lambda r: title_order(r, "movieid"))
+    assert [r["movieid"] for r in rows] == [1, 2, 5, 4, 3]
+    assert [r["movieid"]
+            for r in db.read_items("movie", ["title"], limits=(2, 4))] == [5, 4]
+
+
+def test_tag_counts(video_db):
+    import db
+
+    assert db.read_tag_counts("movie") == {"classic": 1}
+    assert db.read_tag_counts("tvshow") == {}
+
+
+def test_title_filter(video_db):
+    import db
+
+    rows = db.read_items("movie", ["title"], titles=["Heat", "Nope"])
+    assert rows == [{"movieid": 2, "label": "Heat", "title": "Heat"}]
+
+
+def test_episode_filters(video_db):
+    import db
+
+    rows = db.read_items("episode", ["title", "season", "episode", "writer"],
+                         tvshowid=5, season=1)
+    assert sorted((r["episodeid"], r["episode"], r["writer"]) for r in rows) == [
+        (10, 1, ["W1", "W2"]), (11, 2, []),
+    ]
+
+
+def test_unmapped_property_falls_back(video_db):
+    import db
+
+    assert db.read_items("movie", ["title", "trailer"]) is None
+
+
+def test_unknown_schema_version_falls_back(video_db, monkeypatch):
+    import db
+
+    (video_db / "MyVideos131.db").rename(video_db / "MyVideos999.db")
+    assert db.read_items("movie", ["title"]) is None
+
+
+def test_list_episodes_uses_direct_path(video_db, main, monkeypatch, listed):
+    import tv
+
+    def no_jsonrpc(method, params=None):
+        assert method != "VideoLibrary.GetEpisodes"
+        return {}
+
+    monkeypatch.setattr(main, "jsonrpc", no_jsonrpc)
+    monkeypatch.setattr(main, "_select_first_unwatched", lambda *_a: None)
+    tv.list_episodes(5, 1)
+    assert len(listed()) == 2
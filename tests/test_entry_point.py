@@ -0,0 +1,73 @@
+"""Plugin entry point: ``main.py`` is executed once per invocation.
+
+Each cold start simulates a fresh Kodi plugin process: every addon module is
+dropped from ``sys.modules`` and the entry script is run as ``__main__``.
+"""
+
+from __future__ import annotations
+
+import os
+import runpy
+import sys
+
+import pytest
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+_ADDON_MODULES = ("main", "cache", "listing", "memo", "reorder", "sync_queue",
+                  "collections_mod", "tv", "movies", "db", "ipc", "snapshot",
+                  "library_state", "library_model", "tag_query",
+                  "widgets", "next_up")
+
+
+@pytest.fixture
+def cold_start(monkeypatch):
+    """Return ``run(script, run_name)`` -> module-level executions of main.py."""
+    import xbmcaddon
+
+    executions = []
+    real_addon = xbmcaddon.Addon
+
+    def counting_addon(*args, **kwargs):
+        caller = sys._getframe(1)
+        if (caller.f_code.co_name == "<module>"
+                and caller.f_code.co_filename.endswith("main.py")):
+            executions.append(caller.f_globals["__name__"])
+        return real_addon(*args, **kwargs)
+
+    monkeypatch.setattr(xbmcaddon, "Addon", counting_addon)
+    monkeypatch.setattr(sys, "argv", [
+        "plugin://plugin.video.watchorder/", "0", "?action=none"])
+    for name in _ADDON_MODULES:
+        if name in sys.modules:
+            monkeypatch.delitem(sys.modules, name)
+
+    def run(script, run_name="__main__"):
+        for name in _ADDON_MODULES:
+            sys.modules.pop(name, None)
+        del executions[:]
+        runpy.run_path(os.path.join(ROOT, script), run_name=run_name)
+        return list(executions)
+
+    yield run
+    for name in _ADDON_MODULES:
+        sys.modules.pop(name, None)
+
+
+def test_plugin_entry_executes_main_once(cold_start):
+    assert cold_start("plugin.py") == ["main"]
+
+
+def test_running_main_directly_does_not_reimport_it(cold_start):
+    assert cold_start("main.py") == ["__main__"]
+    import main  # noqa: F401  pylint: disable=import-outside-toplevel
+    assert main.__name__ == "__main__"
+
+
+def test_cold_start_loads_only_what_the_router_needs(cold_start):
+    """The shim adds no imports of its own: a cold start through
+    ``plugin.py`` loads ``main`` (once, see above) and the modules its
+    router always needs, and none of the listing machinery."""
+    cold_start("plugin.py")
+    loaded = {name for name in _ADDON_MODULES if name in sys.modules}
+    assert loaded == {"main", "cache", "memo", "reorder"}
@@ -0,0 +1,49 @@
+"""``ensure_forced_views`` probes the skin once per skin, not per navigation."""
+
+from __future__ import annotations
+
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def probes(main, monkeypatch):
+    """Count skin-string probes; start with no skin recorded."""
+    import xbmc
+    import xbmcgui
+
+    calls = []
+    monkeypatch.setattr(xbmc, "getInfoLabel",
+                        lambda label: calls.append(label) or "")
+    xbmcgui.Window(10000).clearProperty(main._FORCED_VIEWS_PROPERTY)
+    yield calls
+    xbmcgui.Window(10000).clearProperty(main._FORCED_VIEWS_PROPERTY)
+
+
+def test_first_navigation_probes_the_skin(main, probes):
+    main.ensure_forced_views()
+    assert "Skin.String(Skin.ForcedView.seasons)" in probes
+
+
+def test_later_invocations_skip_the_probes(main, probes):
+    main.ensure_forced_views()
+    del probes[:]
+
+    importlib.reload(main)  # a new plugin process
+    main.ensure_forced_views()
+    assert probes == []
+
+
+def test_skin_change_probes_again(main, probes, monkeypatch):
+    import xbmc
+
+    main.ensure_forced_views()
+    del probes[:]
+
+    monkeypatch.setattr(xbmc, "getSkinDir", lambda: "skin.arctic.horizon")
+    main.ensure_forced_views()
+    checked = len(probes)
+    assert checked
+    main.ensure_forced_views()
+    assert len(probes) == checked
@@ -0,0 +1,124 @@
+"""Cold-start import profile per plugin route.
+
+Each route runs in a fresh interpreter under ``python -X importtime`` (with
+the Kodi fakes from ``conftest``), and the addon modules it loads must stay
+within that route's budget.  Playback and watched-state routes are the
+hottest paths — Kodi invokes them from every widget and context menu — and
+must not pay for the config, MySQL, IPC or snapshot machinery.
+
+Run with ``pytest -s`` to see the per-route report.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+TESTS = os.path.join(ROOT, "tests")
+ADDON_MODULES = sorted(
+    name[:-3] for name in os.listdir(ROOT)
+    if name.endswith(".py") and name != "plugin.py"
+)
+
+_BASE = {"main", "memo", "cache", "reorder"}
+_LISTING = _BASE | {"collections_mod", "db", "ipc", "listing", "tv"}
+
+ROUTES = {
+    "root": ("", _BASE | {"sync_queue"}),
+    "root_tv": ("?action=root_tv", _LISTING | {"snapshot", "sync_queue"}),
+    "seasons": ("?action=seasons&tvshowid=1", _LISTING),
+    "episodes": ("?action=episodes&tvshowid=1&season=1",
+                 _BASE | {"db", "listing", "tv"}),
+    # ``listing`` holds the views whose properties tv/movies fetch.
+    "play": ("?action=play&episodeid=1", _BASE | {"listing", "tv"}),
+    "play_movie": ("?action=play_movie&movieid=1",
+                   _BASE | {"listing", "movies"}),
+    "set_watched": ("?action=set_watched&media=episode&id=1&playcount=1",
+                    _BASE | {"snapshot"}),
+    # Widgets refresh with the home screen: no config, MySQL or video DB.
+    "widget_recent": ("?action=widget_recent&media=movie",
+                      _BASE | {"ipc", "listing", "snapshot", "widgets"}),
+    "widget_next_up": ("?action=widget_next_up",
+                       _BASE | {"ipc", "listing", "snapshot", "tv",
+                                "widgets"}),
+}
+
+# Standard library modules the lean routes must not load.
+_HEAVY = {"sqlite3", "hashlib", "socketserver", "xml.etree.ElementTree"}
+_LEAN_ROUTES = ("play", "play_movie", "set_watched")
+
+_MARKER = "--- watchorder route: "
+
+_BOOTSTRAP = r"""
+import runpy, sys
+sys.path[:0] = [{root!r}, {tests!r}]
+import conftest  # Kodi fakes; also imports main, dropped again below
+for name, query in {routes!r}:
+    for module in {modules!r}:
+        sys.modules.pop(module, None)
+    sys.argv = ["plugin://plugin.video.watchorder/", "0", query]
+    sys.stderr.write({marker!r} + name + "\n")
+    sys.stderr.flush()
+    runpy.run_path({plugin!r}, run_name="__main__")
+"""
+
+
+def _parse(stderr):
+    """Return ``{route: [(module, self_us, cumulative_us), ...]}``."""
+    profile, current = {}, None
+    for line in stderr.splitlines():
+        if line.startswith(_MARKER):
+            current = profile.setdefault(line[len(_MARKER):], [])
+        elif current is not None and line.startswith("import time:"):
+            fields = line[len("import time:"):].split("|")
+            try:
+                self_us, cumulative = int(fields[0]), int(fields[1])
+            except ValueError:
+                continue  # column header
+            current.append((fields[2].strip(), self_us, cumulative))
+    return profile
+
+
+@pytest.fixture(scope="module")
+def profile(tmp_path_factory):
+    code = _BOOTSTRAP.format(
+        root=ROOT, tests=TESTS, modules=ADDON_MODULES, marker=_MARKER,
+        plugin=os.path.join(ROOT, "plugin.py"),
+        routes=[(name, query) for name, (query, _b) in ROUTES.items()],
+    )
+    # The fake translatePath leaves special:// paths as they are, so the
+    # routes' config writes land relative to the child's working directory.
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(tmp_path_factory.mktemp("profile")),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return _parse(proc.stderr)
+
+
+@pytest.mark.parametrize("route", sorted(ROUTES))
+def test_route_stays_within_module_budget(profile, route):
+    imports = profile[route]
+    addon = {name for name, _s, _c in imports if name in ADDON_MODULES}
+    total = sum(self_us for _n, self_us, _c in imports)
+    print("\n{}: {} modules, {:.1f} ms".format(route, len(imports),
+                                              total / 1000.0))
+    for name, self_us, cumulative in imports:
+        if name in ADDON_MODULES:
+            print("  {:<16} self {:>6} us  cumulative {:>6} us".format(
+                name, self_us, cumulative))
+
+    assert "main" in addon
+    assert addon <= ROUTES[route][1], sorted(addon - ROUTES[route][1])
+
+
+@pytest.mark.parametrize("route", _LEAN_ROUTES)
+def test_lean_routes_skip_heavy_stdlib(profile, route):
+    loaded = {name for name, _s, _c in profile[route]}
+    assert not loaded & _HEAVY, sorted(loaded & _HEAVY)
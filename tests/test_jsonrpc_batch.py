@@ -0,0 +1,105 @@
+"""Tests for :func:`main.jsonrpc_batch` and the call sites that use it.
+
+Linked-movie lookups used to cost one ``GetMovieDetails`` round trip per
+movie.  The batch API sends them as a single JSON-RPC 2.0 request array and
+demultiplexes the responses by id.
+"""
+
+from __future__ import annotations
+
+import json
+
+
+def _fake_executor(monkeypatch, responder):
+    """Route ``xbmc.executeJSONRPC`` through ``responder(batch) -> responses``."""
+    import xbmc
+
+    sent = []
+
+    def execute(payload):
+        batch = json.loads(payload)
+        sent.append(batch)
+        return json.dumps(responder(batch))
+
+    monkeypatch.setattr(xbmc, "executeJSONRPC", execute)
+    return sent
+
+
+def test_results_line_up_with_calls_even_when_responses_are_reordered(
+        main, monkeypatch):
+    def responder(batch):
+        return [{"id": r["id"], "jsonrpc": "2.0",
+                 "result": {"echo": r["params"]["movieid"]}}
+                for r in reversed(batch)]
+
+    sent = _fake_executor(monkeypatch, responder)
+    results = main.jsonrpc_batch([
+        ("VideoLibrary.GetMovieDetails", {"movieid": 7}),
+        ("VideoLibrary.GetMovieDetails", {"movieid": 8}),
+        ("VideoLibrary.GetMovieDetails", {"movieid": 9}),
+    ])
+
+    assert len(sent) == 1
+    assert [r["method"] for r in sent[0]] == ["VideoLibrary.GetMovieDetails"] * 3
+    assert results == [{"echo": 7}, {"echo": 8}, {"echo": 9}]
+
+
+def test_per_entry_errors_do_not_affect_other_entries(main, monkeypatch):
+    def responder(batch):
+        return [
+            {"id": 0, "jsonrpc": "2.0", "result": {"ok": True}},
+            {"id": 1, "jsonrpc": "2.0",
+             "error": {"code": -32602, "message": "Invalid params."}},
+        ]
+
+    _fake_executor(monkeypatch, responder)
+    results = main.jsonrpc_batch([
+        ("VideoLibrary.GetMovieDetails", {"movieid": 1}),
+        ("VideoLibrary.GetMovieDetails", {"movieid": 2}),
+    ])
+    assert results == [{"ok": True}, None]
+
+    errors = {}
+    main.jsonrpc_batch([
+        ("VideoLibrary.GetMovieDetails", {"movieid": 1}),
+        ("VideoLibrary.GetMovieDetails", {"movieid": 2}),
+    ], errors=errors)
+    assert list(errors) == [1]
+
+
+def test_unparseable_batch_returns_all_none(main, monkeypatch):
+    import xbmc
+
+    monkeypatch.setattr(xbmc, "executeJSONRPC", lambda _payload: "not json")
+    errors = {}
+    assert main.jsonrpc_batch([("A", None), ("B", None)],
+                              errors=errors) == [None, None]
+    assert errors == {}
+
+
+def test_empty_batch_makes_no_round_trip(main, monkeypatch):
+    sent = _fake_executor(monkeypatch, lambda batch: [])
+    assert main.jsonrpc_batch([]) == []
+    assert sent == []
+
+
+def test_linked_movies_cost_one_round_trip(main, monkeypatch):
+    import db
+    import tv
+
+    monkeypatch.setattr(db, "get_linked_movie_ids",
+                        lambda _tvshowid: list(range(1, 13)))
+
+    def responder(batch):
+        return [{"id": r["id"], "jsonrpc": "2.0", "result": {"moviedetails": {
+            "movieid": r["params"]["movieid"],
+            "title": "Movie {}".format(r["params"]["movieid"]),
+        }}} for r in batch]
+
+    sent = _fake_executor(monkeypatch, responder)
+    config = {"collections": [{"name": "C", "shows": ["Show", "movie:5"]}]}
+    details = tv._fetch_linked_movies(42, config=config)
+
+    assert len(sent) == 1
+    # The collection-level movie is excluded; the rest keep linked order.
+    assert list(details) == [1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12]
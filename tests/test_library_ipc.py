@@ -0,0 +1,139 @@
+"""Service-hosted ``LibraryModel`` and the loopback IPC the plugin queries it by.
+
+The plugin must get its rows from the service when it is reachable and fall
+back to its own JSON-RPC path when it is not.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def clean_ipc(main):
+    import ipc
+    from collections_mod import _cache_clear
+
+    _cache_clear("library.state")
+    import xbmcgui
+    xbmcgui.Window(10000).clearProperty(ipc._PROPERTY)
+    yield ipc
+    xbmcgui.Window(10000).clearProperty(ipc._PROPERTY)
+
+
+@pytest.fixture
+def server(clean_ipc, monkeypatch):
+    """Run a real loopback server around a model we control."""
+    ipc = clean_ipc
+
+    class FakeModel:
+        def shows(self, tag=None, properties=()):
+            return [{"tvshowid": 1, "title": "Served", "tag": tag,
+                     "props": list(properties)}]
+
+    srv = ipc.LibraryServer(FakeModel())
+    srv.start()
+    # The test process is also the client; let it query its own server.
+    monkeypatch.setattr(ipc, "_serving", False)
+    yield srv
+    srv.stop()
+
+
+def test_plugin_reads_listing_from_service(server, main, monkeypatch):
+    import tv
+
+    def no_jsonrpc(*_a, **_k):
+        raise AssertionError("should have been served over IPC")
+
+    monkeypatch.setattr(main, "jsonrpc", no_jsonrpc)
+    rows = tv.get_library_shows(tag="anime", properties=["title"])
+    assert rows == [{"tvshowid": 1, "title": "Served", "tag": "anime",
+                     "props": ["title"]}]
+
+
+def test_wrong_token_is_refused(server, clean_ipc):
+    import json
+    import xbmcgui
+
+    win = xbmcgui.Window(10000)
+    endpoint = json.loads(win.getProperty(clean_ipc._PROPERTY))
+    endpoint["token"] = "nope"
+    win.setProperty(clean_ipc._PROPERTY, json.dumps(endpoint))
+    assert clean_ipc.query("shows", properties=["title"]) is None
+
+
+def test_unknown_query_is_rejected(server, clean_ipc):
+    assert clean_ipc.query("__init__") is None
+
+
+def test_falls_back_to_jsonrpc_without_service(clean_ipc, main, monkeypatch):
+    import tv
+
+    calls = []
+
+    def fake(method, params=None):
+        calls.append(method)
+        return {"tvshows": [{"tvshowid": 2, "title": "Direct"}]}
+
+    monkeypatch.setattr(main, "jsonrpc", fake)
+    assert tv.get_library_shows(properties=["title"]) == [
+        {"tvshowid": 2, "title": "Direct"}]
+    assert calls == ["VideoLibrary.GetTVShows"]
+
+
+def test_model_serves_from_memory_until_the_library_changes(
+        clean_ipc, main, monkeypatch):
+    import library_model
+    import library_state
+    import tv
+
+    fetches = []
+
+    def fake_query(tag, properties):
+        fetches.append(tag)
+        return [
+            {"tvshowid": 2, "title": "b show", "tag": ["Anime"], "plot": "x"},
+            {"tvshowid": 1, "title": "A Show", "tag": [], "plot": "y"},
+        ]
+
+    monkeypatch.setattr(tv, "_query_library_shows", fake_query)
+    library_state.start_session()
+    model = library_model.LibraryModel()
+
+    assert [r["title"] for r in model.shows(properties=["title"])] == [
+        "A Show", "b show"]
+    assert model.shows(tag="anime", properties=["title"]) == [
+        {"tvshowid": 2, "title": "b show"}]
+    assert model.shows(tag="NOT anime", properties=["title"]) == [
+        {"tvshowid": 1, "title": "A Show"}]
+    assert len(fetches) == 1
+
+    library_state.record({"movie": [5]})
+    model.shows(properties=["title"])
+    assert len(fetches) == 1
+
+    library_state.record({"tvshow": [1]})
+    model.shows(properties=["title"])
+    assert len(fetches) == 2
+
+
+def test_model_drops_only_the_changed_shows_seasons(clean_ipc, main,
+                                                    monkeypatch):
+    import library_model
+    import library_state
+
+    fetched = []
+
+    def fake(method, params=None):
+        fetched.append(params["tvshowid"])
+        return {"seasons": [{"season": 1}]}
+
+    monkeypatch.setattr(main, "jsonrpc", fake)
+    library_state.start_session()
+    model = library_model.LibraryModel()
+    model.seasons(10)
+    model.seasons(20)
+    library_state.record({"episode": [99], "tvshow": [10]})
+    model.seasons(10)
+    model.seasons(20)
+    assert fetched == [10, 20, 10]
@@ -0,0 +1,299 @@
+"""On-disk library snapshot (``snapshot.py``).
+
+Listings are served from an indexed SQLite file under ``CONFIG_DIR``.  These
+tests pin the refresh rules: a full build the first time, nothing at all while
+the check is fresh, only changed rows after the kind is marked stale, and a
+rebuild when the schema version changes.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def library(main, monkeypatch, tmp_path):
+    """Enable the snapshot against a fake movie library held in a dict."""
+    import snapshot
+    from collections_mod import _cache_clear
+
+    monkeypatch.setattr(main, "CONFIG_DIR", str(tmp_path) + "/")
+    monkeypatch.setattr(main.ADDON, "getSetting",
+                        lambda key: "true" if key == "library_snapshot" else "")
+    monkeypatch.setattr(snapshot, "_local", threading.local())
+    _cache_clear("snapshot.checked.movie")
+    _cache_clear("snapshot.checked.tvshow")
+    # No background service unless a test starts one.
+    _cache_clear("library.state")
+
+    movies = {
+        1: {"movieid": 1, "label": "Alien", "title": "Alien", "year": 1979,
+            "playcount": 0, "tag": ["Horror"], "plot": "In space."},
+        2: {"movieid": 2, "label": "Heat", "title": "Heat", "year": 1995,
+            "playcount": 1, "tag": [], "plot": "Cops."},
+        3: {"movieid": 3, "label": "Brazil", "title": "Brazil", "year": 1985,
+            "playcount": 0, "tag": ["horror", "Satire"], "plot": "Ducts."},
+    }
+    calls = []
+
+    def project(movie, properties):
+        keep = set(properties) | {"movieid", "label"}
+        return {k: v for k, v in movie.items() if k in keep}
+
+    def fake_jsonrpc(method, params=None):
+        calls.append((method, params))
+        assert method == "VideoLibrary.GetMovies"
+        return {"movies": [project(m, params["properties"])
+                           for m in movies.values()]}
+
+    def fake_batch(batch, errors=None):
+        batch = list(batch)
+        calls.append(("batch", [p["movieid"] for (_m, p) in batch]))
+        results = []
+        for n, (_m, p) in enumerate(batch):
+            if p["movieid"] in movies:
+                results.append({"moviedetails": project(movies[p["movieid"]],
+                                                        p["properties"])})
+                continue
+            results.append(None)
+            if errors is not None:
+                errors[n] = {"code": -32602, "message": "Invalid params."}
+        return results
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    monkeypatch.setattr(main, "jsonrpc_batch", fake_batch)
+    yield movies, calls
+    conn = getattr(snapshot._local, "connection", None)
+    if conn is not None:
+        conn.close()
+
+
+def test_first_listing_builds_then_serves_locally(library):
+    import movies as movies_mod
+
+    _movies, calls = library
+    rows = movies_mod.get_library_movies(properties=["title", "year"])
+    assert [r["title"] for r in rows] == ["Alien", "Brazil", "Heat"]
+    assert len(calls) == 1
+
+    calls.clear()
+    rows = movies_mod.get_library_movies(properties=["title", "year"])
+    assert len(rows) == 3
+    assert calls == []
+
+
+def test_rows_are_projected_and_tag_filter_ignores_case(library):
+    import movies as movies_mod
+
+    rows = movies_mod.get_library_movies(tag="HORROR", properties=["title"])
+    assert rows == [
+        {"movieid": 1, "label": "Alien", "title": "Alien"},
+        {"movieid": 3, "label": "Brazil", "title": "Brazil"},
+    ]
+
+
+def test_title_filter_uses_the_title_index(library):
+    import movies as movies_mod
+
+    rows = movies_mod.get_library_movies(properties=["title"],
+                                         titles=["heat", "Brazil", "Nope"])
+    assert [r["title"] for r in rows] == ["Brazil", "Heat"]
+
+
+def test_tag_expression_filters_in_sqlite(library):
+    import movies as movies_mod
+
+    def titles(expression):
+        rows = movies_mod.get_library_movies(tag=expression,
+                                             properties=["title"])
+        return [r["title"] for r in rows]
+
+    assert titles("horror AND is:unwatched") == ["Alien", "Brazil"]
+    assert titles("Satire OR NOT horror") == ["Brazil", "Heat"]
+    assert titles("is:watched") == ["Heat"]
+
+
+def test_limits_page_in_title_order(library):
+    import movies as movies_mod
+
+    rows = movies_mod.get_library_movies(properties=["title"], limits=(1, 2))
+    assert [r["title"] for r in rows] == ["Brazil"]
+
+
+def test_tag_counts_fold_case(library):
+    import snapshot
+
+    counts = snapshot.get_tag_counts("movie")
+    assert {k.lower(): v for k, v in counts.items()} == {
+        "horror": 2, "satire": 1}
+
+
+def test_stale_refresh_refetches_only_changed_rows(library):
+    import movies as movies_mod
+    import snapshot
+
+    movies, calls = library
+    movies_mod.get_library_movies(properties=["title", "playcount"])
+
+    movies[1]["playcount"] = 1
+    del movies[2]
+    movies[4] = {"movieid": 4, "label": "Ran", "title": "Ran", "playcount": 0,
+                 "tag": []}
+    snapshot.mark_stale("movie")
+    calls.clear()
+
+    rows = movies_mod.get_library_movies(properties=["title", "playcount"])
+    assert {r["title"]: r["playcount"] for r in rows} == {
+        "Alien": 1, "Brazil": 0, "Ran": 0,
+    }
+    # One fingerprint probe, then one batch with just the two changed rows.
+    assert calls[0][0] == "VideoLibrary.GetMovies"
+    assert "plot" not in calls[0][1]["properties"]
+    assert sorted(calls[1][1]) == [1, 4]
+    assert len(calls) == 2
+
+
+def test_tag_edit_is_seen_by_the_fingerprint(library):
+    import movies as movies_mod
+    import snapshot
+
+    movies, calls = library
+    movies_mod.get_library_movies(properties=["title"])
+
+    movies[2]["tag"] = ["Crime"]
+    snapshot.mark_stale("movie")
+    calls.clear()
+    rows = movies_mod.get_library_movies(properties=["title"], tag="crime")
+    assert [r["title"] for r in rows] == ["Heat"]
+    assert calls[1] == ("batch", [2])
+
+
+def test_full_rebuild_after_rebuild_ttl(library, monkeypatch):
+    import movies as movies_mod
+    import snapshot
+
+    movies, calls = library
+    movies_mod.get_library_movies(properties=["title"])
+
+    movies[1]["plot"] = "Still in space."
+    real_time = snapshot.time.time
+    monkeypatch.setattr(snapshot.time, "time",
+                        lambda: real_time() + snapshot._REBUILD_TTL)
+    calls.clear()
+    rows = movies_mod.get_library_movies(properties=["title", "plot"])
+    assert len(calls) == 1
+    assert "plot" in calls[0][1]["properties"]
+    assert {r["title"]: r["plot"] for r in rows}["Alien"] == "Still in space."
+
+
+def test_schema_version_change_forces_full_rebuild(library, monkeypatch):
+    import movies as movies_mod
+    import snapshot
+
+    _movies, calls = library
+    movies_mod.get_library_movies(properties=["title"])
+    snapshot._local.connection.close()
+    monkeypatch.setattr(snapshot, "_local", threading.local())
+    monkeypatch.setattr(snapshot, "SCHEMA_VERSION", snapshot.SCHEMA_VERSION + 1)
+    calls.clear()
+
+    movies_mod.get_library_movies(properties=["title"])
+    assert len(calls) == 1
+    assert "plot" in calls[0][1]["properties"]
+
+
+def test_unknown_property_falls_back_to_jsonrpc(library):
+    import snapshot
+
+    assert snapshot.get_rows("movie", ["title", "director"]) is None
+
+
+def test_disabled_snapshot_is_bypassed(library, main, monkeypatch):
+    import snapshot
+
+    monkeypatch.setattr(main.ADDON, "getSetting", lambda _key: "false")
+    assert snapshot.get_rows("movie", ["title"]) is None
+
+
+def test_service_change_log_refetches_exact_rows(library):
+    import library_state
+    import movies as movies_mod
+
+    movies, calls = library
+    library_state.start_session()
+    movies_mod.get_library_movies(properties=["title", "playcount"])
+
+    # With the service running nothing expires on a timer...
+    calls.clear()
+    movies_mod.get_library_movies(properties=["title", "playcount"])
+    assert calls == []
+
+    # ...and a notification for one movie re-fetches just that row.
+    movies[3]["playcount"] = 2
+    library_state.record({"movie": [3]})
+    rows = movies_mod.get_library_movies(properties=["title", "playcount"])
+    assert calls == [("batch", [3])]
+    assert {r["title"]: r["playcount"] for r in rows}["Brazil"] == 2
+
+
+def test_change_log_with_only_a_removal(library):
+    import library_state
+    import movies as movies_mod
+
+    movies, calls = library
+    library_state.start_session()
+    movies_mod.get_library_movies(properties=["title"])
+
+    del movies[2]
+    library_state.record({"movie": [2]})
+    calls.clear()
+    rows = movies_mod.get_library_movies(properties=["title"])
+    assert calls == [("batch", [2])]
+    assert sorted(r["title"] for r in rows) == ["Alien", "Brazil"]
+
+    # The token moved on: the removal isn't fetched again.
+    calls.clear()
+    movies_mod.get_library_movies(properties=["title"])
+    assert calls == []
+
+
+def test_failed_refetch_keeps_the_token(library, main, monkeypatch):
+    import library_state
+    import movies as movies_mod
+
+    movies, calls = library
+    library_state.start_session()
+    movies_mod.get_library_movies(properties=["title"])
+
+    movies[3]["title"] = "Brazil (1985)"
+    library_state.record({"movie": [3]})
+    working_batch = main.jsonrpc_batch
+    monkeypatch.setattr(main, "jsonrpc_batch",
+                        lambda batch, errors=None: [None] * len(list(batch)))
+    calls.clear()
+    movies_mod.get_library_movies(properties=["title"])
+    # The snapshot can't answer, so the listing asks Kodi directly...
+    assert [m for m, _p in calls] == ["VideoLibrary.GetMovies"]
+
+    # ...and the change is still pending once the batch works again.
+    monkeypatch.setattr(main, "jsonrpc_batch", working_batch)
+    calls.clear()
+    rows = movies_mod.get_library_movies(properties=["title"])
+    assert calls == [("batch", [3])]
+    assert "Brazil (1985)" in {r["title"] for r in rows}
+
+
+def test_each_thread_reads_through_its_own_connection(library):
+    import snapshot
+
+    assert len(snapshot.get_rows("movie", ["title"])) == 3
+    result = []
+    worker = threading.Thread(
+        target=lambda: result.append(snapshot.get_rows("movie", ["title"])))
+    worker.start()
+    worker.join()
+    # A shared sqlite3 connection would raise on the second thread and the
+    # snapshot would answer None.
+    assert len(result[0]) == 3
@@ -0,0 +1,108 @@
+"""Library change log (``library_state``) and the service's ``LibraryMonitor``.
+
+The service turns ``VideoLibrary.*`` notifications into a generation counter
+plus precise per-id invalidations; plugin caches ask what changed since the
+token they were built at.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def state(main):
+    import library_state
+
+    library_state.start_session()
+    return library_state
+
+
+def test_no_service_means_no_token(main):
+    import library_state
+    from collections_mod import _cache_clear
+
+    _cache_clear("library.state")
+    assert library_state.current() is None
+    assert library_state.changes_since(["x", 0]) is None
+
+
+def test_changes_since_returns_only_newer_ids(state):
+    state.record({"movie": [1]})
+    token = state.current()
+    state.record({"movie": [2], "tvshow": [7]})
+    state.record({"movie": [3]})
+
+    assert state.changes_since(token) == {"movie": {2, 3}, "tvshow": {7}}
+    assert state.changes_since(state.current()) == {}
+
+
+def test_wildcard_marks_whole_kind(state):
+    token = state.current()
+    state.record({"tvshow": [4]})
+    state.record({"tvshow": None})
+    state.record({"tvshow": [5]})
+    assert state.changes_since(token) == {"tvshow": None}
+
+
+def test_tokens_from_other_sessions_or_before_a_scan_need_full_refresh(state):
+    token = state.current()
+    state.record_full()
+    assert state.changes_since(token) is None
+
+    token = state.current()
+    state.start_session()
+    assert state.changes_since(token) is None
+
+
+def test_log_is_bounded(state, monkeypatch):
+    monkeypatch.setattr(state, "_MAX_CHANGES", 5)
+    token = state.current()
+    state.record({"movie": [1, 2, 3]})
+    recent = state.current()
+    state.record({"movie": [4, 5, 6]})
+    # The first change set fell out of the window.
+    assert state.changes_since(token) is None
+    assert state.changes_since(recent) == {"movie": {4, 5, 6}}
+
+
+def test_monitor_records_movie_update(state):
+    monitor = state.LibraryMonitor()
+    token = state.current()
+    monitor.onNotification("xbmc", "VideoLibrary.OnUpdate", json.dumps(
+        {"item": {"id": 12, "type": "movie"}, "playcount": 1}))
+    assert state.changes_since(token) == {"movie": {12}}
+
+
+def test_monitor_maps_episode_update_to_its_show(state, main, monkeypatch):
+    monkeypatch.setattr(main, "jsonrpc", lambda method, params=None: {
+        "episodedetails": {"episodeid": params["episodeid"], "tvshowid": 9}})
+    monitor = state.LibraryMonitor()
+    token = state.current()
+    monitor.onNotification("xbmc", "VideoLibrary.OnUpdate", json.dumps(
+        {"item": {"id": 301, "type": "episode"}, "playcount": 1}))
+    assert state.changes_since(token) == {"episode": {301}, "tvshow": {9}}
+
+
+def test_monitor_removed_episode_invalidates_all_shows(state):
+    monitor = state.LibraryMonitor()
+    token = state.current()
+    monitor.onNotification("xbmc", "VideoLibrary.OnRemove",
+                           json.dumps({"id": 301, "type": "episode"}))
+    assert state.changes_since(token) == {"episode": {301}, "tvshow": None}
+
+
+def test_monitor_scan_finished_is_a_full_invalidation(state):
+    monitor = state.LibraryMonitor()
+    token = state.current()
+    monitor.onNotification("xbmc", "VideoLibrary.OnScanFinished", "null")
+    assert state.changes_since(token) is None
+
+
+def test_monitor_ignores_unrelated_notifications(state):
+    monitor = state.LibraryMonitor()
+    before = state.current()
+    monitor.onNotification("xbmc", "Player.OnPlay", "{}")
+    assert state.current() == before
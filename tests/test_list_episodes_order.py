@@ -12,20 +12,18 @@ from __future__ import annotations
 from urllib.parse import urlparse, parse_qs
 
 
-def _episode_id_order_from_calls(add_calls):
-    """Pull the episodeid out of each addDirectoryItem URL, in call order."""
+def _episode_id_order_from_rows(rows):
+    """Pull the episodeid out of each listed row's URL, in listing order."""
     ids = []
-    for call in add_calls:
-        url = call[0][1]
+    for url, _li, _is_folder in rows:
         q = parse_qs(urlparse(url).query)
         if q.get("action", [""])[0] == "play" and "episodeid" in q:
             ids.append(int(q["episodeid"][0]))
     return ids
 
 
-def test_episodes_sorted_by_episode_not_episodeid(main, monkeypatch):
+def test_episodes_sorted_by_episode_not_episodeid(main, monkeypatch, listed):
     import tv
-    import xbmcplugin
 
     # Episode 5 has a much higher episodeid (as if rescraped) and is returned
     # out of position by the library.
@@ -45,9 +43,8 @@ def test_episodes_sorted_by_episode_not_episodeid(main, monkeypatch):
     monkeypatch.setattr(main, "_select_first_unwatched", lambda *_a, **_k: None,
                         raising=False)
 
-    xbmcplugin.addDirectoryItem.reset_mock()
     tv.list_episodes(899, 1)
 
-    ids = _episode_id_order_from_calls(xbmcplugin.addDirectoryItem.call_args_list)
+    ids = _episode_id_order_from_rows(listed())
     # The high-id episode 5 (999) must appear in 5th position, not last.
     assert ids == [101, 102, 103, 104, 999, 106]
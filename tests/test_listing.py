@@ -0,0 +1,110 @@
+"""Bulk directory emission (``listing.Directory``)."""
+
+from __future__ import annotations
+
+import pytest
+
+
+def _movies(count):
+    return [{"movieid": i, "title": "Movie {:05d}".format(i), "file": "",
+             "playcount": 0} for i in range(count)]
+
+
+def test_rows_are_submitted_in_chunks_with_the_total(main):
+    import xbmcplugin
+    from listing import Directory
+
+    xbmcplugin.addDirectoryItems.reset_mock()
+    directory = Directory(7, chunk_size=4)
+    for i in range(10):
+        directory.add("plugin://x/?i={}".format(i), object(), i % 2 == 0)
+    directory.flush()
+
+    calls = xbmcplugin.addDirectoryItems.call_args_list
+    assert [len(c.args[1]) for c in calls] == [4, 4, 2]
+    assert {(c.args[0], c.args[2]) for c in calls} == {(7, 10)}
+    assert calls[0].args[1][0][2] is True
+    assert len(directory) == 0
+
+
+def test_empty_directory_submits_nothing(main):
+    import xbmcplugin
+    from listing import Directory
+
+    xbmcplugin.addDirectoryItems.reset_mock()
+    Directory(1).flush()
+    assert not xbmcplugin.addDirectoryItems.called
+
+
+def test_movie_listing_is_one_bulk_submission(main, monkeypatch, listed):
+    import collections_mod
+    import movies
+    import xbmcplugin
+
+    monkeypatch.setattr(movies, "get_library_movies",
+                        lambda tag=None, properties=None: _movies(1200))
+    monkeypatch.setattr(collections_mod, "load_config",
+                        lambda: {"collections": [], "movie_collections": []})
+    xbmcplugin.addDirectoryItem.reset_mock()
+    movies.list_movies()
+
+    assert len(listed()) == 1200
+    assert not xbmcplugin.addDirectoryItem.called
+    totals = {c.args[2] for c in xbmcplugin.addDirectoryItems.call_args_list}
+    assert totals == {1200}
+
+
+def test_ten_thousand_rows_take_one_call_per_chunk(main):
+    import xbmcplugin
+    from listing import CHUNK_SIZE, Directory
+
+    xbmcplugin.addDirectoryItem.reset_mock()
+    xbmcplugin.addDirectoryItems.reset_mock()
+    directory = Directory(1)
+    for m in _movies(10000):
+        directory.add("plugin://x/?movieid={}".format(m["movieid"]),
+                      object(), False)
+    directory.flush()
+
+    assert not xbmcplugin.addDirectoryItem.called
+    assert xbmcplugin.addDirectoryItems.call_count == 10000 // CHUNK_SIZE
+
+
+@pytest.fixture
+def tag(monkeypatch):
+    """A fresh ListItem mock; returns its InfoTag."""
+    import xbmcgui
+    from unittest.mock import MagicMock
+
+    monkeypatch.setattr(xbmcgui, "ListItem", MagicMock())
+    return xbmcgui.ListItem.return_value.getVideoInfoTag.return_value
+
+
+def test_view_sets_only_non_empty_fields(main, tag):
+    from listing import MOVIES
+
+    MOVIES.build({"title": "Alien", "plot": "", "year": 1979, "genre": [],
+                  "playcount": 0, "resume": {"position": 0, "total": 0}})
+    assert [c[0] for c in tag.method_calls] == [
+        "setMediaType", "setTitle", "setYear"]
+
+
+def test_episode_view_keeps_season_zero_and_resume(main, tag):
+    import xbmcgui
+    from listing import EPISODES
+
+    EPISODES.build({"title": "Pilot", "season": 0, "episode": 1,
+                    "resume": {"position": 90, "total": 1800},
+                    "art": {"thumb": "t.jpg"}}, label="0x01. Pilot")
+    tag.setSeason.assert_called_once_with(0)
+    tag.setResumePoint.assert_called_once_with(90, 1800)
+    xbmcgui.ListItem.assert_called_once_with("0x01. Pilot")
+    xbmcgui.ListItem.return_value.setArt.assert_called_once_with(
+        {"thumb": "t.jpg"})
+
+
+def test_view_properties_are_displayed_plus_extra_fields(main):
+    from listing import SHOWS
+
+    assert SHOWS.properties[-2:] == ["watchedepisodes", "episode"]
+    assert "file" not in SHOWS.properties
@@ -0,0 +1,105 @@
+"""Request-scoped memo (``memo.py``) for config loads and JSON-RPC reads."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def invocation(main, monkeypatch):
+    """Run the test inside one memoized plugin invocation."""
+    import memo
+    import xbmc
+
+    sent = []
+
+    def fake_execute(payload):
+        request = json.loads(payload)
+        sent.append(request["method"])
+        return json.dumps({"jsonrpc": "2.0", "id": 1,
+                           "result": {"method": request["method"]}})
+
+    monkeypatch.setattr(xbmc, "executeJSONRPC", fake_execute)
+    memo.begin()
+    yield memo, sent
+    memo.end()
+
+
+def test_repeated_reads_hit_kodi_once(invocation, main):
+    memo, sent = invocation
+    params = {"tvshowid": 3, "properties": ["title"]}
+    first = main.jsonrpc("VideoLibrary.GetTVShowDetails", params)
+    first["mutated"] = True
+    second = main.jsonrpc("VideoLibrary.GetTVShowDetails", params)
+
+    assert sent == ["VideoLibrary.GetTVShowDetails"]
+    assert "mutated" not in second
+    assert memo.saved() == 1
+
+
+def test_different_params_are_separate_reads(invocation, main):
+    _memo, sent = invocation
+    main.jsonrpc("VideoLibrary.GetTVShowDetails", {"tvshowid": 1})
+    main.jsonrpc("VideoLibrary.GetTVShowDetails", {"tvshowid": 2})
+    assert len(sent) == 2
+
+
+def test_write_clears_memoized_reads(invocation, main):
+    _memo, sent = invocation
+    main.jsonrpc("VideoLibrary.GetEpisodes", {"tvshowid": 1})
+    main.jsonrpc("VideoLibrary.SetEpisodeDetails", {"episodeid": 5,
+                                                    "playcount": 1})
+    main.jsonrpc("VideoLibrary.GetEpisodes", {"tvshowid": 1})
+    assert sent == ["VideoLibrary.GetEpisodes",
+                    "VideoLibrary.SetEpisodeDetails",
+                    "VideoLibrary.GetEpisodes"]
+
+
+def test_failed_reads_are_not_memoized(invocation, main, monkeypatch):
+    import xbmc
+
+    _memo, sent = invocation
+
+    def failing(payload):
+        sent.append(json.loads(payload)["method"])
+        return json.dumps({"jsonrpc": "2.0", "id": 1,
+                           "error": {"code": -32602}})
+
+    monkeypatch.setattr(xbmc, "executeJSONRPC", failing)
+    assert main.jsonrpc("VideoLibrary.GetSeasons", {"tvshowid": 1}) is None
+    assert main.jsonrpc("VideoLibrary.GetSeasons", {"tvshowid": 1}) is None
+    assert len(sent) == 2
+
+
+def test_nothing_is_memoized_outside_an_invocation(main, monkeypatch):
+    import xbmc
+
+    calls = []
+    monkeypatch.setattr(xbmc, "executeJSONRPC",
+                        lambda payload: calls.append(payload) or '{"result": {}}')
+    main.jsonrpc("VideoLibrary.GetMovies")
+    main.jsonrpc("VideoLibrary.GetMovies")
+    assert len(calls) == 2
+
+
+def test_config_and_linked_movies_load_once(invocation, main, monkeypatch):
+    import collections_mod
+    import db
+    import tv
+
+    memo, _sent = invocation
+    loads = []
+    monkeypatch.setattr(collections_mod, "_cache_get",
+                        lambda key, **_kw: loads.append(key) or {
+                            "collections": [], "movie_collections": []})
+    links = []
+    monkeypatch.setattr(db, "get_linked_movie_ids",
+                        lambda tvshowid: links.append(tvshowid) or [7])
+
+    assert collections_mod.load_config() is collections_mod.load_config()
+    assert tv._linked_movie_ids(4) == tv._linked_movie_ids(4) == [7]
+    assert loads == ["config"]
+    assert links == [4]
+    assert memo.saved() == 2
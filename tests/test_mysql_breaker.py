@@ -0,0 +1,129 @@
+"""Cross-process circuit breaker in front of MySQL (``db._breaker_*``).
+
+An unreachable server must cost one connect timeout per backoff window, not
+one per plugin invocation.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import types
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def mysql_down(main, monkeypatch):
+    """MySQL configured and shared collections on, but every connect fails."""
+    import db
+    import xbmcgui
+
+    connector = types.ModuleType("mysql.connector")
+    connector.connect = MagicMock(side_effect=OSError("timed out"))
+    package = types.ModuleType("mysql")
+    package.connector = connector
+    monkeypatch.setitem(sys.modules, "mysql", package)
+    monkeypatch.setitem(sys.modules, "mysql.connector", connector)
+
+    monkeypatch.setattr(db, "_shared_collections_enabled", lambda: True)
+    monkeypatch.setattr(db, "get_mysql_settings", lambda: {
+        "host": "nas", "port": 3306, "user": "kodi", "password": ""})
+    monkeypatch.setattr(db, "_local", threading.local())
+
+    clock = [1000.0]
+    monkeypatch.setattr(db.time, "time", lambda: clock[0])
+    xbmcgui.Window(10000).clearProperty(db._BREAKER_PROPERTY)
+    xbmcgui.Window(10000).clearProperty(db._SCHEMA_PROPERTY)
+    yield db, connector.connect, clock
+    xbmcgui.Window(10000).clearProperty(db._BREAKER_PROPERTY)
+    xbmcgui.Window(10000).clearProperty(db._SCHEMA_PROPERTY)
+
+
+def _new_invocation(db, monkeypatch):
+    # Module globals reset with each plugin run; the breaker must not.
+    monkeypatch.setattr(db, "_local", threading.local())
+
+
+def test_open_breaker_skips_mysql_across_invocations(mysql_down, monkeypatch):
+    db, connect, _clock = mysql_down
+
+    assert db.db_load_config() is None
+    assert connect.call_count == 1
+
+    for _ in range(4):
+        _new_invocation(db, monkeypatch)
+        assert db.db_load_config() is None
+        db.db_save_config({"collections": []})
+        db.get_linked_movie_ids(1)
+    assert connect.call_count == 1
+
+
+def test_backoff_doubles_after_failed_probe(mysql_down, monkeypatch):
+    db, connect, clock = mysql_down
+
+    db.db_load_config()
+    clock[0] += db._BREAKER_BASE_BACKOFF + 1
+    _new_invocation(db, monkeypatch)
+    db.db_load_config()  # half-open probe, fails
+    assert connect.call_count == 2
+
+    clock[0] += db._BREAKER_BASE_BACKOFF + 1
+    db.db_load_config()  # still inside the doubled window
+    assert connect.call_count == 2
+
+    clock[0] += db._BREAKER_BASE_BACKOFF
+    db.db_load_config()
+    assert connect.call_count == 3
+
+
+def test_only_one_process_probes_while_half_open(mysql_down, monkeypatch):
+    import xbmcgui
+
+    db, connect, clock = mysql_down
+    db.db_load_config()
+    clock[0] += db._BREAKER_BASE_BACKOFF + 1
+
+    # Another process has just started the probe.
+    state = db._breaker_state()
+    state.update(state="half_open", probe_started=clock[0])
+    xbmcgui.Window(10000).setProperty(db._BREAKER_PROPERTY, json.dumps(state))
+    db.db_load_config()
+    assert connect.call_count == 1
+
+
+def test_successful_probe_closes_breaker(mysql_down, monkeypatch):
+    db, connect, clock = mysql_down
+
+    db.db_load_config()
+    clock[0] += db._BREAKER_BASE_BACKOFF + 1
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.return_value = (1, "{}")
+    conn.cursor.return_value.fetchall.return_value = []
+    connect.side_effect = None
+    connect.return_value = conn
+    _new_invocation(db, monkeypatch)
+
+    assert db.db_load_config() == {
+        "collections": [], "movie_collections": [], "show_item_order": {}}
+    assert db._breaker_state()["state"] == "closed"
+
+
+def test_schema_is_checked_once_per_session(mysql_down, monkeypatch):
+    db, connect, _clock = mysql_down
+
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.return_value = (1, "{}")
+    conn.cursor.return_value.fetchall.return_value = []
+    connect.side_effect = None
+    connect.return_value = conn
+    checks = []
+    monkeypatch.setattr(db, "_ensure_schema", checks.append)
+
+    for _ in range(3):
+        _new_invocation(db, monkeypatch)
+        assert db.db_load_config() is not None
+    assert connect.call_count == 3
+    assert checks == [conn]
@@ -0,0 +1,179 @@
+"""Normalized MySQL config rows (``db._config_rows`` / ``db_save_config``).
+
+A save should write only the rows that changed since this install last saw
+the config — a Move Up/Down is two ``collection_items`` rows — and fall back
+to rewriting everything when another install saved in between.
+"""
+
+from __future__ import annotations
+
+import copy
+
+import pytest
+
+
+CONFIG = {
+    "collections": [
+        {"name": "Stargate", "description": "Gate travel",
+         "shows": ["Stargate SG-1", "movie:7", "Stargate Atlantis"]},
+        {"name": "Whedon", "art": {"poster": "p.jpg"},
+         "shows": ["Firefly", "Dollhouse"]},
+    ],
+    "movie_collections": [
+        {"name": "Alien", "movies": ["Alien", "Aliens"]},
+    ],
+    "show_item_order": {
+        "12": [{"type": "season", "id": 1}, {"type": "movie", "id": 7}],
+    },
+}
+
+
+class FakeCursor:
+    """Records statements; answers the generation and row SELECTs."""
+
+    def __init__(self, generation, rows=None, blob=None):
+        self.generation = generation
+        self.rows = rows or {}
+        self.blob = blob
+        self.statements = []
+        self._result = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((" ".join(sql.split()), params))
+        if sql.startswith("SELECT generation"):
+            self._result = [(self.generation, "{}")]
+        elif sql.startswith("SELECT config_json"):
+            self._result = [(self.blob,)] if self.blob else []
+        elif sql.startswith("SELECT"):
+            table = sql.split(" FROM ")[1].split()[0]
+            self._result = sorted(
+                values for t, values in self.rows.values()
+                if t == table
+                and (not params or values[0] in params))
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return list(self._result)
+
+    def close(self):
+        pass
+
+    def writes(self):
+        """(verb, table, params) for each INSERT/UPDATE/DELETE."""
+        out = []
+        for sql, params in self.statements:
+            words = sql.split()
+            if words[0] in ("INSERT", "DELETE"):
+                out.append((words[0], words[words.index(
+                    "INTO" if words[0] == "INSERT" else "FROM") + 1], params))
+            elif words[0] == "UPDATE":
+                out.append((words[0], words[1], params))
+        return out
+
+
+@pytest.fixture
+def mysql(main, monkeypatch):
+    import db
+    import xbmcgui
+    from unittest.mock import MagicMock
+
+    conn = MagicMock()
+    monkeypatch.setattr(db, "_get_connection", lambda: conn)
+    xbmcgui.Window(10000).clearProperty(db._ROWS_PROPERTY)
+    yield db, conn
+    xbmcgui.Window(10000).clearProperty(db._ROWS_PROPERTY)
+
+
+def test_rows_round_trip_through_load(mysql):
+    db, conn = mysql
+    rows = db._config_rows(CONFIG)
+    conn.cursor.return_value = FakeCursor(3, rows)
+
+    assert db.db_load_config() == CONFIG
+
+
+def test_move_writes_two_item_rows(mysql):
+    db, conn = mysql
+    conn.cursor.return_value = FakeCursor(3, db._config_rows(CONFIG))
+    config = db.db_load_config()
+
+    shows = config["collections"][0]["shows"]
+    shows[0], shows[1] = shows[1], shows[0]
+    cursor = FakeCursor(3)
+    conn.cursor.return_value = cursor
+    db.db_save_config(config)
+
+    assert cursor.writes() == [
+        ("INSERT", "collection_items", ("tv", 0, 0, "movie:7", 4)),
+        ("INSERT", "collection_items", ("tv", 0, 1, "Stargate SG-1", 4)),
+        ("UPDATE", "state", (4, "{}")),
+    ]
+
+
+def test_removed_rows_are_deleted(mysql):
+    db, conn = mysql
+    conn.cursor.return_value = FakeCursor(3, db._config_rows(CONFIG))
+    config = db.db_load_config()
+
+    config["collections"][1]["shows"].pop()
+    del config["show_item_order"]["12"]
+    cursor = FakeCursor(3)
+    conn.cursor.return_value = cursor
+    db.db_save_config(config)
+
+    deletes = sorted(w for w in cursor.writes() if w[0] == "DELETE")
+    assert deletes == [
+        ("DELETE", "collection_items", ("tv", 1, 1)),
+        ("DELETE", "show_item_order", (12,)),
+    ]
+
+
+def test_concurrent_save_elsewhere_rewrites_everything(mysql):
+    db, conn = mysql
+    conn.cursor.return_value = FakeCursor(3, db._config_rows(CONFIG))
+    config = db.db_load_config()
+
+    cursor = FakeCursor(5)  # another install saved twice since our read
+    conn.cursor.return_value = cursor
+    db.db_save_config(config)
+
+    writes = cursor.writes()
+    assert ("DELETE", "collections", ()) in writes
+    assert len([w for w in writes if w[0] == "INSERT"]) == len(
+        db._config_rows(CONFIG))
+
+
+def test_schema_migrates_the_blob_once(mysql):
+    import json
+
+    db, conn = mysql
+    cursor = FakeCursor(0, blob=json.dumps(copy.deepcopy(CONFIG)))
+    conn.cursor.return_value = cursor
+    db._ensure_schema(conn)
+
+    inserts = [w for w in cursor.writes()
+               if w[0] == "INSERT" and w[1] != "state"]
+    assert len(inserts) == len(db._config_rows(CONFIG))
+    assert ("UPDATE", "state", ("{}",)) in cursor.writes()
+
+    cursor = FakeCursor(1, blob=json.dumps(CONFIG))
+    conn.cursor.return_value = cursor
+    db._ensure_schema(conn)
+    assert not [w for w in cursor.writes() if w[1] == "collection_items"]
+
+
+def test_migrated_schema_takes_no_row_lock(mysql):
+    db, conn = mysql
+    cursor = FakeCursor(4)
+    conn.cursor.return_value = cursor
+    db._ensure_schema(conn)
+
+    sql = [s for s, _params in cursor.statements]
+    assert not [s for s in sql if "FOR UPDATE" in s]
+    assert not cursor.writes()[1:]  # just the INSERT IGNORE of the state row
+    create = next(s for s in sql if "TABLE IF NOT EXISTS `collections`" in s)
+    assert "name TEXT NOT NULL" in create
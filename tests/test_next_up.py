@@ -0,0 +1,214 @@
+"""Next item across a TV collection's members (``next_up.py``)."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+SHOWS = {"Stargate SG-1": 1, "Stargate Atlantis": 2}
+
+
+def _episode(episodeid, tvshowid, season):
+    return {"episodeid": episodeid, "tvshowid": tvshowid, "season": season,
+            "title": "Episode {}".format(episodeid), "file": "/e.mkv"}
+
+
+@pytest.fixture
+def library(main, monkeypatch):
+    """A collection of a marker movie and two shows, all read over JSON-RPC.
+
+    SG-1's stored order puts linked movie 8 between seasons 1 and 2.
+    Returns the mutable state: watched movie ids, each show's first
+    unwatched episode, and the batches sent.
+    """
+    import collections_mod
+    import db
+    import ipc
+    import snapshot
+    from cache import _cache_clear
+
+    monkeypatch.setattr(db, "_direct_read_enabled", lambda: False)
+    monkeypatch.setattr(snapshot, "enabled", lambda: False)
+    monkeypatch.setattr(ipc, "query", lambda name, **args: None)
+    monkeypatch.setattr(collections_mod, "load_config", lambda: {
+        "collections": [{"name": "Stargate",
+                         "shows": ["movie:7", "Stargate SG-1",
+                                   "Stargate Atlantis"]}],
+        "movie_collections": [],
+        "show_item_order": {"1": [{"type": "season", "id": 1},
+                                  {"type": "movie", "id": 8},
+                                  {"type": "season", "id": 2}]},
+    })
+    state = {
+        "watched": set(),
+        "firsts": {1: _episode(101, 1, 1), 2: _episode(201, 2, 1)},
+        "batches": [],
+        "calls": [],
+    }
+
+    def fake_jsonrpc(method, params=None):
+        state["calls"].append((method, params))
+        if method == "VideoLibrary.GetTVShows":
+            return {"tvshows": [{"tvshowid": i, "title": t}
+                                for t, i in SHOWS.items()]}
+        return {}
+
+    def fake_batch(calls):
+        calls = list(calls)
+        state["batches"].append(calls)
+        results = []
+        for method, params in calls:
+            if method == "VideoLibrary.GetMovieDetails":
+                mid = params["movieid"]
+                results.append({"moviedetails": {
+                    "movieid": mid, "title": "Movie {}".format(mid),
+                    "file": "/m.mkv",
+                    "playcount": int(mid in state["watched"])}})
+            else:
+                first = state["firsts"].get(params["tvshowid"])
+                results.append({"episodes": [first] if first else []})
+        return results
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    monkeypatch.setattr(main, "jsonrpc_batch", fake_batch)
+    _cache_clear("nextup.0")
+    yield state
+    _cache_clear("nextup.0")
+
+
+def _next(state):
+    import next_up
+
+    next_up.invalidate()
+    item = next_up.next_item(0)
+    if item is None:
+        return None
+    key = "movieid" if item["type"] == "movie" else "episodeid"
+    return item["type"], item["row"][key]
+
+
+def test_unwatched_marker_movie_comes_first(library):
+    assert _next(library) == ("movie", 7)
+
+
+def test_linked_movie_follows_its_place_in_the_show_order(library):
+    library["watched"].add(7)
+    assert _next(library) == ("episode", 101)
+
+    library["firsts"][1] = _episode(121, 1, 2)
+    assert _next(library) == ("movie", 8)
+
+    library["watched"].add(8)
+    assert _next(library) == ("episode", 121)
+
+
+def test_finished_show_moves_on_to_the_next_member(library):
+    library["watched"].update({7, 8})
+    library["firsts"].pop(1)
+    assert _next(library) == ("episode", 201)
+
+    library["firsts"].pop(2)
+    assert _next(library) is None
+
+
+def test_unordered_show_ends_with_its_linked_movies(library, monkeypatch):
+    import tv
+
+    # Atlantis has no stored order; movie 7 is a collection-level marker.
+    links = {1: [8], 2: [9, 7]}
+    monkeypatch.setattr(tv, "_linked_movie_ids", lambda i: links.get(i, []))
+    library["watched"].update({7, 8})
+    library["firsts"].pop(1)
+    assert _next(library) == ("episode", 201)
+
+    library["firsts"].pop(2)
+    assert _next(library) == ("movie", 9)
+
+    library["watched"].add(9)
+    assert _next(library) is None
+
+
+def test_two_batched_round_trips(library):
+    import next_up
+
+    next_up.next_item(0)
+    episodes, movies = library["batches"]
+    assert [p["tvshowid"] for _m, p in episodes] == [1, 2]
+    assert all(p["limits"] == {"start": 0, "end": 1} for _m, p in episodes)
+    assert [p["movieid"] for _m, p in movies] == [7, 8]
+    assert not any(m == "VideoLibrary.GetEpisodes"
+                   for m, _p in library["calls"])
+
+
+def test_cached_until_invalidated(library):
+    import next_up
+
+    assert next_up.next_item(0)["type"] == "movie"
+    library["watched"].add(7)
+    assert next_up.next_item(0)["type"] == "movie"
+    assert len(library["batches"]) == 2
+
+    next_up.invalidate()
+    assert next_up.next_item(0)["row"]["episodeid"] == 101
+
+
+def test_set_watched_invalidates(library, main):
+    import next_up
+
+    next_up.next_item(0)
+    library["watched"].add(7)
+    main.action_set_watched({"media": ["movie"], "id": ["7"],
+                             "playcount": ["1"]})
+    assert next_up.next_item(0)["row"]["episodeid"] == 101
+
+
+def test_play_next_starts_the_item(library, monkeypatch):
+    import xbmc
+
+    import next_up
+
+    played = []
+    monkeypatch.setattr(xbmc, "executebuiltin", played.append)
+    next_up.action_play_next(0)
+    (builtin,) = played
+    assert builtin.startswith("PlayMedia(")
+    query = parse_qs(urlparse(builtin[len("PlayMedia("):-1]).query)
+    assert query["action"] == ["play_movie"]
+    assert query["movieid"] == ["7"]
+
+
+def test_collection_widget_labels_rows(library, listed, monkeypatch):
+    import xbmcgui
+
+    import widgets
+
+    labels = []
+
+    def make(label="", *args, **kwargs):
+        labels.append(label)
+        return MagicMock()
+
+    monkeypatch.setattr(xbmcgui, "ListItem", make)
+    widgets.list_collection_next_up()
+    ((url, _li, folder),) = listed()
+    assert "action=play_movie" in url and not folder
+    assert labels == ["Stargate: Movie 7"]
+
+
+def test_staged_reorder_invalidates(library, monkeypatch):
+    import next_up
+    import reorder
+    import sync_queue
+    from cache import _cache_clear
+
+    monkeypatch.setattr(sync_queue, "service_running", lambda: True)
+    assert next_up.next_item(0)["type"] == "movie"
+    try:
+        reorder.commit({}, reorder.collection_key("tv", 0),
+                       ["Stargate Atlantis", "movie:7", "Stargate SG-1"])
+        assert next_up.next_item(0)["row"]["episodeid"] == 201
+    finally:
+        _cache_clear(reorder._CACHE_KEY)
@@ -0,0 +1,138 @@
+"""Paged listings (``get_page_size``): one page of rows per invocation.
+
+``list_movies`` lists a collection where its first member falls, so a page
+must know which collections earlier pages already listed; the flattened
+episode listing pages in season/episode order with linked movies last.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+TITLES = ["A", "B", "C", "D", "E", "F"]
+
+
+def _query(url):
+    return {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+
+
+@pytest.fixture
+def paged(main, monkeypatch):
+    """Page size 2, JSON-RPC only, one collection split across pages."""
+    import collections_mod
+    import db
+    import snapshot
+
+    monkeypatch.setattr(main, "get_page_size", lambda: 2)
+    monkeypatch.setattr(db, "_direct_read_enabled", lambda: False)
+    monkeypatch.setattr(snapshot, "enabled", lambda: False)
+    config = {"collections": [], "movie_collections": [
+        {"name": "Pair", "movies": ["E", "B"]}]}
+    monkeypatch.setattr(collections_mod, "load_config",
+                        lambda: collections_mod._ensure_keys(dict(config)))
+    calls = []
+    library = {i: {"movieid": i, "title": t, "label": t, "art": {"poster": t}}
+               for i, t in enumerate(TITLES, 1)}
+
+    def fake_jsonrpc(method, params=None):
+        calls.append((method, params))
+        assert method == "VideoLibrary.GetMovies"
+        assert "limits" not in params
+        movies = list(library.values())
+        rule = params.get("filter")
+        if rule:
+            wanted = {r["value"] for r in rule.get("or", [rule])}
+            movies = [m for m in movies if m["title"] in wanted]
+        return {"movies": movies}
+
+    def fake_batch(batch):
+        batch = list(batch)
+        calls.append(("batch", [p["movieid"] for _m, p in batch]))
+        return [{"moviedetails": library[p["movieid"]]} for _m, p in batch]
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    monkeypatch.setattr(main, "jsonrpc_batch", fake_batch)
+    return calls
+
+
+def _page(listed, **params):
+    import movies
+
+    before = len(listed())
+    movies.list_movies(**params)
+    return [(_query(url).get("movieid") or _query(url), li)
+            for url, li, _folder in listed()[before:]]
+
+
+def test_pages_fetch_only_their_rows(paged, listed):
+    rows = _page(listed)
+    # An id/title listing picks the page; only its rows are fetched in full.
+    assert paged[0][1]["properties"] == ["title"]
+    assert paged[1] == ("batch", [1, 2, 3])
+    assert rows[0][0] == "1"
+    # B is the collection's first member: the collection row stands there.
+    assert rows[1][0] == {"action": "movie_collection", "index": "0"}
+    assert rows[2][0] == {"action": "root_movies", "start": "2",
+                          "shown": "0"}
+
+
+def test_collection_listed_once_across_pages(paged, listed):
+    assert [r for r, _li in _page(listed, start=2, shown=[0])][:2] == [
+        "3", "4"]
+    rows = [r for r, _li in _page(listed, start=4, shown=[0])]
+    # E belongs to the collection already listed on page one; no next page.
+    assert rows == ["6"]
+
+
+def test_collection_row_summarises_members_from_other_pages(paged, listed,
+                                                            monkeypatch):
+    import xbmcgui
+
+    monkeypatch.setattr(xbmcgui, "ListItem",
+                        MagicMock(side_effect=lambda *a, **k: MagicMock()))
+    rows = _page(listed)
+    # The art comes from E, the first member with art, two pages ahead.
+    rows[1][1].setArt.assert_called_once_with({"poster": "E"})
+    assert paged[2][1]["filter"] == {"or": [
+        {"field": "title", "operator": "is", "value": "E"},
+        {"field": "title", "operator": "is", "value": "B"}]}
+
+
+def test_flattened_episodes_are_paged(main, monkeypatch, listed):
+    import db
+    import tv
+
+    episodes = [{"episodeid": 100 + n, "season": 1, "episode": n,
+                 "title": "E{}".format(n), "playcount": 0}
+                for n in range(1, 6)]
+    requests = []
+
+    def fake_jsonrpc(method, params=None):
+        requests.append(params)
+        limits = params["limits"]
+        return {"episodes": episodes[limits["start"]:limits["end"]]}
+
+    linked = []
+    monkeypatch.setattr(main, "get_page_size", lambda: 2)
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    monkeypatch.setattr(main, "get_kodi_setting", lambda _s: 1)
+    monkeypatch.setattr(main, "_select_first_unwatched", lambda _i: None)
+    monkeypatch.setattr(db, "_direct_read_enabled", lambda: False)
+    monkeypatch.setattr(tv, "_add_linked_movies",
+                        lambda tvshowid, directory: linked.append(tvshowid))
+
+    tv.list_episodes(7, None)
+    urls = [_query(url) for url, _li, _f in listed()]
+    assert requests[0]["sort"] == {"method": "episode"}
+    assert [u.get("episodeid") for u in urls] == ["101", "102", None]
+    assert urls[-1] == {"action": "episodes", "tvshowid": "7", "start": "2"}
+    assert linked == []
+
+    tv.list_episodes(7, None, start=4)
+    assert [_query(url).get("episodeid")
+            for url, _li, _f in listed()[len(urls):]] == ["105"]
+    assert linked == [7]
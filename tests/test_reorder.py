@@ -0,0 +1,167 @@
+"""Reorder sessions (``reorder.py``): rapid moves are staged, then saved once."""
+
+from __future__ import annotations
+
+import copy
+
+import pytest
+
+
+CONFIG = {
+    "collections": [{"name": "Stargate",
+                     "shows": ["SG-1", "Atlantis", "Universe", "Origins"]}],
+    "movie_collections": [],
+}
+
+
+@pytest.fixture
+def session(main, monkeypatch):
+    """In-memory config, counted saves and the service marked running."""
+    import collections_mod
+    import reorder
+    import sync_queue
+    import xbmc
+
+    stored = [copy.deepcopy(CONFIG)]
+    saves = []
+
+    def fake_save(config):
+        saves.append(copy.deepcopy(config))
+        stored[0] = copy.deepcopy(config)
+
+    monkeypatch.setattr(collections_mod, "load_config",
+                        lambda: copy.deepcopy(stored[0]))
+    monkeypatch.setattr(collections_mod, "save_config", fake_save)
+    monkeypatch.setattr(xbmc, "executebuiltin", lambda cmd: None)
+    clock = [1000.0]
+    monkeypatch.setattr(reorder.time, "time", lambda: clock[0])
+    collections_mod._cache_clear(reorder._CACHE_KEY)
+    sync_queue.start()
+    yield reorder, stored, saves, clock
+    sync_queue.stop()
+    collections_mod._cache_clear(reorder._CACHE_KEY)
+
+
+def _move(pos, direction):
+    from collections_mod import action_move_in_collection
+    action_move_in_collection(0, pos, direction, "tv")
+
+
+def test_moves_are_staged_not_saved(session):
+    reorder, stored, saves, _clock = session
+    _move(3, "up")
+    _move(2, "up")
+    _move(1, "up")
+
+    assert saves == []
+    assert reorder.staged(reorder.collection_key("tv", 0)) == [
+        "Origins", "SG-1", "Atlantis", "Universe"]
+    assert stored[0] == CONFIG
+
+
+def test_listing_shows_the_staged_order(session, monkeypatch, listed):
+    import collections_mod
+    import tv
+
+    _move(0, "down")
+    shows = [{"tvshowid": i, "title": t} for i, t in
+             enumerate(CONFIG["collections"][0]["shows"], 1)]
+    monkeypatch.setattr(tv, "get_library_shows", lambda **kw: shows)
+    monkeypatch.setattr(tv, "get_movie_details", lambda ids: {})
+    collections_mod.list_collection_items(0, "tv")
+
+    order = [url.split("tvshowid=")[1] for url, _li, _f in listed()]
+    assert order == ["2", "1", "3", "4"]
+
+
+def reorder_entries(session):
+    reorder, stored, _saves, _clock = session
+    key = reorder.collection_key("tv", 0)
+    return reorder.current(key, stored[0]["collections"][0]["shows"])
+
+
+def test_quiet_period_flushes_one_save(session):
+    reorder, stored, saves, clock = session
+    _move(3, "up")
+    _move(2, "up")
+
+    clock[0] += reorder._QUIET_PERIOD - 1
+    assert not reorder.flush_idle()
+    clock[0] += 1
+    assert reorder.flush_idle()
+    assert len(saves) == 1
+    assert stored[0]["collections"][0]["shows"] == [
+        "SG-1", "Origins", "Atlantis", "Universe"]
+    assert reorder.staged(reorder.collection_key("tv", 0)) is None
+
+
+def test_navigating_away_flushes(session):
+    reorder, _stored, saves, _clock = session
+    _move(0, "down")
+
+    reorder.on_navigate("collection", {"index": ["0"]})
+    assert saves == []
+    reorder.on_navigate("collections", {})
+    assert len(saves) == 1
+
+
+def test_move_to_position_saves_immediately(session, monkeypatch):
+    import xbmcgui
+    from unittest.mock import MagicMock
+
+    reorder, stored, saves, _clock = session
+    _move(0, "down")  # staged; saved together with the move below
+    dialog = MagicMock()
+    dialog.return_value.numeric.return_value = "4"
+    monkeypatch.setattr(xbmcgui, "Dialog", dialog)
+    _move(0, "to")
+
+    assert len(saves) == 1
+    assert stored[0]["collections"][0]["shows"] == [
+        "SG-1", "Universe", "Origins", "Atlantis"]
+    assert reorder.staged(reorder.collection_key("tv", 0)) is None
+
+
+def test_without_the_service_moves_save_immediately(session):
+    import sync_queue
+
+    _reorder, _stored, saves, _clock = session
+    sync_queue.stop()
+    _move(1, "up")
+    _move(2, "down")
+    assert len(saves) == 2
+
+
+def test_stale_stage_is_ignored(session):
+    reorder, stored, _saves, _clock = session
+    _move(0, "down")
+    stored[0]["collections"][0]["shows"].append("Infinity")
+
+    assert reorder_entries(session) == stored[0]["collections"][0]["shows"]
+
+
+def test_show_stage_yields_to_an_order_saved_elsewhere(session):
+    reorder, stored, saves, _clock = session
+    order = [{"type": "season", "id": 1}, {"type": "movie", "id": 8}]
+    stored[0]["show_item_order"] = {"5": order}
+    key = reorder.show_key(5)
+    reorder.commit(copy.deepcopy(stored[0]), key, order[::-1])
+    assert reorder.show_order(stored[0], 5) == order[::-1]
+
+    # Another device saves the show with a new linked movie.
+    elsewhere = order + [{"type": "movie", "id": 9}]
+    stored[0]["show_item_order"]["5"] = elsewhere
+    assert reorder.show_order(stored[0], 5) == elsewhere
+    reorder.flush()
+    assert len(saves) == 1
+    assert stored[0]["show_item_order"]["5"] == elsewhere
+
+
+def test_show_stage_is_saved_over_its_own_base(session):
+    reorder, stored, _saves, _clock = session
+    items = [{"type": "season", "id": 1}, {"type": "movie", "id": 8}]
+    key = reorder.show_key(5)
+    reorder.commit(copy.deepcopy(stored[0]), key, items[::-1])
+    reorder.commit(copy.deepcopy(stored[0]), key, items)
+    reorder.flush()
+    assert stored[0]["show_item_order"]["5"] == items
@@ -1,9 +1,9 @@
 """get_kodi_setting window-property cache.
 
 Display-preference settings are read on most navigations but change rarely, so
-they are cached briefly to avoid repeating the JSON-RPC lookup.  These tests
-guard the cache's correctness — especially that a falsy-but-valid value (0) is
-cached and returned, and that a failed lookup is *not* pinned for the TTL.
+they are cached until Kodi next saves guisettings.xml.  These tests guard the
+cache's correctness — especially that a falsy-but-valid value (0) is cached
+and returned, and that a failed lookup is *not* pinned.
 """
 
 from __future__ import annotations
@@ -14,7 +14,7 @@ def _clear(setting_id):
     xbmcgui.Window(10000).clearProperty("watchorder.setting." + setting_id)
 
 
-def test_setting_read_is_cached_within_ttl(main, monkeypatch):
+def test_setting_read_is_cached(main, monkeypatch):
     _clear("videolibrary.flattentvshows")
     calls = []
 
@@ -48,7 +48,7 @@ def test_zero_value_is_cached_and_returned(main, monkeypatch):
 
 
 def test_failed_lookup_is_not_cached(main, monkeypatch):
-    """A JSON-RPC that returns no value must not pin None for the whole TTL."""
+    """A JSON-RPC that returns no value must not pin None in the cache."""
     _clear("videolibrary.missing")
     calls = []
 
@@ -62,3 +62,17 @@ def test_failed_lookup_is_not_cached(main, monkeypatch):
     assert main.get_kodi_setting("videolibrary.missing") is None
     # Re-fetched each time — not cached.
     assert len(calls) == 2
+
+
+def test_saving_kodi_settings_invalidates_the_cache(main, monkeypatch):
+    _clear("videolibrary.flattentvshows")
+    values = iter([1, 2])
+    monkeypatch.setattr(main, "jsonrpc",
+                        lambda method, params=None: {"value": next(values)})
+    monkeypatch.setattr(main, "_settings_generation", lambda: 100)
+    assert main.get_kodi_setting("videolibrary.flattentvshows") == 1
+    assert main.get_kodi_setting("videolibrary.flattentvshows") == 1
+
+    # guisettings.xml rewritten: the next read goes back to Kodi.
+    monkeypatch.setattr(main, "_settings_generation", lambda: 200)
+    assert main.get_kodi_setting("videolibrary.flattentvshows") == 2
@@ -0,0 +1,153 @@
+"""Write-behind queue for shared config saves (``sync_queue.py``)."""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def queue(main, monkeypatch, tmp_path):
+    """Shared collections on, the service running and a fake MySQL writer."""
+    import collections_mod
+    import db
+    import sync_queue
+
+    monkeypatch.setattr(main, "CONFIG_DIR", str(tmp_path) + "/")
+    monkeypatch.setattr(main, "CONFIG_PATH", str(tmp_path) + "/collections.json")
+    monkeypatch.setattr(db, "_shared_collections_enabled", lambda: True)
+    monkeypatch.setattr(db, "db_config_version", lambda: None)
+    monkeypatch.setattr(collections_mod, "build_index",
+                        lambda config, resolve_shows=True, previous=None: {})
+
+    writes = []
+    result = [True]
+
+    def fake_save(config):
+        writes.append(config)
+        return result[0]
+
+    monkeypatch.setattr(db, "db_save_config", fake_save)
+    clock = [1000.0]
+    monkeypatch.setattr(sync_queue.time, "time", lambda: clock[0])
+    collections_mod._cache_clear("config")
+    sync_queue.start()
+    yield sync_queue, writes, result, clock
+    sync_queue.stop()
+    sync_queue.discard()
+    collections_mod._cache_clear("config")
+
+
+def _config(name):
+    return {"collections": [{"name": name, "shows": []}],
+            "movie_collections": []}
+
+
+def test_save_returns_without_touching_mysql(queue):
+    import collections_mod
+
+    sync_queue, writes, _result, _clock = queue
+    collections_mod.save_config(_config("A"))
+    assert writes == []
+    assert sync_queue.pending()
+
+
+def test_consecutive_saves_reach_mysql_as_one_write(queue):
+    import collections_mod
+
+    sync_queue, writes, _result, _clock = queue
+    for name in ("A", "B", "C"):
+        collections_mod.save_config(_config(name))
+    assert sync_queue.drain()
+    assert [w["collections"][0]["name"] for w in writes] == ["C"]
+    assert not sync_queue.pending()
+    assert sync_queue.status() is None
+
+
+def test_pending_save_is_read_back_from_local_json(queue, monkeypatch):
+    import collections_mod
+    import db
+
+    _sync_queue, _writes, _result, _clock = queue
+    collections_mod.save_config(_config("Mine"))
+    collections_mod._cache_clear("config")
+    monkeypatch.setattr(db, "db_load_config", lambda: _config("Stale"))
+    assert collections_mod.load_config()["collections"][0]["name"] == "Mine"
+
+
+def test_failed_write_is_retried_with_backoff(queue):
+    import collections_mod
+
+    sync_queue, writes, result, clock = queue
+    collections_mod.save_config(_config("A"))
+    result[0] = False
+
+    assert not sync_queue.drain()
+    assert sync_queue.status() == (1, sync_queue._BASE_BACKOFF)
+    assert not sync_queue.drain()  # still backing off
+    assert len(writes) == 1
+
+    clock[0] += sync_queue._BASE_BACKOFF
+    assert not sync_queue.drain()
+    assert sync_queue.status() == (2, 2 * sync_queue._BASE_BACKOFF)
+
+    result[0] = True
+    clock[0] += 2 * sync_queue._BASE_BACKOFF
+    assert sync_queue.drain()
+    assert len(writes) == 3
+    assert not sync_queue.pending()
+
+
+def test_newer_save_supersedes_the_backoff(queue):
+    import collections_mod
+
+    sync_queue, writes, result, _clock = queue
+    collections_mod.save_config(_config("A"))
+    result[0] = False
+    sync_queue.drain()
+
+    result[0] = True
+    collections_mod.save_config(_config("B"))
+    assert sync_queue.drain()
+    assert writes[-1]["collections"][0]["name"] == "B"
+
+
+def test_without_the_service_saves_write_in_line(queue):
+    import collections_mod
+
+    sync_queue, writes, _result, _clock = queue
+    sync_queue.stop()
+    collections_mod.save_config(_config("A"))
+    assert len(writes) == 1
+    assert not sync_queue.pending()
+
+
+def test_save_during_the_write_is_kept(queue, monkeypatch):
+    import collections_mod
+    import db
+
+    sync_queue, writes, _result, _clock = queue
+    collections_mod.save_config(_config("A"))
+
+    def slow_save(config):
+        writes.append(config)
+        if len(writes) == 1:
+            # Another invocation saves while A is on its way to MySQL.
+            sync_queue.enqueue(_config("B"))
+        return True
+
+    monkeypatch.setattr(db, "db_save_config", slow_save)
+    assert not sync_queue.drain()
+    assert sync_queue.pending()
+    assert sync_queue.drain()
+    assert [w["collections"][0]["name"] for w in writes] == ["A", "B"]
+    assert not sync_queue.pending()
+
+
+def test_idle_drain_reads_nothing(queue, monkeypatch):
+    sync_queue, writes, _result, _clock = queue
+    touched = []
+    monkeypatch.setattr(sync_queue, "_claim", lambda: touched.append("claim"))
+    monkeypatch.setattr(sync_queue, "_read",
+                        lambda name=None: touched.append("read"))
+    assert sync_queue.drain()
+    assert touched == [] and writes == []
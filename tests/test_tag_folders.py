@@ -0,0 +1,90 @@
+"""Tag folders (``collections_mod.list_tag_folders`` / ``get_tag_counts``).
+
+The folder list comes from ``VideoLibrary.GetTags`` plus one batched count
+per tag rather than every item's tags, and is cached until the library
+changes.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+
+TAGS = {"anime": 143, "Kids": 2, "empty": 0}
+
+
+@pytest.fixture
+def library(main, monkeypatch):
+    """Tags served by JSON-RPC only; every call recorded."""
+    import collections_mod
+    import db
+    import snapshot
+    import xbmcgui
+
+    monkeypatch.setattr(db, "_direct_read_enabled", lambda: False)
+    monkeypatch.setattr(snapshot, "enabled", lambda: False)
+    collections_mod._cache_clear("tags.tv")
+    xbmcgui.Window(10000).clearProperty("watchorder.library.state")
+    calls = []
+
+    def fake_jsonrpc(method, params=None):
+        calls.append((method, params))
+        assert method == "VideoLibrary.GetTags"
+        return {"tags": [{"tagid": i, "label": name}
+                         for i, name in enumerate(TAGS)]}
+
+    def fake_batch(batch):
+        batch = list(batch)
+        calls.append(("batch", batch))
+        return [{"limits": {"start": 0, "end": min(1, TAGS[name]),
+                            "total": TAGS[name]}}
+                for _m, p in batch for name in [p["filter"]["value"]]]
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    monkeypatch.setattr(main, "jsonrpc_batch", fake_batch)
+    yield calls
+    collections_mod._cache_clear("tags.tv")
+    xbmcgui.Window(10000).clearProperty("watchorder.library.state")
+
+
+def test_folders_are_labelled_with_counts(library, listed, monkeypatch):
+    import collections_mod
+    import xbmcgui
+
+    list_item = MagicMock()
+    monkeypatch.setattr(xbmcgui, "ListItem", list_item)
+    collections_mod.list_tag_folders("tv")
+
+    assert [c.args[0] for c in list_item.call_args_list] == [
+        "Kids (2)", "anime (143)"]
+    assert [url.split("tag=")[1] for url, _li, _f in listed()] == [
+        "Kids", "anime"]
+    assert library[0] == ("VideoLibrary.GetTags", {"type": "tvshow"})
+    (_batch, counted), = library[1:]
+    assert counted[0] == ("VideoLibrary.GetTVShows", {
+        "filter": {"field": "tag", "operator": "is", "value": "anime"},
+        "limits": {"start": 0, "end": 1}})
+
+
+def test_counts_are_cached_until_the_library_changes(library):
+    import collections_mod
+    import library_state
+
+    library_state.start_session()
+    assert collections_mod.get_tag_counts("tv")["anime"] == 143
+    assert collections_mod.get_tag_counts("tv")["anime"] == 143
+    assert len(library) == 2
+
+    library_state.record({"tvshow": [1]})
+    collections_mod.get_tag_counts("tv")
+    assert len(library) == 4
+
+
+def test_failed_count_is_not_cached(library, main, monkeypatch):
+    import collections_mod
+
+    monkeypatch.setattr(main, "jsonrpc_batch", lambda batch: [None] * 3)
+    assert collections_mod.get_tag_counts("tv") == {}
+    assert collections_mod._cache_get("tags.tv") is None
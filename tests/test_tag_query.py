@@ -0,0 +1,47 @@
+"""Tag expressions (``tag_query``) and their JSON-RPC / SQL compilations."""
+
+from __future__ import annotations
+
+import pytest
+
+import tag_query
+
+
+@pytest.mark.parametrize("text", [
+    "anime", "Sci Fi", "ROCK-AND-ROLL", "rock and roll", "AND", "a AND",
+    "(unbalanced",
+])
+def test_plain_and_malformed_text_is_one_tag(text):
+    assert tag_query.parse(text) == ("tag", text)
+
+
+def test_precedence_and_pseudo_terms():
+    assert tag_query.parse("kids OR family AND NOT is:watched") == (
+        "or", [("tag", "kids"),
+               ("and", [("tag", "family"), ("not", ("watched", True))])])
+    assert tag_query.parse('(kids OR "Rock AND Roll") AND is:Unwatched') == (
+        "and", [("or", [("tag", "kids"), ("tag", "Rock AND Roll")]),
+                ("watched", False)])
+
+
+def test_quote_round_trips():
+    for name in ("anime", "Rock AND Roll", "Marvel (MCU)", "NOT"):
+        assert tag_query.parse(tag_query.quote(name)) == ("tag", name)
+
+
+def test_filter_pushes_negation_down():
+    node = tag_query.parse("NOT (anime OR is:unwatched)")
+    assert tag_query.to_filter(node) == {"and": [
+        {"field": "tag", "operator": "isnot", "value": "anime"},
+        {"field": "playcount", "operator": "greaterthan", "value": "0"},
+    ]}
+
+
+def test_sql_and_row_predicate_agree():
+    node = tag_query.parse("kids OR NOT is:watched")
+    sql, args = tag_query.to_sql(
+        node, lambda name: ("tag = ?", [name]), "playcount > 0")
+    assert (sql, args) == ("(tag = ? OR NOT ((playcount > 0)))", ["kids"])
+    assert tag_query.matches(node, ["Kids"], True)
+    assert tag_query.matches(node, [], False)
+    assert not tag_query.matches(node, ["family"], True)
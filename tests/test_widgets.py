@@ -0,0 +1,156 @@
+"""Home-screen widget routes (``widgets.py``): top N rows only."""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+MOVIES = [
+    {"movieid": 1, "title": "Old", "dateadded": "2019-01-01 00:00:00",
+     "lastplayed": "2024-03-01 20:00:00",
+     "resume": {"position": 600.0, "total": 6000.0}},
+    {"movieid": 2, "title": "New", "dateadded": "2024-06-01 00:00:00",
+     "lastplayed": "", "resume": {"position": 0.0, "total": 0.0}},
+    {"movieid": 3, "title": "Mid", "dateadded": "2022-01-01 00:00:00",
+     "lastplayed": "2024-05-01 20:00:00",
+     "resume": {"position": 30.0, "total": 5000.0}},
+]
+
+
+def _ids(listed, key):
+    return [int(parse_qs(urlparse(url).query)[key][0])
+            for url, _li, _folder in listed()]
+
+
+@pytest.fixture
+def no_cache(main, monkeypatch):
+    """Neither the service nor the snapshot can answer: JSON-RPC only."""
+    import ipc
+    import snapshot
+
+    monkeypatch.setattr(ipc, "query", lambda name, **args: None)
+    monkeypatch.setattr(snapshot, "enabled", lambda: False)
+    calls = []
+
+    def fake_jsonrpc(method, params=None):
+        calls.append((method, params))
+        return {"movies": MOVIES[:params["limits"]["end"]]}
+
+    monkeypatch.setattr(main, "jsonrpc", fake_jsonrpc)
+    return calls
+
+
+@pytest.fixture
+def service(main, monkeypatch):
+    """The service's model answers; any JSON-RPC listing call fails the test."""
+    import ipc
+
+    queries = []
+
+    def fake_query(name, **args):
+        queries.append((name, args))
+        return [dict(m) for m in MOVIES] if name == "movies" else SHOWS
+
+    monkeypatch.setattr(ipc, "query", fake_query)
+    monkeypatch.setattr(main, "jsonrpc", lambda *a, **k: pytest.fail(a))
+    return queries
+
+
+SHOWS = [
+    {"tvshowid": 10, "title": "Done", "watchedepisodes": 5, "episode": 5,
+     "lastplayed": "2024-06-01 00:00:00"},
+    {"tvshowid": 11, "title": "Going", "watchedepisodes": 2, "episode": 8,
+     "lastplayed": "2024-05-01 00:00:00"},
+    {"tvshowid": 12, "title": "Recent", "watchedepisodes": 1, "episode": 3,
+     "lastplayed": "2024-05-20 00:00:00"},
+    {"tvshowid": 13, "title": "Fresh", "watchedepisodes": 0, "episode": 3,
+     "lastplayed": ""},
+]
+
+
+def test_recent_asks_kodi_for_exactly_n_rows(no_cache, listed):
+    import widgets
+    from listing import MOVIE_WIDGET
+
+    widgets.list_recent("movie", "2", "kids OR family")
+    ((method, params),) = no_cache
+    assert method == "VideoLibrary.GetMovies"
+    assert params["properties"] == MOVIE_WIDGET.properties
+    assert params["sort"] == {"method": "dateadded", "order": "descending"}
+    assert params["limits"] == {"start": 0, "end": 2}
+    assert params["filter"] == {"or": [
+        {"field": "tag", "operator": "is", "value": "kids"},
+        {"field": "tag", "operator": "is", "value": "family"}]}
+    assert _ids(listed, "movieid") == [1, 2]
+
+
+def test_recent_picks_top_n_from_cached_rows(service, listed):
+    import widgets
+
+    widgets.list_recent("movie", "2")
+    assert _ids(listed, "movieid") == [2, 3]
+
+
+def test_in_progress_keeps_only_resumable_movies(service, listed):
+    import widgets
+
+    widgets.list_in_progress("movie")
+    assert _ids(listed, "movieid") == [3, 1]
+
+
+def test_in_progress_episodes_filter_server_side(no_cache):
+    import widgets
+
+    no_cache.clear()
+    widgets.list_in_progress("episode", "5", "ignored")
+    ((method, params),) = no_cache
+    assert method == "VideoLibrary.GetEpisodes"
+    assert params["filter"] == {"field": "inprogress", "operator": "true",
+                                "value": ""}
+
+
+def test_next_up_batches_one_row_per_show(service, main, monkeypatch, listed):
+    import widgets
+
+    batches = []
+
+    def fake_batch(calls):
+        calls = list(calls)
+        batches.append(calls)
+        return [{"episodes": [{"episodeid": p["tvshowid"] * 100,
+                               "title": "x", "file": ""}]}
+                for _m, p in calls]
+
+    monkeypatch.setattr(main, "jsonrpc_batch", fake_batch)
+    widgets.list_next_up("5")
+
+    first = batches[0][0][1]
+    assert [p["tvshowid"] for _m, p in batches[0]] == [12, 11]
+    assert first["limits"] == {"start": 0, "end": 1}
+    assert first["sort"] == {"method": "episode"}
+    assert {"field": "playcount", "operator": "is", "value": "0"} in (
+        first["filter"]["and"])
+    assert _ids(listed, "episodeid") == [1200, 1100]
+
+
+def test_random_samples_collection_members(main, monkeypatch, listed):
+    import collections_mod
+    import movies
+    import widgets
+
+    monkeypatch.setattr(collections_mod, "load_config", lambda: {
+        "collections": [], "movie_collections": [
+            {"name": "Trilogy", "movies": ["Old", "New", "Mid"]}]})
+    fetched = []
+
+    def fake_movies(properties=None, titles=None, **_kw):
+        fetched.append(titles)
+        return [m for m in MOVIES if m["title"] in titles]
+
+    monkeypatch.setattr(movies, "get_library_movies", fake_movies)
+    widgets.list_random("movie", 0, "2")
+    assert fetched == [["Old", "New", "Mid"]]
+    ids = _ids(listed, "movieid")
+    assert len(ids) == 2 and set(ids) <= {1, 2, 3}
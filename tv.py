@@ -2,42 +2,114 @@ import xbmc
 import xbmcgui
 import xbmcplugin
 
-from collections_mod import load_config, _get_collections, _items_key
+from listing import EPISODES, MOVIES, SHOWS
 
+_SHOW_PROPS = SHOWS.properties
 
-def get_library_shows(tag=None, properties=None):
-    from main import jsonrpc
+_SEASON_PROPS = [
+    "season", "showtitle", "art", "watchedepisodes", "episode", "playcount",
+]
+
+
+def get_library_shows(tag=None, properties=None, titles=None):
+    """Return library shows, optionally only those titled exactly ``titles``."""
+    from ipc import query
     if properties is None:
-        properties = [
-            "title", "art", "year", "genre", "rating", "plot",
-            "dateadded", "lastplayed", "watchedepisodes", "episode",
-        ]
+        properties = _SHOW_PROPS
+    if titles is not None and not titles:
+        return []
+    args = {"tag": tag, "properties": properties}
+    if titles is not None:
+        # Sent only when filtering; a service running older code rejects it
+        # and the local path below answers instead.
+        args["titles"] = titles
+    rows = query("shows", **args)
+    if rows is not None:
+        return rows
+    return _query_library_shows(tag, properties, titles)
+
+
+def _query_library_shows(tag, properties, titles=None):
+    """Read shows from the video DB or on-disk snapshot, else JSON-RPC."""
+    from db import read_items
+    from main import jsonrpc, library_filter
+    from snapshot import get_rows
+    rows = read_items("tvshow", properties, tag=tag, titles=titles)
+    if rows is None:
+        rows = get_rows("tvshow", properties, tag=tag, titles=titles)
+    if rows is not None:
+        return rows
     params = {"properties": properties}
-    if tag:
-        params["filter"] = {"field": "tag", "operator": "is", "value": tag}
+    rule = library_filter(tag, titles)
+    if rule:
+        params["filter"] = rule
     result = jsonrpc("VideoLibrary.GetTVShows", params)
     if result and "tvshows" in result:
         return result["tvshows"]
     return []
 
 
+def get_seasons(tvshowid):
+    """Return a show's seasons with ``_SEASON_PROPS``."""
+    from ipc import query
+    seasons = query("seasons", tvshowid=tvshowid)
+    if seasons is not None:
+        return seasons
+    return _query_seasons(tvshowid) or []
+
+
+def _query_seasons(tvshowid):
+    """Read a show's seasons from the video DB, else JSON-RPC (None on error)."""
+    from db import read_items
+    from main import jsonrpc
+    seasons = read_items("season", _SEASON_PROPS, tvshowid=tvshowid)
+    if seasons is not None:
+        seasons.sort(key=lambda s: s["season"])
+        return seasons
+    result = jsonrpc(
+        "VideoLibrary.GetSeasons",
+        {"tvshowid": tvshowid, "properties": _SEASON_PROPS},
+    )
+    if result is None:
+        return None
+    return result.get("seasons", [])
+
+
+def _linked_movie_ids(tvshowid):
+    """Return IDs of movies linked to a show in Kodi's video database."""
+    import memo
+
+    def fetch():
+        from ipc import query
+        ids = query("linked_movie_ids", tvshowid=tvshowid)
+        if ids is not None:
+            return ids
+        from db import get_linked_movie_ids
+        return get_linked_movie_ids(tvshowid)
+
+    return memo.cached(("linked_movie_ids", tvshowid), fetch)
+
+
 def list_titles(tag=None, collections_only=False):
     """Collection-aware title browser with 'Filter by Tag' folder."""
+    from listing import Directory
     from main import HANDLE, build_url, watched_menu_item
+    from collections_mod import (
+        load_config, get_index, _get_collections, refresh_show_ids,
+    )
 
     config = load_config()
     collections = _get_collections(config, "tv")
     library_shows = get_library_shows(tag=tag)
     library_lookup = {s["title"].lower(): s for s in library_shows}
-
-    title_to_collection = {}
-    for idx, col in enumerate(collections):
-        for show_title in col.get("shows", []):
-            title_to_collection[show_title.lower()] = idx
+    if not tag:
+        refresh_show_ids(config, library_shows)
+    title_index = get_index(config)["tv"]["titles"]
 
     sorted_shows = sorted(library_shows, key=lambda s: s["title"].lower())
 
     xbmcplugin.setContent(HANDLE, "tvshows")
+    directory = Directory(HANDLE)
     collections_shown = set()
 
     # Toggle URL for collections-only filter
@@ -50,7 +122,8 @@ def list_titles(tag=None, collections_only=False):
     toggle_label = "Show All" if collections_only else "Collections Only"
 
     for show in sorted_shows:
-        col_idx = title_to_collection.get(show["title"].lower())
+        hit = title_index.get(show["title"].lower())
+        col_idx = hit[0] if hit is not None else None
 
         if col_idx is not None:
             if col_idx in collections_shown:
@@ -67,12 +140,6 @@ def list_titles(tag=None, collections_only=False):
             configured_art = col.get("art", {})
             art.update(configured_art)
 
-            li = xbmcgui.ListItem(col["name"])
-            tag_info = li.getVideoInfoTag()
-            tag_info.setMediaType("tvshow")
-            tag_info.setTitle(col["name"])
-            tag_info.setPlot(col.get("description", ""))
-
             max_lp = ""
             max_da = ""
             for member_title in col["shows"]:
@@ -84,19 +151,26 @@ def list_titles(tag=None, collections_only=False):
                     da = member.get("dateadded", "")
                     if da > max_da:
                         max_da = da
-            if max_lp:
-                tag_info.setLastPlayed(max_lp)
-            if max_da:
-                tag_info.setDateAdded(max_da)
-
-            if art:
-                li.setArt(art)
 
+            li = SHOWS.build({
+                "title": col["name"],
+                "plot": col.get("description", ""),
+                "lastplayed": max_lp,
+                "dateadded": max_da,
+                "art": art,
+            })
             li.addContextMenuItems([
                 (
                     toggle_label,
                     "Container.Update({})".format(toggle_url),
                 ),
+                (
+                    "Play Next",
+                    "RunPlugin({})".format(build_url({
+                        "action": "play_next",
+                        "index": col_idx,
+                    })),
+                ),
                 (
                     "Set Collection Art",
                     "RunPlugin({})".format(build_url({
@@ -114,28 +188,12 @@ def list_titles(tag=None, collections_only=False):
             ])
 
             url = build_url({"action": "collection", "index": col_idx})
-            xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=True)
+            directory.add(url, li, True)
         else:
             if collections_only:
                 continue
 
-            li = xbmcgui.ListItem(show["title"])
-            tag_info = li.getVideoInfoTag()
-            tag_info.setMediaType("tvshow")
-            tag_info.setTitle(show["title"])
-            tag_info.setPlot(show.get("plot", ""))
-            tag_info.setYear(show.get("year", 0))
-            tag_info.setRating(show.get("rating", 0.0))
-            if show.get("dateadded"):
-                tag_info.setDateAdded(show["dateadded"])
-            if show.get("lastplayed"):
-                tag_info.setLastPlayed(show["lastplayed"])
-            genres = show.get("genre", [])
-            if genres:
-                tag_info.setGenres(genres)
-            if show.get("art"):
-                li.setArt(show["art"])
-
+            li = SHOWS.build(show)
             show_pc = 1 if show.get("watchedepisodes", 0) >= show.get("episode", 1) else 0
             li.addContextMenuItems([
                 watched_menu_item(build_url, "tvshow", show_pc,
@@ -158,8 +216,9 @@ def list_titles(tag=None, collections_only=False):
                 "action": "seasons",
                 "tvshowid": show["tvshowid"],
             })
-            xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=True)
+            directory.add(url, li, True)
 
+    directory.flush()
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_NONE)
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_TITLE_IGNORE_THE)
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_VIDEO_YEAR)
@@ -173,48 +232,16 @@ def list_titles(tag=None, collections_only=False):
 
 def _collection_level_movie_ids(config=None):
     """Return set of movie IDs placed at collection level."""
+    from collections_mod import load_config, get_index
+
     if config is None:
         config = load_config()
-    ids = set()
-    for col in config.get("collections", []):
-        for entry in col.get("shows", []):
-            if isinstance(entry, str) and entry.startswith("movie:"):
-                try:
-                    ids.add(int(entry.split(":")[1]))
-                except (ValueError, IndexError):
-                    pass
-    return ids
+    return {int(marker.split(":")[1]) for marker in get_index(config)["markers"]}
 
 
 def _build_movie_li(movie, build_url):
     """Build a ListItem for a linked movie."""
-    li = xbmcgui.ListItem(movie["title"])
-    tag_info = li.getVideoInfoTag()
-    tag_info.setMediaType("movie")
-    tag_info.setTitle(movie["title"])
-    tag_info.setPlot(movie.get("plot", ""))
-    tag_info.setYear(movie.get("year", 0))
-    tag_info.setRating(movie.get("rating", 0.0))
-    if movie.get("dateadded"):
-        tag_info.setDateAdded(movie["dateadded"])
-    if movie.get("lastplayed"):
-        tag_info.setLastPlayed(movie["lastplayed"])
-    genres = movie.get("genre", [])
-    if genres:
-        tag_info.setGenres(genres)
-    runtime = movie.get("runtime", 0)
-    if runtime:
-        tag_info.setDuration(runtime)
-    playcount = movie.get("playcount", 0)
-    if playcount:
-        tag_info.setPlaycount(playcount)
-    resume = movie.get("resume", {})
-    if resume.get("position", 0) > 0:
-        tag_info.setResumePoint(
-            resume["position"], resume.get("total", 0)
-        )
-    if movie.get("art"):
-        li.setArt(movie["art"])
+    li = MOVIES.build(movie)
     li.setProperty("IsPlayable", "true")
     url = build_url({
         "action": "play_movie",
@@ -224,42 +251,85 @@ def _build_movie_li(movie, build_url):
     return li, url
 
 
-_MOVIE_PROPS = [
-    "title", "art", "year", "genre", "rating", "plot",
-    "file", "playcount", "runtime", "resume",
-    "dateadded", "lastplayed",
-]
+_MOVIE_PROPS = MOVIES.properties
 
 
-def _fetch_linked_movies(tvshowid, jsonrpc, config=None):
+def get_movie_details(movieids):
+    """Fetch details for several movies in one round trip.
+
+    Returns a {movieid: details} dict in the order of ``movieids``; movies
+    that could not be fetched are left out.
+    """
+    from ipc import query
+    from main import jsonrpc_batch
+
+    movieids = list(movieids)
+    rows = query("movie_details", movieids=movieids, properties=_MOVIE_PROPS)
+    if rows is not None:
+        return {row["movieid"]: row for row in rows}
+    results = jsonrpc_batch(
+        ("VideoLibrary.GetMovieDetails",
+         {"movieid": mid, "properties": _MOVIE_PROPS})
+        for mid in movieids
+    )
+    movie_details = {}
+    for mid, result in zip(movieids, results):
+        if result and "moviedetails" in result:
+            movie_details[mid] = result["moviedetails"]
+    return movie_details
+
+
+def next_unwatched_episodes(tvshowids, properties):
+    """Return ``{tvshowid: first unwatched episode}`` for several shows.
+
+    One ``GetEpisodes`` per show, limited to a single row and batched into
+    one round trip.  Specials are skipped, as in Kodi's own next-up; shows
+    with nothing left to watch are left out.
+    """
+    from main import jsonrpc_batch
+
+    tvshowids = list(tvshowids)
+    results = jsonrpc_batch(
+        ("VideoLibrary.GetEpisodes", {
+            "tvshowid": tvshowid,
+            "properties": properties,
+            "filter": {"and": [
+                {"field": "playcount", "operator": "is", "value": "0"},
+                {"field": "season", "operator": "greaterthan", "value": "0"},
+            ]},
+            "sort": {"method": "episode"},
+            "limits": {"start": 0, "end": 1},
+        })
+        for tvshowid in tvshowids
+    )
+    episodes = {}
+    for tvshowid, result in zip(tvshowids, results):
+        rows = (result or {}).get("episodes")
+        if rows:
+            episodes[tvshowid] = rows[0]
+    return episodes
+
+
+def _fetch_linked_movies(tvshowid, config=None):
     """Fetch linked movie details, returning {movieid: details} dict.
 
     Excludes movies placed at collection level.
     """
-    from db import get_linked_movie_ids
-
-    linked_ids = get_linked_movie_ids(tvshowid)
+    linked_ids = _linked_movie_ids(tvshowid)
     if not linked_ids:
         return {}
     col_ids = _collection_level_movie_ids(config=config)
-    movie_details = {}
-    for mid in linked_ids:
-        if mid in col_ids:
-            continue
-        result = jsonrpc(
-            "VideoLibrary.GetMovieDetails",
-            {"movieid": mid, "properties": _MOVIE_PROPS},
-        )
-        if result and "moviedetails" in result:
-            movie_details[mid] = result["moviedetails"]
-    return movie_details
+    return get_movie_details(mid for mid in linked_ids if mid not in col_ids)
 
 
 def _merge_show_items(seasons, movie_details, tvshowid, config=None):
     """Merge seasons and linked movies using stored order or default."""
+    import reorder
+    from collections_mod import load_config
+
     if config is None:
         config = load_config()
-    stored = config.get("show_item_order", {}).get(str(tvshowid), [])
+    stored = reorder.show_order(config, tvshowid)
 
     season_map = {s["season"]: s for s in seasons}
 
@@ -289,7 +359,19 @@ def _merge_show_items(seasons, movie_details, tvshowid, config=None):
 
 def _find_collection_for_show(tvshowid, jsonrpc, config=None, show_title=None):
     """Find the collection index that contains the given show, or -1."""
+    from collections_mod import load_config, get_index
+
+    if config is None:
+        config = load_config()
+    index = get_index(config)
     if show_title is None:
+        col_idx = index["tvshowids"].get(str(tvshowid))
+        if col_idx is not None:
+            return col_idx
+        if not index["unresolved"]:
+            return -1
+        # A collection member wasn't in the library when the index was
+        # built; this may be it, so fall back to looking the title up.
         result = jsonrpc(
             "VideoLibrary.GetTVShowDetails",
             {"tvshowid": tvshowid, "properties": ["title"]},
@@ -298,31 +380,16 @@ def _find_collection_for_show(tvshowid, jsonrpc, config=None, show_title=None):
             return -1
         show_title = result["tvshowdetails"]["title"]
 
-    show_title_lower = show_title.lower()
-    if config is None:
-        config = load_config()
-    for idx, col in enumerate(config.get("collections", [])):
-        for entry in col.get("shows", []):
-            if isinstance(entry, str) and not entry.startswith("movie:"):
-                if entry.lower() == show_title_lower:
-                    return idx
-    return -1
+    hit = index["tv"]["titles"].get(show_title.lower())
+    return hit[0] if hit is not None else -1
 
 
 def list_seasons(tvshowid):
+    from collections_mod import load_config
+    from listing import Directory
     from main import HANDLE, build_url, jsonrpc, get_kodi_setting, _select_first_unwatched, watched_menu_item
 
-    result = jsonrpc(
-        "VideoLibrary.GetSeasons",
-        {
-            "tvshowid": tvshowid,
-            "properties": [
-                "season", "showtitle", "art", "watchedepisodes",
-                "episode", "playcount",
-            ],
-        },
-    )
-    seasons = result.get("seasons", []) if result else []
+    seasons = get_seasons(tvshowid)
     if not seasons:
         xbmcgui.Dialog().notification(
             "TV Collections", "No seasons found", xbmcgui.NOTIFICATION_INFO
@@ -348,7 +415,7 @@ def list_seasons(tvshowid):
     show_info = show_result.get("tvshowdetails", {}) if show_result else {}
 
     config = load_config()
-    movie_details = _fetch_linked_movies(tvshowid, jsonrpc, config=config)
+    movie_details = _fetch_linked_movies(tvshowid, config=config)
     items = _merge_show_items(seasons, movie_details, tvshowid, config=config)
 
     col_idx = _find_collection_for_show(
@@ -358,6 +425,7 @@ def list_seasons(tvshowid):
 
     try:
         xbmcplugin.setContent(HANDLE, "seasons")
+        directory = Directory(HANDLE)
         include_specials = get_kodi_setting(
             "videolibrary.tvshowsincludeallseasonsandspecials"
         )
@@ -393,7 +461,7 @@ def list_seasons(tvshowid):
                     "tvshowid": tvshowid,
                     "season": data["season"],
                 })
-                xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=True)
+                directory.add(url, li, True)
             else:
                 li, url = _build_movie_li(data, build_url)
                 ctx = [
@@ -421,6 +489,16 @@ def list_seasons(tvshowid):
                             "direction": "down",
                         })),
                     ))
+                if len(items) > 2:
+                    ctx.append((
+                        "Move to Position...",
+                        "RunPlugin({})".format(build_url({
+                            "action": "move_show_item",
+                            "tvshowid": tvshowid,
+                            "pos": idx,
+                            "direction": "to",
+                        })),
+                    ))
                 if col_idx >= 0:
                     ctx.append((
                         "Move to Collection",
@@ -432,8 +510,9 @@ def list_seasons(tvshowid):
                     ))
 
                 li.addContextMenuItems(ctx)
-                xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=False)
+                directory.add(url, li)
 
+        directory.flush()
         xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_NONE)
         xbmcplugin.endOfDirectory(HANDLE)
         _select_first_unwatched(first_unwatched_index)
@@ -442,26 +521,23 @@ def list_seasons(tvshowid):
 
 
 def action_move_show_item(tvshowid, pos, direction):
-    """Move a linked movie up or down in the show's season/movie listing."""
-    from main import jsonrpc
-    from db import get_linked_movie_ids
-    from collections_mod import save_config
+    """Move a linked movie up, down or (``direction="to"``) to a chosen
+    position in the show's season/movie listing."""
+    import reorder
+    from collections_mod import load_config, _ask_position
 
     # Rebuild current item order
-    result = jsonrpc(
-        "VideoLibrary.GetSeasons",
-        {"tvshowid": tvshowid, "properties": ["season"]},
-    )
-    seasons = result.get("seasons", []) if result else []
+    seasons = get_seasons(tvshowid)
     season_set = {s["season"] for s in seasons}
 
     config = load_config()
 
-    linked_ids = get_linked_movie_ids(tvshowid)
+    linked_ids = _linked_movie_ids(tvshowid)
     col_ids = _collection_level_movie_ids(config=config)
     linked_ids = [mid for mid in linked_ids if mid not in col_ids]
     movie_set = set(linked_ids)
-    stored = config.get("show_item_order", {}).get(str(tvshowid), [])
+    key = reorder.show_key(tvshowid)
+    stored = reorder.show_order(config, tvshowid)
 
     if stored:
         items = []
@@ -484,20 +560,28 @@ def action_move_show_item(tvshowid, pos, direction):
         items = [{"type": "season", "id": s["season"]} for s in seasons]
         items.extend({"type": "movie", "id": mid} for mid in linked_ids)
 
-    if direction == "up" and pos > 0:
-        items[pos], items[pos - 1] = items[pos - 1], items[pos]
+    if pos >= len(items):
+        return
+    if direction == "to":
+        new_pos = _ask_position(pos, len(items))
+        if new_pos is None:
+            return
+    elif direction == "up" and pos > 0:
+        new_pos = pos - 1
     elif direction == "down" and pos < len(items) - 1:
-        items[pos], items[pos + 1] = items[pos + 1], items[pos]
+        new_pos = pos + 1
+    else:
+        return
 
-    config.setdefault("show_item_order", {})[str(tvshowid)] = items
-    save_config(config)
+    reorder.move(items, pos, new_pos)
+    reorder.commit(config, key, items, immediate=direction == "to")
     xbmc.executebuiltin("Container.Refresh")
 
 
 def action_move_linked_to_collection(movieid, tvshowid):
     """Move a linked movie from show level to collection level."""
     from main import jsonrpc
-    from collections_mod import save_config
+    from collections_mod import load_config, get_index, save_config
 
     col_idx = _find_collection_for_show(tvshowid, jsonrpc)
     if col_idx < 0:
@@ -528,11 +612,9 @@ def action_move_linked_to_collection(movieid, tvshowid):
 
     insert_pos = len(shows_list)
     if show_title:
-        for i, entry in enumerate(shows_list):
-            if isinstance(entry, str) and not entry.startswith("movie:"):
-                if entry.lower() == show_title.lower():
-                    insert_pos = i + 1
-                    break
+        hit = get_index(config)["tv"]["titles"].get(show_title.lower())
+        if hit is not None and hit[0] == col_idx:
+            insert_pos = hit[1] + 1
 
     shows_list.insert(insert_pos, marker)
     save_config(config)
@@ -541,7 +623,7 @@ def action_move_linked_to_collection(movieid, tvshowid):
 
 def action_move_linked_to_show(collection_index, pos):
     """Move a linked movie from collection level back to show level."""
-    from collections_mod import save_config
+    from collections_mod import load_config, save_config
 
     config = load_config()
     collections = config.get("collections", [])
@@ -557,21 +639,36 @@ def action_move_linked_to_show(collection_index, pos):
     xbmc.executebuiltin("Container.Refresh")
 
 
-def list_episodes(tvshowid, season):
-    from main import HANDLE, build_url, jsonrpc, get_kodi_setting, _select_first_unwatched, watched_menu_item
+def list_episodes(tvshowid, season, start=0):
+    """List a season's episodes, or the whole show's when ``season`` is None.
+
+    The flattened whole-show listing is paged when paging is on
+    (``get_page_size``): only the episodes from ``start`` are fetched, in
+    season/episode order, and linked movies follow the last page.
+    """
+    from listing import Directory
+    from main import HANDLE, build_url, jsonrpc, get_kodi_setting, get_page_size, _select_first_unwatched, watched_menu_item
+    from db import read_items
 
-    params = {
-        "tvshowid": tvshowid,
-        "properties": [
-            "title", "plot", "season", "episode", "showtitle",
-            "firstaired", "runtime", "rating", "director", "writer",
-            "art", "file", "playcount", "resume", "lastplayed", "dateadded",
-        ],
-    }
+    params = {"tvshowid": tvshowid, "properties": EPISODES.properties}
+    filters = {"tvshowid": tvshowid}
     if season is not None:
         params["season"] = season
-    result = jsonrpc("VideoLibrary.GetEpisodes", params)
-    episodes = result.get("episodes", []) if result else []
+        filters["season"] = season
+    page_size = get_page_size() if season is None else 0
+    limits = None
+    if page_size:
+        limits = (start, start + page_size + 1)
+        params["limits"] = {"start": limits[0], "end": limits[1]}
+        params["sort"] = {"method": "episode"}
+    episodes = read_items("episode", params["properties"], limits=limits,
+                          **filters)
+    if episodes is None:
+        result = jsonrpc("VideoLibrary.GetEpisodes", params)
+        episodes = result.get("episodes", []) if result else []
+    has_more = bool(page_size) and len(episodes) > page_size
+    if has_more:
+        del episodes[page_size:]
     # Order by season/episode rather than trusting the DB's default order.
     # GetEpisodes returns rows in episodeid order, which normally matches
     # episode order — but a rescraped episode gets a fresh (high) episodeid and
@@ -587,6 +684,7 @@ def list_episodes(tvshowid, season):
 
     try:
         xbmcplugin.setContent(HANDLE, "episodes")
+        directory = Directory(HANDLE)
         skip_specials = False
         if season is None:
             include_specials = get_kodi_setting(
@@ -600,41 +698,7 @@ def list_episodes(tvshowid, season):
                     first_unwatched_index = idx
 
             label = "{}x{:02d}. {}".format(ep["season"], ep["episode"], ep["title"])
-            li = xbmcgui.ListItem(label)
-
-            tag_info = li.getVideoInfoTag()
-            tag_info.setMediaType("episode")
-            tag_info.setTitle(ep["title"])
-            tag_info.setTvShowTitle(ep.get("showtitle", ""))
-            tag_info.setSeason(ep["season"])
-            tag_info.setEpisode(ep["episode"])
-            tag_info.setPlot(ep.get("plot", ""))
-            tag_info.setFirstAired(ep.get("firstaired", ""))
-            tag_info.setRating(ep.get("rating", 0.0))
-            tag_info.setPlaycount(ep.get("playcount", 0))
-            tag_info.setLastPlayed(ep.get("lastplayed", ""))
-            if ep.get("dateadded"):
-                tag_info.setDateAdded(ep["dateadded"])
-
-            runtime = ep.get("runtime", 0)
-            if runtime:
-                tag_info.setDuration(runtime)
-
-            directors = ep.get("director", [])
-            if directors:
-                tag_info.setDirectors(directors)
-
-            writers = ep.get("writer", [])
-            if writers:
-                tag_info.setWriters(writers)
-
-            resume = ep.get("resume", {})
-            if resume.get("position", 0) > 0:
-                tag_info.setResumePoint(resume["position"], resume.get("total", 0))
-
-            if ep.get("art"):
-                li.setArt(ep["art"])
-
+            li = EPISODES.build(ep, label=label)
             li.addContextMenuItems([
                 watched_menu_item(build_url, "episode",
                                   ep.get("playcount", 0),
@@ -647,44 +711,39 @@ def list_episodes(tvshowid, season):
                 "episodeid": ep["episodeid"],
                 "file": ep.get("file", ""),
             })
-            xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=False)
-
-        if season is None:
-            _add_linked_movies(tvshowid)
-
+            directory.add(url, li)
+
+        if has_more:
+            directory.add_next_page(build_url({
+                "action": "episodes",
+                "tvshowid": tvshowid,
+                "start": start + page_size,
+            }))
+        elif season is None:
+            _add_linked_movies(tvshowid, directory)
+
+        directory.flush()
         xbmcplugin.endOfDirectory(HANDLE)
         _select_first_unwatched(first_unwatched_index)
     except RuntimeError:
         pass
 
 
-def _add_linked_movies(tvshowid):
-    """Add movies linked to a TV show to the current directory listing.
+def _add_linked_movies(tvshowid, directory):
+    """Add movies linked to a TV show to ``directory``.
 
     Excludes movies placed at collection level.
     """
-    from main import HANDLE, build_url, jsonrpc, watched_menu_item
-    from db import get_linked_movie_ids
-
-    linked_ids = get_linked_movie_ids(tvshowid)
-    if not linked_ids:
-        return
+    from collections_mod import load_config
+    from main import build_url, jsonrpc, watched_menu_item
 
     config = load_config()
-    col_ids = _collection_level_movie_ids(config=config)
+    movie_details = _fetch_linked_movies(tvshowid, config=config)
+    if not movie_details:
+        return
     col_idx = _find_collection_for_show(tvshowid, jsonrpc, config=config)
 
-    for mid in linked_ids:
-        if mid in col_ids:
-            continue
-        result = jsonrpc(
-            "VideoLibrary.GetMovieDetails",
-            {"movieid": mid, "properties": _MOVIE_PROPS},
-        )
-        if not result or "moviedetails" not in result:
-            continue
-        movie = result["moviedetails"]
-
+    for movie in movie_details.values():
         li, url = _build_movie_li(movie, build_url)
         ctx = [
             watched_menu_item(build_url, "movie",
@@ -701,7 +760,7 @@ def _add_linked_movies(tvshowid):
                 })),
             ))
         li.addContextMenuItems(ctx)
-        xbmcplugin.addDirectoryItem(HANDLE, url, li, isFolder=False)
+        directory.add(url, li)
 
 
 def play_episode(episodeid, file):
@@ -0,0 +1,206 @@
+"""Home-screen widget routes: the top N rows of a list, and nothing else.
+
+Skins refresh their widgets every time the home screen comes back, so these
+routes must never pull the whole library.  When the service's model or the
+on-disk snapshot can answer, the top N is picked from its rows with
+``heapq``; otherwise a single JSON-RPC request asks Kodi for exactly N rows,
+sorted server-side.  Rows carry the small widget property sets from
+``listing`` and no context menus.
+
+``limit`` defaults to ``DEFAULT_LIMIT`` (at most ``MAX_LIMIT``); ``tag``
+takes a tag expression (see ``tag_query``) for shows and movies.
+"""
+
+import heapq
+import random
+
+import xbmcplugin
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_MEDIA = {
+    "movie": ("VideoLibrary.GetMovies", "movies"),
+    "tvshow": ("VideoLibrary.GetTVShows", "tvshows"),
+    "episode": ("VideoLibrary.GetEpisodes", "episodes"),
+}
+_IN_PROGRESS = {"field": "inprogress", "operator": "true", "value": ""}
+
+
+def _limit(value):
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def _view(media):
+    from listing import EPISODE_WIDGET, MOVIE_WIDGET, SHOW_WIDGET
+    return {"movie": MOVIE_WIDGET, "tvshow": SHOW_WIDGET,
+            "episode": EPISODE_WIDGET}[media]
+
+
+def _cached_rows(media, tag):
+    """Every ``media`` row from the service or the snapshot, or None.
+
+    Not ``get_library_*``: their last resort fetches the whole library over
+    JSON-RPC, which is what a widget must avoid.  Episodes are in neither.
+    """
+    from ipc import query
+    from snapshot import get_rows
+
+    if media == "episode":
+        return None
+    properties = _view(media).properties
+    rows = query("shows" if media == "tvshow" else "movies",
+                 tag=tag, properties=properties)
+    if rows is None:
+        rows = get_rows(media, properties, tag=tag)
+    return rows
+
+
+def _top(media, limit, sort, tag=None, keep=None, rule=None):
+    """Return the ``limit`` rows with the latest ``sort`` date.
+
+    ``keep`` selects among cached rows; ``rule`` is the same selection as a
+    JSON-RPC filter.
+    """
+    from main import jsonrpc, library_filter
+
+    rows = _cached_rows(media, tag)
+    if rows is not None:
+        if keep is not None:
+            rows = filter(keep, rows)
+        return heapq.nlargest(limit, rows, key=lambda r: r.get(sort) or "")
+
+    method, result_key = _MEDIA[media]
+    params = {
+        "properties": _view(media).properties,
+        "sort": {"method": sort, "order": "descending"},
+        "limits": {"start": 0, "end": limit},
+    }
+    rules = [r for r in (library_filter(tag), rule) if r]
+    if rules:
+        params["filter"] = rules[0] if len(rules) == 1 else {"and": rules}
+    result = jsonrpc(method, params)
+    return (result or {}).get(result_key, [])
+
+
+def _resuming(row):
+    return (row.get("resume") or {}).get("position", 0) > 0
+
+
+def _show_in_progress(row):
+    return 0 < row.get("watchedepisodes", 0) < row.get("episode", 0)
+
+
+def _add(directory, media, row, label=None):
+    from main import build_url
+
+    li = _view(media).build(row, label=label)
+    if media == "tvshow":
+        url = build_url({"action": "seasons", "tvshowid": row["tvshowid"]})
+        directory.add(url, li, True)
+        return
+    li.setProperty("IsPlayable", "true")
+    if media == "movie":
+        url = build_url({"action": "play_movie",
+                         "movieid": row["movieid"],
+                         "file": row.get("file", "")})
+    else:
+        url = build_url({"action": "play",
+                         "episodeid": row["episodeid"],
+                         "file": row.get("file", "")})
+    directory.add(url, li)
+
+
+def _emit(media, rows):
+    from listing import Directory
+    from main import HANDLE
+
+    xbmcplugin.setContent(HANDLE, media + "s")
+    directory = Directory(HANDLE)
+    for row in rows:
+        _add(directory, media, row)
+    directory.flush()
+    xbmcplugin.endOfDirectory(HANDLE)
+
+
+def list_recent(media, limit=None, tag=None):
+    """Recently added movies, shows or episodes."""
+    media = media if media in _MEDIA else "movie"
+    tag = None if media == "episode" else tag
+    _emit(media, _top(media, _limit(limit), "dateadded", tag))
+
+
+def list_in_progress(media, limit=None, tag=None):
+    """Partly watched movies or episodes, last played first."""
+    if media == "episode":
+        rows = _top("episode", _limit(limit), "lastplayed", rule=_IN_PROGRESS)
+    else:
+        media = "movie"
+        rows = _top("movie", _limit(limit), "lastplayed", tag,
+                    keep=_resuming, rule=_IN_PROGRESS)
+    _emit(media, rows)
+
+
+def list_next_up(limit=None, tag=None):
+    """The next episode of each show in progress, last played show first."""
+    from listing import EPISODE_WIDGET
+    from tv import next_unwatched_episodes
+
+    shows = _top("tvshow", _limit(limit), "lastplayed", tag,
+                 keep=_show_in_progress, rule=_IN_PROGRESS)
+    ids = [s["tvshowid"] for s in shows]
+    episodes = next_unwatched_episodes(ids, EPISODE_WIDGET.properties)
+    _emit("episode", [episodes[i] for i in ids if i in episodes])
+
+
+def list_random(media_type, collection_index, limit=None):
+    """Random members of one collection (``media_type`` ``tv`` or ``movie``)."""
+    from collections_mod import _get_collections, _items_key, load_config
+
+    collections = _get_collections(load_config(), media_type)
+    rows = []
+    if 0 <= collection_index < len(collections):
+        entries = collections[collection_index][_items_key(media_type)]
+        titles = [e for e in entries
+                  if isinstance(e, str) and not e.startswith("movie:")]
+        if media_type == "tv":
+            from tv import get_library_shows
+            rows = get_library_shows(properties=_view("tvshow").properties,
+                                     titles=titles)
+        else:
+            from movies import get_library_movies
+            rows = get_library_movies(properties=_view("movie").properties,
+                                      titles=titles)
+    rows = random.sample(rows, min(_limit(limit), len(rows)))
+    _emit("tvshow" if media_type == "tv" else "movie", rows)
+
+
+def list_collection_next_up(limit=None, collection_index=None):
+    """The next item of each TV collection (or just ``collection_index``),
+    labelled with the collection's name."""
+    from collections_mod import _get_collections, load_config
+    from listing import Directory
+    from main import HANDLE
+    from next_up import next_item
+
+    collections = _get_collections(load_config(), "tv")
+    if collection_index is None:
+        indices = range(len(collections))
+    else:
+        indices = [collection_index]
+    xbmcplugin.setContent(HANDLE, "videos")
+    directory = Directory(HANDLE)
+    for index in indices:
+        if len(directory) >= _limit(limit):
+            break
+        item = next_item(index)
+        if item is None:
+            continue
+        row = item["row"]
+        label = "{}: {}".format(collections[index]["name"], row["title"])
+        _add(directory, item["type"], row, label=label)
+    directory.flush()
+    xbmcplugin.endOfDirectory(HANDLE)